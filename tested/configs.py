@@ -14,7 +14,10 @@ from tested.utils import get_identifier, smart_close
 
 # Prevent circular imports
 if TYPE_CHECKING:
+    from tested.judge.profiles import ProfileStore
+    from tested.judge.servers import ServerPool
     from tested.languages import Language
+    from tested.languages.fragments import SuiteFragments
 
 _logger = logging.getLogger(__name__)
 
@@ -65,6 +68,52 @@ class Options:
     Longer exercises, or exercises where the solution might depend on optimization
     may need this option.
     """
+    fail_fast: int | None = None
+    """
+    Stop executing the submission once this many contexts have failed. The
+    remaining contexts are reported as not executed. Disabled by default.
+    """
+    profile: str | None = None
+    """
+    A file in which the durations of the executions are recorded, to improve the
+    planning of later executions. A relative path is relative to the evaluation
+    folder of the exercise. The file must be writable. Disabled by default.
+    """
+    execution_server: bool = False
+    """
+    Execute the units in a server process that is kept running during the
+    judgement, for languages that support it (for example, GHCi for runhaskell).
+    This avoids starting a new process for each unit, but the units share the
+    process. Disabled by default.
+    """
+    cache: str | None = None
+    """
+    A directory in which generated files are kept, to reuse them in later
+    judgements of the exercise. A relative path is relative to the evaluation
+    folder of the exercise. The directory must be writable. Disabled by default.
+    """
+    compilation_server: bool = False
+    """
+    Compile the code in a server process that is started at the beginning of the
+    judgement, for languages that support it (for example, Kotlin). If the server
+    cannot be started, the code is compiled as usual. Disabled by default.
+    """
+    virtual_stdin: bool = False
+    """
+    Execute contexts with stdin in the same unit as the other contexts, for
+    languages where the unit can provide the stdin of each context itself. This
+    results in fewer units, but the contexts are less isolated: if a context
+    crashes or exits, the later contexts in the unit are not executed, and state
+    such as a buffered reader on stdin is shared. Disabled by default.
+    """
+    exit_interception: bool = False
+    """
+    Intercept the exit calls of the submission, so the contexts that check the exit
+    code are executed in the same unit as the other contexts, for languages that
+    support it. An exit call then ends the context instead of the program. This
+    results in fewer units, but the contexts are less isolated. In C, this
+    redefines `exit` in the submission. Disabled by default.
+    """
 
 
 @fallback_field(get_converter(), {"testplan": "test_suite", "plan_name": "test_suite"})
@@ -116,6 +165,19 @@ class GlobalConfig:
     testcase_separator_secret: str
     context_separator_secret: str
     suite: "Suite"
+    # Static feedback for the suite, see tested.languages.fragments.
+    fragments: Optional["SuiteFragments"] = None
+    # Recorded durations of earlier executions, see tested.judge.profiles.
+    profile: Optional["ProfileStore"] = None
+    # The running execution servers, see tested.judge.servers.
+    servers: Optional["ServerPool"] = None
+    # The running compilation servers, see tested.judge.servers.
+    compilers: Optional["ServerPool"] = None
+    # The hash of the test suite, see tested.languages.fragments.suite_hash.
+    suite_hash: str | None = None
+    # The options that affect the generated code, see
+    # tested.languages.generation.generation_key.
+    generation_key: str | None = None
 
     @property
     def options(self) -> Options:
@@ -146,6 +208,27 @@ class Bundle:
     def context_separator_secret(self) -> str:
         return self.global_config.context_separator_secret
 
+    @property
+    def virtual_stdin(self) -> bool:
+        """
+        If the execution units provide the stdin of the contexts themselves, which
+        the exercise must enable and the language must support.
+        """
+        return (
+            self.config.options.virtual_stdin and self.language.supports_virtual_stdin()
+        )
+
+    @property
+    def exit_interception(self) -> bool:
+        """
+        If the execution units intercept the exit calls of the submission, which the
+        exercise must enable and the language must support.
+        """
+        return (
+            self.config.options.exit_interception
+            and self.language.supports_exit_interception()
+        )
+
 
 def _consume_shebang(submission: Path) -> Optional["SupportedLanguage"]:
     """
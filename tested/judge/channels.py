@@ -0,0 +1,162 @@
+"""
+Result channels between the judge and the generated harness.
+
+The harness writes the values and exceptions of the testcases (and the exit code
+of each context, if the language supports it) to files, of which the names are
+baked into the generated code (see `PreparedExecutionUnit`).
+Instead of regular files, the judge creates named pipes with these names. The
+output of the harness is drained concurrently into a bounded buffer, so the
+results never touch the disk and a runaway harness cannot fill up the disk or the
+memory of the judge.
+
+On platforms without named pipes, the regular files are used.
+"""
+
+import bisect
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+from attrs import define, field
+
+_logger = logging.getLogger(__name__)
+
+# How long to wait for the last data after the execution is done, in seconds.
+_DRAIN_TIMEOUT = 1
+
+
+def supports_pipes() -> bool:
+    return hasattr(os, "mkfifo")
+
+
+@define
+class OutputBuffer:
+    """
+    Drains a file descriptor into a buffer in a background thread.
+
+    The data can be inspected while it is arriving, which allows the judge to
+    act on partial output of the execution (see `data`).
+    """
+
+    fd: int
+    limit: int | None = None
+    data: bytearray = field(factory=bytearray, init=False)
+    truncated: bool = field(default=False, init=False)
+    _thread: threading.Thread | None = field(default=None, init=False)
+    # For each chunk, the length of the data with the chunk and when it arrived.
+    _arrivals: list[tuple[int, float]] = field(factory=list, init=False)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._drain, daemon=True)
+        self._thread.start()
+
+    def _drain(self):
+        try:
+            while chunk := os.read(self.fd, 64 * 1024):
+                self._append(chunk)
+        finally:
+            os.close(self.fd)
+
+    def _append(self, chunk: bytes):
+        if self.limit is not None:
+            # Keep reading when the limit is reached, otherwise the writer would
+            # block on a full pipe.
+            if len(self.data) + len(chunk) > self.limit:
+                self.truncated = True
+            chunk = chunk[: self.limit - len(self.data)]
+        # The arrival is known before the data, see `arrival`.
+        self._arrivals.append((len(self.data) + len(chunk), time.perf_counter()))
+        self.data += chunk
+
+    def read_available(self):
+        """
+        Read the data that is available now, instead of draining the file
+        descriptor in the background. This is meant for a regular file that is
+        still being written, of which the caller owns the file descriptor.
+        """
+        while chunk := os.read(self.fd, 64 * 1024):
+            self._append(chunk)
+
+    def join(self, timeout: float | None = _DRAIN_TIMEOUT) -> bool:
+        """
+        Wait until the end of the data is reached.
+
+        :return: True if the end was reached, False if the timeout expired.
+        """
+        assert self._thread is not None
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def arrival(self, offset: int) -> float:
+        """
+        Get the time at which the data up to an offset arrived, as given by
+        `time.perf_counter`. If this is not known, the current time is returned.
+        """
+        index = bisect.bisect_left(self._arrivals, offset, key=lambda a: a[0])
+        if index < len(self._arrivals):
+            return self._arrivals[index][1]
+        return time.perf_counter()
+
+    def text(self) -> str:
+        return decode_output(self.data)
+
+
+def decode_output(data: bytes | bytearray) -> str:
+    """
+    Decode output in the same way as a pipe in text mode, with universal newlines.
+    """
+    text = data.decode("utf-8", "backslashreplace")
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+@define
+class ResultChannel:
+    """
+    A named pipe that is read by the judge while the harness is running.
+
+    The judge keeps a write end of the pipe open itself, which ensures the reader
+    does not see the end of the pipe when the harness opens and closes the file
+    several times (as the Bash harness does). Once the execution is done, closing
+    this write end signals the end of the data.
+    """
+
+    path: Path
+    buffer: OutputBuffer
+    _writer: int
+
+    @classmethod
+    def open(cls, path: Path, limit: int) -> "ResultChannel":
+        """
+        Create the named pipe and start draining it.
+
+        :param path: Where the harness expects the file.
+        :param limit: The maximum number of bytes that are kept.
+        """
+        os.mkfifo(path)
+        # Opening the read end must not block, as there is no writer yet.
+        reader = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+        writer = os.open(path, os.O_WRONLY)
+        os.set_blocking(reader, True)
+        buffer = OutputBuffer(reader, limit)
+        buffer.start()
+        return cls(path, buffer, writer)
+
+    def close(self) -> str:
+        """
+        Signal that the execution is done and collect the data.
+
+        If a process still holds the pipe open after the execution, the data that
+        has been received so far is returned.
+
+        :return: The data written by the harness.
+        """
+        os.close(self._writer)
+        if not self.buffer.join():
+            _logger.warning(f"Result channel {self.path} is still open.")
+        if self.buffer.truncated:
+            _logger.warning(
+                f"Result channel {self.path} exceeded {self.buffer.limit} bytes."
+            )
+        return self.buffer.text()
@@ -12,6 +12,7 @@ from tested.dodona import (
     EscalateStatus,
     ExtendedMessage,
     Message,
+    StartContext,
     StartTestcase,
     Status,
     StatusMessage,
@@ -38,18 +39,24 @@ class OutputManager:
         "open_stack",
         "currently_open",
         "out",
+        "failed_contexts",
+        "context_failed",
     ]
 
     finalized: bool
     open_stack: list[str]
     currently_open: tuple[int, int, int]
     out: IO
+    failed_contexts: int
+    context_failed: bool
 
     def __init__(self, out: IO):
         self.finalized = False
         self.open_stack = []
         self.currently_open = (0, 0, 0)
         self.out = out
+        self.failed_contexts = 0
+        self.context_failed = False
 
     def add_all(self, commands: Iterable[Update]):
         for command in commands:
@@ -86,9 +93,32 @@ class OutputManager:
                 tabs, contexts, _ = self.currently_open
                 self.currently_open = (tabs, contexts, index + 1)
 
+        self._track_failures(command)
+
         _logger.debug(f"After adding, stack is {self.open_stack}")
         report_update(self.out, command)
 
+    def _track_failures(self, command: Update):
+        """
+        Count the contexts with a test that is not accepted or a worse status.
+        """
+        if isinstance(command, StartContext):
+            self.context_failed = False
+        elif isinstance(command, CloseTest):
+            if command.accepted is None:
+                failed = command.status.enum != Status.CORRECT
+            else:
+                failed = not command.accepted
+            self.context_failed = self.context_failed or failed
+        elif isinstance(command, CloseTestcase) and command.accepted is False:
+            self.context_failed = True
+        elif isinstance(command, EscalateStatus) and "context" in self.open_stack:
+            if command.status.enum != Status.CORRECT:
+                self.context_failed = True
+        elif isinstance(command, CloseContext) and self.context_failed:
+            self.failed_contexts += 1
+            self.context_failed = False
+
     def terminate(
         self,
         status_if_unclosed: Status | StatusMessage,
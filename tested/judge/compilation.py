@@ -9,6 +9,7 @@ from tested.configs import Bundle
 from tested.dodona import Status
 from tested.internationalization import get_i18n_string
 from tested.judge.planning import CompilationResult, ExecutionPlan
+from tested.judge.servers import get_compilation_servers
 from tested.judge.utils import (
     BaseExecutionResult,
     copy_workdir_files,
@@ -63,7 +64,11 @@ def run_compilation(
     _logger.debug(
         "Generating files with command %s in directory %s", command, directory
     )
-    result = run_command(directory, remaining, command)
+    result = None
+    if command and (servers := get_compilation_servers(bundle)) is not None:
+        result = servers.compile(bundle.config.workdir, directory, command, remaining)
+    if result is None:
+        result = run_command(directory, remaining, command)
     _logger.debug(f"Compilation dependencies are: {files}")
     return result, files
 
@@ -1,9 +1,17 @@
+import functools
+import itertools
 import logging
+import os
+import queue
 import shutil
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 
+from attrs import evolve
+
 from tested.configs import Bundle
 from tested.dodona import (
     AppendMessage,
@@ -24,11 +32,12 @@ from tested.judge.collector import OutputManager
 from tested.judge.compilation import precompile
 from tested.judge.evaluation import evaluate_context_results, terminate
 from tested.judge.execution import (
+    ContextResult,
     ExecutionResult,
-    compile_unit,
     execute_unit,
     set_up_unit,
 )
+from tested.judge.harnesses import get_cached_unit
 from tested.judge.linter import run_linter
 from tested.judge.planning import (
     CompilationResult,
@@ -36,20 +45,36 @@ from tested.judge.planning import (
     PlannedContext,
     PlannedExecutionUnit,
     PlanStrategy,
+    dispatch_order,
     plan_test_suite,
 )
+from tested.judge.profiles import context_key, get_profile
+from tested.judge.servers import close_servers, warm_up_compilation_server
 from tested.judge.utils import copy_from_paths_to_path
 from tested.languages.conventionalize import submission_file
-from tested.languages.generation import (
-    generate_execution,
-    generate_selector,
-    generate_statement,
-)
-from tested.serialisation import Statement
-from tested.testsuite import LanguageLiterals, MainInput, TextData
+from tested.languages.fragments import precompute_fragments
+from tested.languages.generation import generate_execution, generate_selector
+from tested.languages.memo import memo_statistics
 
 _logger = logging.getLogger(__name__)
 
+# How often the results of a running unit are checked, in seconds.
+_EVENT_INTERVAL = 0.05
+
+# A context that is done while its unit is still running: the index of the context
+# in the unit, its results, the compilation results and the execution directory.
+_ContextEvent = tuple[int, ContextResult, CompilationResult, Path]
+# The plan from which a unit is executed, with the results of its compilation.
+_UnitCompilation = tuple[ExecutionPlan, CompilationResult]
+# Called when a partition is compiled: with None if it compiled, otherwise with
+# whether it should be split further.
+_OnCompiled = Callable[[bool | None], None]
+
+
+def _reached_fail_fast(bundle: Bundle, collector: OutputManager) -> bool:
+    threshold = bundle.config.options.fail_fast
+    return threshold is not None and collector.failed_contexts >= threshold
+
 
 def _is_fatal_compilation_error(compilation_results: CompilationResult) -> bool:
     return compilation_results.status in (
@@ -86,11 +111,11 @@ def judge(bundle: Bundle):
     2. Attempt to precompile everything.
        a. If this fails, go to 3.
        b. If this succeeds, go to 4.
-    3. Convert contexts into "tab-level" units.
+    3. Convert contexts into "tab-level" units, and compile them by bisecting:
+       compile half of the units together, and only split the halves that fail.
     4. For each execution unit:
-       a. Compile if necessary (only if 2 failed)
-       b. Execute the unit.
-       c. Process the results.
+       a. Execute the unit.
+       b. Process the results.
 
     :param bundle: The configuration bundle.
     """
@@ -113,12 +138,30 @@ def judge(bundle: Bundle):
         _logger.info("Required features not supported.")
         return  # Not all required features are supported.
 
+    # Start the compilation server while the rest of the judgement is set up.
+    warm_up_compilation_server(bundle)
+    try:
+        _judge_submission(bundle)
+    finally:
+        close_servers(bundle)
+        # Also keep the durations of a judgement that ended early.
+        if (profile := bundle.global_config.profile) is not None:
+            profile.flush()
+
+
+def _judge_submission(bundle: Bundle):
     # Do the set-up for the judgement.
     collector = OutputManager(bundle.out)
     collector.add(StartJudgement())
     max_time = float(bundle.config.time_limit) * 0.9
     start = time.perf_counter()
 
+    # Render the feedback that does not depend on the submission. This must happen
+    # before the code generation, which modifies the test suite.
+    precompute_fragments(bundle)
+    # The profile is keyed by the test suite, so also open it before that.
+    profile = get_profile(bundle)
+
     # Run the linter.
     # TODO: do this in parallel
     run_linter(bundle, collector, max_time)
@@ -126,10 +169,23 @@ def judge(bundle: Bundle):
         terminate(bundle, collector, Status.TIME_LIMIT_EXCEEDED)
         return
 
-    planned_units = plan_test_suite(bundle, strategy=PlanStrategy.OPTIMAL)
+    # When executing in parallel, spread the contexts over the workers.
+    if bundle.config.options.parallel:
+        max_workers = os.cpu_count() or 1
+        planned_units = plan_test_suite(
+            bundle, strategy=PlanStrategy.BALANCED, workers=max_workers
+        )
+    else:
+        max_workers = 1
+        planned_units = plan_test_suite(bundle, strategy=PlanStrategy.OPTIMAL)
 
     # Attempt to precompile everything.
     common_dir, dependencies, selector = _generate_files(bundle, planned_units)
+    for name, statistics in memo_statistics().items():
+        _logger.debug(
+            f"Generation memo for {name}: {statistics.hits} hits, "
+            f"{statistics.misses} misses ({statistics.hit_rate():.0%})"
+        )
 
     # Create an execution plan.
     plan = ExecutionPlan(
@@ -142,7 +198,11 @@ def judge(bundle: Bundle):
     )
 
     _logger.debug("Attempting precompilation")
+    compilation_start = time.perf_counter()
     compilation_results = precompile(bundle, plan)
+    if profile:
+        duration = time.perf_counter() - compilation_start
+        profile.record("compilation", "precompilation", duration)
 
     # If something went horribly wrong, and the compilation itself caused a timeout or memory issue, bail now.
     if _is_fatal_compilation_error(compilation_results):
@@ -157,57 +217,125 @@ def judge(bundle: Bundle):
         _logger.warning("Precompilation failed. Falling back to unit compilation.")
         planned_units = plan_test_suite(bundle, strategy=PlanStrategy.TAB)
         plan.units = planned_units
-        compilation_results = None
+        # Compile in the background, so units can be executed once compiled.
+        compiler = ThreadPoolExecutor(max_workers=_compilation_workers(bundle))
+        unit_compilations = _compile_fallback(bundle, plan, compiler)
+    else:
+        compiler = None
+        precompiled: "Future[_UnitCompilation]" = Future()
+        precompiled.set_result((plan, compilation_results))
+        unit_compilations = [precompiled] * len(plan.units)
 
     _logger.info("Starting execution")
+    # Set when the judgement ends, to stop the units that are still running.
+    cancel = threading.Event()
 
     def _process_one_unit(
-        index: int,
+        index: int, events: "queue.SimpleQueue[_ContextEvent]"
     ) -> tuple[CompilationResult, ExecutionResult | None, Path]:
-        return _execute_one_unit(bundle, plan, compilation_results, index)
-
-    if bundle.config.options.parallel:
-        max_workers = None
-    else:
-        max_workers = 1
+        unit_plan, unit_compilation = unit_compilations[index].result(
+            timeout=max(0.0, plan.remaining_time())
+        )
+        return _execute_one_unit(
+            bundle, unit_plan, unit_compilation, index, events, cancel
+        )
 
     _logger.debug(f"Executing with {max_workers} workers")
 
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        remaining_time = plan.remaining_time()
-        results = executor.map(
-            _process_one_unit, range(len(plan.units)), timeout=remaining_time
-        )
+        deadline = time.perf_counter() + plan.remaining_time()
+        events = [queue.SimpleQueue() for _ in plan.units]
+        # Start the longest units first, but process the results in order.
+        submitted = {
+            i: executor.submit(_process_one_unit, i, events[i])
+            for i in dispatch_order(bundle, plan.units)
+        }
+        futures = [submitted[i] for i in range(len(plan.units))]
         try:
             currently_open_tab = -1
-            for i, (
-                local_compilation_results,
-                execution_result,
-                execution_dir,
-            ) in enumerate(results):
+            for i, future in enumerate(futures):
                 planned_unit = plan.units[i]
-                _logger.debug(f"Processing results for execution unit {i}")
-                result_status, currently_open_tab = _process_results(
-                    bundle=bundle,
-                    unit=planned_unit,
-                    execution_result=execution_result,
-                    execution_dir=execution_dir,
-                    compilation_results=local_compilation_results,
-                    collector=collector,
-                    currently_open_tab=currently_open_tab,
-                )
+                # Evaluate the contexts that are done while the unit is running.
+                evaluated = 0
+                while not future.done() or not events[i].empty():
+                    try:
+                        event = events[i].get(timeout=_EVENT_INTERVAL)
+                    except queue.Empty:
+                        if time.perf_counter() > deadline:
+                            raise TimeoutError()
+                        continue
+                    (
+                        context_index,
+                        context_result,
+                        local_compilation_results,
+                        execution_dir,
+                    ) = event
+                    _logger.debug(f"Processing results for context {context_index}")
+                    result_status, currently_open_tab = _process_context(
+                        bundle=bundle,
+                        planned=planned_unit.contexts[context_index],
+                        context_result=context_result,
+                        execution_dir=execution_dir,
+                        compilation_results=local_compilation_results,
+                        collector=collector,
+                        currently_open_tab=currently_open_tab,
+                    )
+                    evaluated += 1
+                    if _reached_fail_fast(bundle, collector):
+                        break
+
+                # Do not wait for the rest of the unit if we stop anyway; it is
+                # killed when the judgement ends.
+                if not _reached_fail_fast(bundle, collector):
+                    (
+                        local_compilation_results,
+                        execution_result,
+                        execution_dir,
+                    ) = future.result(timeout=max(0.0, deadline - time.perf_counter()))
+                    _logger.debug(f"Processing results for execution unit {i}")
+                    result_status, currently_open_tab = _process_results(
+                        bundle=bundle,
+                        unit=planned_unit,
+                        execution_result=execution_result,
+                        execution_dir=execution_dir,
+                        compilation_results=local_compilation_results,
+                        collector=collector,
+                        currently_open_tab=currently_open_tab,
+                        evaluated=evaluated,
+                    )
+                else:
+                    result_status = None
+
+                if profile:
+                    profile.flush()
 
                 if result_status in (
                     Status.TIME_LIMIT_EXCEEDED,
                     Status.MEMORY_LIMIT_EXCEEDED,
                     Status.OUTPUT_LIMIT_EXCEEDED,
                 ):
-                    del results
                     terminate(bundle, collector, result_status)
                     return
+
+                # Skip the remaining units if enough contexts have failed.
+                if _reached_fail_fast(bundle, collector):
+                    _logger.info("Reached the fail-fast threshold, stopping.")
+                    terminate(bundle, collector, Status.CORRECT)
+                    return
         except TimeoutError:
             terminate(bundle, collector, Status.TIME_LIMIT_EXCEEDED)
             return
+        finally:
+            # Kill the units that are still running and skip the others, so the
+            # executor does not wait for them.
+            cancel.set()
+            for remaining_future in futures:
+                remaining_future.cancel()
+            if compiler is not None:
+                # The running compilations write into the working directory, so
+                # they must be done before the judgement ends.
+                compiler.shutdown(wait=True, cancel_futures=True)
+            close_servers(bundle)
 
     # Close the last tab.
     terminate(bundle, collector, Status.CORRECT)
@@ -216,26 +344,37 @@ def judge(bundle: Bundle):
 def _execute_one_unit(
     bundle: Bundle,
     plan: ExecutionPlan,
-    compilation_results: CompilationResult | None,
+    compilation_results: CompilationResult,
     index: int,
+    events: "queue.SimpleQueue[_ContextEvent] | None" = None,
+    cancel: threading.Event | None = None,
 ) -> tuple[CompilationResult, ExecutionResult | None, Path]:
     planned_unit = plan.units[index]
     # Prepare the unit.
     execution_dir, dependencies = set_up_unit(bundle, plan, index)
-
-    # If compilation is necessary, do it.
-    if compilation_results is None:
-        local_compilation_results, dependencies = compile_unit(
-            bundle, plan, index, execution_dir, dependencies
-        )
-    else:
-        local_compilation_results = compilation_results
+    # Each unit has its own status, e.g. for a timeout.
+    local_compilation_results = evolve(compilation_results)
 
     # Execute the unit.
     if local_compilation_results.status == Status.CORRECT:
         remaining_time = plan.remaining_time()
+        if events is not None:
+            compiled = local_compilation_results
+
+            def on_context(context_index: int, result: ContextResult):
+                events.put((context_index, result, compiled, execution_dir))
+
+        else:
+            on_context = None
         execution_result_or_status = execute_unit(
-            bundle, planned_unit, execution_dir, dependencies, remaining_time
+            bundle,
+            planned_unit,
+            execution_dir,
+            dependencies,
+            remaining_time,
+            on_context,
+            plan.common_directory,
+            cancel,
         )
         if isinstance(execution_result_or_status, Status):
             local_compilation_results.status = execution_result_or_status
@@ -248,53 +387,70 @@ def _execute_one_unit(
     return local_compilation_results, execution_result, execution_dir
 
 
-def _generate_files(
-    bundle: Bundle, execution_plan: list[PlannedExecutionUnit]
-) -> tuple[Path, list[str], str | None]:
+def _copy_submission(bundle: Bundle, directory: Path) -> list[str]:
     """
-    Generate all necessary files, using the templates. This creates a common
-    directory, copies all dependencies to that folder and runs the generation.
+    Copy the submission and the dependencies of the language to a directory.
     """
     dependencies = bundle.language.initial_dependencies()
-    common_dir = Path(bundle.config.workdir, f"common")
-    common_dir.mkdir()
-
-    _logger.debug(f"Generating files in common directory {common_dir}")
 
     # Copy dependencies
     dependency_paths = bundle.language.path_to_dependencies()
-    copy_from_paths_to_path(dependency_paths, dependencies, common_dir)
+    copy_from_paths_to_path(dependency_paths, dependencies, directory)
 
     # Copy the submission file.
     submission = submission_file(bundle.language)
-    solution_path = common_dir / submission
+    solution_path = directory / submission
     shutil.copy2(bundle.config.source, solution_path)
     dependencies.append(submission)
 
     # Allow modifications of the submission file.
     bundle.language.modify_solution(solution_path)
+    return dependencies
 
-    # The names of the executions for the test suite.
-    execution_names = []
-    # Generate the files for each execution.
-    for execution_unit in execution_plan:
+
+def _generate_unit(
+    bundle: Bundle, directory: Path, execution_unit: PlannedExecutionUnit
+) -> list[str]:
+    """
+    Generate the file for one execution unit and copy the oracles it needs.
+    """
+    if cached := get_cached_unit(bundle, execution_unit):
+        generated, evaluators = cached.materialize(bundle, directory)
+    else:
         _logger.debug(f"Generating file for execution {execution_unit.name}")
         generated, evaluators = generate_execution(
-            bundle=bundle, destination=common_dir, execution_unit=execution_unit
+            bundle=bundle, destination=directory, execution_unit=execution_unit
         )
 
-        # Copy functions to the directory.
-        for evaluator in evaluators:
-            source = Path(bundle.config.resources) / evaluator
-            _logger.debug(f"Copying oracle from {source} to {common_dir}")
-            shutil.copy2(source, common_dir)
+    # Copy functions to the directory.
+    for evaluator in evaluators:
+        source = Path(bundle.config.resources) / evaluator
+        _logger.debug(f"Copying oracle from {source} to {directory}")
+        shutil.copy2(source, directory)
 
-        dependencies.extend(evaluators)
-        dependencies.append(generated)
-        execution_names.append(execution_unit.name)
+    return evaluators + [generated]
+
+
+def _generate_files(
+    bundle: Bundle, execution_plan: list[PlannedExecutionUnit]
+) -> tuple[Path, list[str], str | None]:
+    """
+    Generate all necessary files, using the templates. This creates a common
+    directory, copies all dependencies to that folder and runs the generation.
+    """
+    common_dir = Path(bundle.config.workdir, f"common")
+    common_dir.mkdir()
+
+    _logger.debug(f"Generating files in common directory {common_dir}")
+    dependencies = _copy_submission(bundle, common_dir)
+
+    # Generate the files for each execution.
+    for execution_unit in execution_plan:
+        dependencies.extend(_generate_unit(bundle, common_dir, execution_unit))
 
     if bundle.language.needs_selector():
         _logger.debug("Generating selector.")
+        execution_names = [unit.name for unit in execution_plan]
         generated = generate_selector(bundle, common_dir, execution_names)
         dependencies.append(generated)
     else:
@@ -302,6 +458,150 @@ def _generate_files(
     return common_dir, dependencies, generated
 
 
+def _compilation_workers(bundle: Bundle) -> int:
+    """
+    The number of compilations that can run at the same time, limited by the
+    number of CPUs and the memory limit of the judgement.
+    """
+    workers = os.cpu_count() or 1
+    memory_limit = int(bundle.config.memory_limit)
+    if memory_limit <= 0:
+        # There is no memory limit.
+        return workers
+    return max(1, min(workers, memory_limit // bundle.language.compiler_memory()))
+
+
+def _compile_fallback(
+    bundle: Bundle, plan: ExecutionPlan, compiler: ThreadPoolExecutor
+) -> list["Future[_UnitCompilation]"]:
+    """
+    Compile the units of the plan, isolating the units that do not compile.
+
+    The units are divided into partitions, which are compiled together. If a
+    partition does not compile, it is split in two halves, which are compiled
+    again, until the failing units are found. All units together are known not to
+    compile, so the bisection starts with two halves. If few units fail, this needs
+    far fewer compilations than compiling each unit separately.
+
+    If both halves of a partition do not compile, the failures are probably not
+    caused by a few units (for example, the submission itself does not compile).
+    The units of both halves are then compiled separately, as bisecting would need
+    almost twice as many compilations.
+
+    The partitions are compiled by the given executor. The result for a unit is
+    available as soon as the partition it is compiled in is known.
+
+    :return: For each unit, the plan of the partition it was compiled in (from
+             which the unit should be executed) and the compilation results.
+    """
+    fallback_dir = Path(bundle.config.workdir, "fallback")
+    fallback_dir.mkdir()
+    _logger.debug(f"Generating fallback files in {fallback_dir}")
+    submission_files = [
+        (plan.common_directory, file)
+        for file in bundle.language.initial_dependencies()
+        + [submission_file(bundle.language)]
+    ]
+    unit_files = [
+        [(fallback_dir, file) for file in _generate_unit(bundle, fallback_dir, unit)]
+        for unit in plan.units
+    ]
+    results: list[Future[_UnitCompilation]] = [Future() for _ in plan.units]
+    numbers = itertools.count()
+
+    def compile_partition(indices: list[int], on_done: _OnCompiled | None):
+        number = next(numbers)
+        directory = Path(bundle.config.workdir, f"partition_{number}")
+        directory.mkdir()
+        files = []
+        for origin, file in itertools.chain(
+            submission_files, *(unit_files[i] for i in indices)
+        ):
+            destination = directory / file
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            if not destination.exists():
+                destination.hardlink_to(origin / file)
+                files.append(file)
+        if bundle.language.needs_selector():
+            names = [plan.units[i].name for i in indices]
+            selector = generate_selector(bundle, directory, names)
+            files.append(selector)
+        else:
+            selector = None
+        partition_plan = evolve(
+            plan, common_directory=directory, files=files, selector=selector
+        )
+        _logger.debug(f"Compiling partition {number} with units {indices}")
+        compilation_start = time.perf_counter()
+        result = precompile(bundle, partition_plan)
+        if profile := get_profile(bundle):
+            duration = time.perf_counter() - compilation_start
+            profile.record("compilation", f"partition:{len(indices)}", duration)
+
+        compiled = result.status == Status.CORRECT
+        if compiled or len(indices) == 1 or _is_fatal_compilation_error(result):
+            for i in indices:
+                results[i].set_result((partition_plan, result))
+            splittable = False
+        else:
+            splittable = True
+        if on_done is not None:
+            on_done(None if compiled else splittable)
+
+    def submit(indices: list[int], on_done: _OnCompiled | None = None):
+        def run():
+            try:
+                compile_partition(indices, on_done)
+            except BaseException as e:
+                for i in indices:
+                    if not results[i].done():
+                        results[i].set_exception(e)
+                if on_done is not None:
+                    on_done(False)
+
+        try:
+            compiler.submit(run)
+        except RuntimeError as e:
+            # The judgement has already ended.
+            for i in indices:
+                results[i].set_exception(e)
+
+    def submit_halves(indices: list[int]):
+        halves = _halves(indices)
+        outcomes: dict[int, bool | None] = dict()
+        lock = threading.Lock()
+
+        def on_done(side: int, splittable: bool | None):
+            with lock:
+                outcomes[side] = splittable
+                if len(outcomes) < len(halves):
+                    return
+            both_failed = all(outcome is not None for outcome in outcomes.values())
+            for side_, half in enumerate(halves):
+                if not outcomes[side_]:
+                    continue
+                if both_failed:
+                    for i in half:
+                        submit([i])
+                else:
+                    submit_halves(half)
+
+        for side, half in enumerate(halves):
+            submit(half, functools.partial(on_done, side))
+
+    everything = list(range(len(plan.units)))
+    if len(everything) > 1:
+        submit_halves(everything)
+    else:
+        submit(everything)
+    return results
+
+
+def _halves(indices: list[int]) -> list[list[int]]:
+    middle = len(indices) // 2
+    return [indices[:middle], indices[middle:]]
+
+
 def _process_results(
     bundle: Bundle,
     collector: OutputManager,
@@ -310,75 +610,103 @@ def _process_results(
     execution_result: ExecutionResult | None,
     execution_dir: Path,
     currently_open_tab: int,
+    evaluated: int = 0,
 ) -> tuple[Status | None, int]:
+    """
+    Process the results of an execution unit.
+
+    :param evaluated: The number of contexts that were already processed while
+                      the unit was running. These are skipped.
+    """
     if execution_result:
         context_results = execution_result.to_context_results()
     else:
         context_results = [None] * len(unit.contexts)
 
-    for planned, context_result in zip(unit.contexts, context_results):
-        planned: PlannedContext
-        if currently_open_tab < planned.tab_index:
-            # Close the previous tab if necessary.
-            if collector.open_stack[-1] == "tab":
-                collector.add(CloseTab(), currently_open_tab)
-            currently_open_tab = currently_open_tab + 1
-            tab = bundle.suite.tabs[currently_open_tab]
-            collector.add(StartTab(title=tab.name, hidden=tab.hidden))
-
-        # Handle the contexts.
-        collector.add(StartContext(description=planned.context.description))
+    # The contexts of which the results exceeded the output limit are not
+    # evaluated, as their results are incomplete.
+    truncated = execution_result is not None and execution_result.truncated
+    if truncated:
+        assert execution_result is not None
+        complete = execution_result.complete_contexts()
+    else:
+        complete = None
 
-        continue_ = evaluate_context_results(
-            bundle,
-            context=planned.context,
-            exec_results=context_result,
-            context_dir=execution_dir,
+    for planned, context_result in itertools.islice(
+        zip(unit.contexts, context_results), evaluated, complete
+    ):
+        if _reached_fail_fast(bundle, collector):
+            break
+        continue_, currently_open_tab = _process_context(
+            bundle=bundle,
             collector=collector,
+            planned=planned,
             compilation_results=compilation_results,
+            context_result=context_result,
+            execution_dir=execution_dir,
+            currently_open_tab=currently_open_tab,
         )
-
-        if bundle.language.supports_debug_information():
-            # TODO: this is currently very Python-specific
-            # See if we need a callback to the language modules in the future.
-            # TODO: we could probably re-use the "readable_input" function here,
-            #       since it only differs a bit.
-            meta_statements = []
-            meta_stdin = None
-            for case in planned.context.testcases:
-                if case.is_main_testcase():
-                    assert isinstance(case.input, MainInput)
-                    if isinstance(case.input.stdin, TextData):
-                        meta_stdin = case.input.stdin.get_data_as_string(
-                            bundle.config.resources
-                        )
-                elif isinstance(case.input, Statement):
-                    stmt = generate_statement(bundle, case.input)
-                    meta_statements.append(stmt)
-                elif isinstance(case.input, LanguageLiterals):
-                    stmt = case.input.get_for(bundle.config.programming_language)
-                    meta_statements.append(stmt)
-                else:
-                    raise AssertionError(f"Found unknown case input type: {case.input}")
-
-            if meta_statements:
-                meta_statements = "\n".join(meta_statements)
-            else:
-                # Don't add empty statements
-                meta_statements = None
-
-            collector.add(
-                CloseContext(
-                    data=Metadata(
-                        statements=meta_statements,
-                        stdin=meta_stdin,
-                    )
-                ),
-                planned.context_index,
-            )
-        else:
-            collector.add(CloseContext(), planned.context_index)
         if continue_ in (Status.TIME_LIMIT_EXCEEDED, Status.MEMORY_LIMIT_EXCEEDED):
             return continue_, currently_open_tab
 
+    if truncated:
+        return Status.OUTPUT_LIMIT_EXCEEDED, currently_open_tab
     return None, currently_open_tab
+
+
+def _process_context(
+    bundle: Bundle,
+    collector: OutputManager,
+    planned: PlannedContext,
+    compilation_results: CompilationResult,
+    context_result: ContextResult | None,
+    execution_dir: Path,
+    currently_open_tab: int,
+) -> tuple[Status | None, int]:
+    fragments = precompute_fragments(bundle)
+    if currently_open_tab < planned.tab_index:
+        # Close the previous tab if necessary.
+        if collector.open_stack[-1] == "tab":
+            collector.add(CloseTab(), currently_open_tab)
+        currently_open_tab = currently_open_tab + 1
+        tab = bundle.suite.tabs[currently_open_tab]
+        collector.add(StartTab(title=tab.name, hidden=tab.hidden))
+
+    # Handle the contexts.
+    collector.add(StartContext(description=planned.context.description))
+
+    evaluation_start = time.perf_counter()
+    continue_ = evaluate_context_results(
+        bundle,
+        context=planned.context,
+        exec_results=context_result,
+        context_dir=execution_dir,
+        collector=collector,
+        compilation_results=compilation_results,
+    )
+    if profile := get_profile(bundle):
+        key = context_key(planned.tab_index, planned.context_index)
+        profile.record("evaluation", key, time.perf_counter() - evaluation_start)
+        if context_result and context_result.duration is not None:
+            if profile.is_slow("execution", key, context_result.duration):
+                _logger.warning(
+                    f"Context {key} took {context_result.duration:.3f}s, which is "
+                    f"much slower than earlier executions."
+                )
+            profile.record("execution", key, context_result.duration)
+
+    if bundle.language.supports_debug_information():
+        context_fragments = fragments.for_context(planned.context)
+        assert context_fragments is not None
+        collector.add(
+            CloseContext(
+                data=Metadata(
+                    statements=context_fragments.meta_statements,
+                    stdin=context_fragments.meta_stdin,
+                )
+            ),
+            planned.context_index,
+        )
+    else:
+        collector.add(CloseContext(), planned.context_index)
+    return continue_, currently_open_tab
@@ -25,8 +25,9 @@ from tested.dodona import (
 )
 from tested.internationalization import get_i18n_string
 from tested.judge.collector import OutputManager, TestcaseCollector
-from tested.judge.execution import ContextResult
+from tested.judge.execution import ContextResult, OutputFrame
 from tested.judge.planning import CompilationResult
+from tested.languages.fragments import get_fragments
 from tested.languages.generation import (
     attempt_readable_input,
     generate_statement,
@@ -172,8 +173,12 @@ def evaluate_context_results(
 
     # If the compiler results are not successful, there is no point in doing more,
     # so stop early.
+    fragments = get_fragments(bundle)
     if compilation_results.status != Status.CORRECT:
-        readable_input = attempt_readable_input(bundle, context)
+        if fragments and (context_fragments := fragments.for_context(context)):
+            readable_input = context_fragments.readable_input
+        else:
+            readable_input = attempt_readable_input(bundle, context)
         collector.add(StartTestcase(description=readable_input))
         # Report all compiler messages.
         if not compilation_results.reported:
@@ -191,10 +196,10 @@ def evaluate_context_results(
     assert exec_results is not None
 
     # Split the basic output channels.
-    stdout_ = exec_results.stdout.split(exec_results.separator)
-    stderr_ = exec_results.stderr.split(exec_results.separator)
-    exceptions = exec_results.exceptions.split(exec_results.separator)
-    values = exec_results.results.split(exec_results.separator)
+    stdout_ = exec_results.stdout_frame.split(exec_results.separator)
+    stderr_ = exec_results.stderr_frame.split(exec_results.separator)
+    exceptions = exec_results.exceptions_frame.split(exec_results.separator)
+    values = exec_results.results_frame.split(exec_results.separator)
 
     # The first item should always be empty, since the separator must be printed
     # before the test suite runs. We remove the first item; but only
@@ -202,10 +207,10 @@ def evaluate_context_results(
     # debugging.
 
     deletions = (
-        safe_del(stdout_, 0, lambda e: e == ""),
-        safe_del(stderr_, 0, lambda e: e == ""),
-        safe_del(exceptions, 0, lambda e: e == ""),
-        safe_del(values, 0, lambda e: e == ""),
+        safe_del(stdout_, 0, OutputFrame.is_empty),
+        safe_del(stderr_, 0, OutputFrame.is_empty),
+        safe_del(exceptions, 0, OutputFrame.is_empty),
+        safe_del(values, 0, OutputFrame.is_empty),
     )
 
     could_delete = all(deletions)
@@ -224,7 +229,7 @@ def evaluate_context_results(
             )
         )
         # Recover stdout and stderr if present.
-        if recovered := "\n".join(stdout_):
+        if recovered := "\n".join(frame.text() for frame in stdout_):
             missing_values.append(
                 AppendMessage(
                     message=ExtendedMessage(
@@ -232,7 +237,7 @@ def evaluate_context_results(
                     )
                 )
             )
-        if recovered := "\n".join(stderr_):
+        if recovered := "\n".join(frame.text() for frame in stderr_):
             missing_values.append(
                 AppendMessage(
                     message=ExtendedMessage(
@@ -248,7 +253,7 @@ def evaluate_context_results(
     for i, testcase in enumerate(context.testcases):
         _logger.debug(f"Evaluating testcase {i}")
 
-        readable_input, seen = get_readable_input(bundle, testcase)
+        readable_input, seen = _readable_input(bundle, testcase)
         all_files = all_files - seen
         t_col = TestcaseCollector(StartTestcase(description=readable_input))
 
@@ -257,10 +262,10 @@ def evaluate_context_results(
 
         # Get the values produced by the execution. If there are no values,
         # we use an empty string at this time. We handle missing output later.
-        actual_stderr = safe_get(stderr_, i)
-        actual_exception = safe_get(exceptions, i)
-        actual_stdout = safe_get(stdout_, i)
-        actual_value = safe_get(values, i)
+        actual_stderr = _frame_text(safe_get(stderr_, i))
+        actual_exception = _frame_text(safe_get(exceptions, i))
+        actual_stdout = _frame_text(safe_get(stdout_, i))
+        actual_value = _frame_text(safe_get(values, i))
 
         missing_file = _evaluate_channel(
             bundle,
@@ -362,6 +367,20 @@ def evaluate_context_results(
     return None
 
 
+def _frame_text(frame: OutputFrame | None) -> str | None:
+    return frame.text() if frame else None
+
+
+def _readable_input(
+    bundle: Bundle, testcase: Testcase
+) -> tuple[ExtendedMessage, set[FileUrl]]:
+    """Get the readable input, using the precomputed fragments if available."""
+    fragments = get_fragments(bundle)
+    if fragments and (testcase_fragments := fragments.for_testcase(testcase)):
+        return testcase_fragments.readable_input, testcase_fragments.seen_files
+    return get_readable_input(bundle, testcase)
+
+
 def _link_files_message(link_files: Collection[FileUrl]) -> AppendMessage:
     link_list = ", ".join(
         f'<a href="{link_file.url}" class="file-link" target="_blank">'
@@ -446,11 +465,13 @@ def guess_expected_value(bundle: Bundle, test: OutputChannel) -> str:
             else get_i18n_string("judge.evaluation.dynamic")
         )
     elif isinstance(test, ValueOutputChannel):
-        return (
-            generate_statement(bundle, test.value)
-            if test.value
-            else get_i18n_string("judge.evaluation.dynamic")
-        )
+        if not test.value:
+            return get_i18n_string("judge.evaluation.dynamic")
+        fragments = get_fragments(bundle)
+        readable = fragments.readable_expected(test) if fragments else None
+        if readable is not None:
+            return readable
+        return generate_statement(bundle, test.value)
     elif isinstance(test, ExitCodeOutputChannel):
         return str(test.value)
     _logger.warning(f"Unknown output type {test}")
@@ -502,7 +523,7 @@ def complete_evaluation(bundle: Bundle, collector: OutputManager):
             for j, testcase in enumerate(
                 context.testcases[testcase_start:], start=testcase_start
             ):
-                readable_input, seen = get_readable_input(bundle, testcase)
+                readable_input, seen = _readable_input(bundle, testcase)
                 all_files = all_files - seen
                 updates.append(StartTestcase(description=readable_input))
 
@@ -1,39 +1,116 @@
 import itertools
 import logging
+import threading
+import time
+from collections.abc import Callable, Sequence
 from pathlib import Path
+from typing import cast
 
-from attrs import define
+from attrs import define, field
 
 from tested.configs import Bundle
 from tested.dodona import Status
-from tested.judge.compilation import process_compile_results, run_compilation
+from tested.judge.channels import (
+    OutputBuffer,
+    ResultChannel,
+    decode_output,
+    supports_pipes,
+)
 from tested.judge.planning import CompilationResult, ExecutionPlan, PlannedExecutionUnit
+from tested.judge.servers import get_server_pool
 from tested.judge.utils import (
     BaseExecutionResult,
     copy_workdir_files,
     filter_files,
     run_command,
+    run_watched_command,
 )
 from tested.languages.conventionalize import selector_name
-from tested.languages.preparation import exception_file, value_file
+from tested.languages.preparation import exception_file, exit_file, value_file
 from tested.utils import safe_del
 
 _logger = logging.getLogger(__name__)
 
 
 @define
-class ContextResult(BaseExecutionResult):
+class OutputFrame:
+    """
+    A part of an output stream of an execution unit, such as the output of one
+    context or one testcase.
+
+    Splitting the (potentially large) output of an execution unit by the separators
+    copies all output several times. Instead, a frame only records the offsets of
+    its part in the complete output. The text itself is only sliced when needed.
+    """
+
+    output: str
+    start: int
+    end: int
+
+    @classmethod
+    def of(cls, output: str) -> "OutputFrame":
+        """Create a frame containing the complete output."""
+        return cls(output, 0, len(output))
+
+    def split(self, separator: str) -> list["OutputFrame"]:
+        """
+        Split the frame by a separator. This is the same as `str.split` on the text
+        of this frame, except that no text is copied.
+        """
+        frames = []
+        start = self.start
+        while (position := self.output.find(separator, start, self.end)) != -1:
+            frames.append(OutputFrame(self.output, start, position))
+            start = position + len(separator)
+        frames.append(OutputFrame(self.output, start, self.end))
+        return frames
+
+    def is_empty(self) -> bool:
+        return self.start == self.end
+
+    def text(self) -> str:
+        return self.output[self.start : self.end]
+
+
+_EMPTY_FRAME = OutputFrame.of("")
+
+
+@define
+class ContextResult:
     """
     The results of executing a context.
 
     All output streams are divided by the testcase separator, in the same order
-    as the test cases in the context in the test suite. For example, the string
+    as the test cases in the context in the test suite. For example, the frame
     at position 0 of the split output is the output for the first testcase.
     """
 
+    exit: int
+    timeout: bool
+    memory: bool
     separator: str
-    results: str
-    exceptions: str
+    stdout_frame: OutputFrame
+    stderr_frame: OutputFrame
+    results_frame: OutputFrame
+    exceptions_frame: OutputFrame
+    duration: float | None = None
+    "An estimate of how long the execution of the context took, in seconds."
+
+    @property
+    def stdout(self) -> str:
+        return self.stdout_frame.text()
+
+    @property
+    def stderr(self) -> str:
+        return self.stderr_frame.text()
+
+    @property
+    def results(self) -> str:
+        return self.results_frame.text()
+
+    @property
+    def exceptions(self) -> str:
+        return self.exceptions_frame.text()
 
 
 @define
@@ -42,7 +119,7 @@ class ExecutionResult(BaseExecutionResult):
     The results of executing an execution unit.
 
     All the output is divided by the context separator, in the same order as
-    the contexts from the test suite. For example, the string at position 0 of
+    the contexts from the test suite. For example, the frame at position 0 of
     the split output is the output for the first context.
     """
 
@@ -50,50 +127,75 @@ class ExecutionResult(BaseExecutionResult):
     testcase_separator: str
     results: str
     exceptions: str
+    exit_codes: str = ""
+    """
+    The exit code of each context, one per line, if the language supports exit
+    interception. Otherwise, the exit code of the execution is used.
+    """
+    context_durations: list[float] = field(factory=list)
+    "An estimate of the duration of each context, see `ContextResult.duration`."
+
+    def complete_contexts(self) -> int:
+        """
+        The number of contexts of which the values and exceptions are complete. If
+        the results were truncated, the last context with results is incomplete.
+        """
+        frames = []
+        for output in (self.results, self.exceptions):
+            split = OutputFrame.of(output).split(self.context_separator)
+            safe_del(split, 0, OutputFrame.is_empty)
+            frames.append(len(split))
+        if not self.truncated:
+            return max(frames)
+        return max(0, min(frames) - 1)
 
     def to_context_results(
         self,
     ) -> list[ContextResult]:
-        results = self.results.split(self.context_separator)
-        exceptions = self.exceptions.split(self.context_separator)
-        stderr = self.stderr.split(self.context_separator)
-        stdout = self.stdout.split(self.context_separator)
+        results = OutputFrame.of(self.results).split(self.context_separator)
+        exceptions = OutputFrame.of(self.exceptions).split(self.context_separator)
+        stderr = OutputFrame.of(self.stderr).split(self.context_separator)
+        stdout = OutputFrame.of(self.stdout).split(self.context_separator)
 
         # Since the context separator is first, we should have one that is empty.
         # We only remove it if it is in fact empty, otherwise ignore it.
-        safe_del(stdout, 0, lambda e: e == "")
-        safe_del(stderr, 0, lambda e: e == "")
-        safe_del(exceptions, 0, lambda e: e == "")
-        safe_del(results, 0, lambda e: e == "")
+        safe_del(stdout, 0, OutputFrame.is_empty)
+        safe_del(stderr, 0, OutputFrame.is_empty)
+        safe_del(exceptions, 0, OutputFrame.is_empty)
+        safe_del(results, 0, OutputFrame.is_empty)
 
         size = max(len(results), len(exceptions), len(stderr), len(stdout))
+        exit_codes = self.exit_codes.splitlines()
 
         if size == 0:
             return [
                 ContextResult(
                     exit=self.exit,
-                    exceptions="",
-                    stdout="",
-                    stderr="",
                     timeout=self.timeout,
                     memory=self.memory,
                     separator=self.testcase_separator,
-                    results="",
+                    stdout_frame=_EMPTY_FRAME,
+                    stderr_frame=_EMPTY_FRAME,
+                    results_frame=_EMPTY_FRAME,
+                    exceptions_frame=_EMPTY_FRAME,
                 )
             ]
 
         context_execution_results = []
         for index, (r, e, err, out) in enumerate(
-            itertools.zip_longest(results, exceptions, stderr, stdout)
+            itertools.zip_longest(
+                results, exceptions, stderr, stdout, fillvalue=_EMPTY_FRAME
+            )
         ):
             context_execution_results.append(
                 ContextResult(
                     separator=self.testcase_separator,
-                    exit=self.exit,
-                    results=r or "",
-                    exceptions=e or "",
-                    stdout=out or "",
-                    stderr=err or "",
+                    exit=_context_exit_code(exit_codes, index, self.exit),
+                    duration=_context_duration(self.context_durations, index),
+                    results_frame=r,
+                    exceptions_frame=e,
+                    stdout_frame=out,
+                    stderr_frame=err,
                     timeout=self.timeout and index == size - 1,
                     memory=self.memory and index == size - 1,
                 )
@@ -102,6 +204,166 @@ class ExecutionResult(BaseExecutionResult):
         return context_execution_results
 
 
+def _context_exit_code(
+    exit_codes: Sequence[str | bytes], index: int, default: int
+) -> int:
+    try:
+        # Like the exit code of a process, only use the lowest byte.
+        return int(exit_codes[index]) % 256
+    except (IndexError, ValueError):
+        return default
+
+
+def _context_duration(durations: list[float], index: int) -> float | None:
+    try:
+        return durations[index]
+    except IndexError:
+        return None
+
+
+@define
+class _SeparatorScan:
+    """The positions of the context separators found so far in a stream."""
+
+    buffer: OutputBuffer
+    positions: list[int] = field(factory=list)
+    scanned: int = 0
+
+    def update(self, separator: bytes):
+        data = self.buffer.data
+        end = len(data)
+        while (position := data.find(separator, self.scanned, end)) != -1:
+            self.positions.append(position)
+            self.scanned = position + len(separator)
+        # The end of the data might contain a partially written separator.
+        self.scanned = max(self.scanned, end - len(separator) + 1)
+
+    def completed(self, index: int, separator: bytes) -> bytes | None:
+        """
+        Get the output of a context if the context is complete. This uses the same
+        rules as `ExecutionResult.to_context_results`.
+        """
+        # The first frame is removed if empty, i.e. if the output starts with a
+        # separator.
+        if self.positions and self.positions[0] == 0:
+            index += 1
+        if index >= len(self.positions):
+            return None
+        start = self.positions[index - 1] + len(separator) if index else 0
+        return bytes(self.buffer.data[start : self.positions[index]])
+
+    def completed_at(self, index: int, separator: bytes) -> float:
+        """
+        Get the time at which a complete context was completed, i.e. when the
+        separator after its output arrived.
+        """
+        if self.positions and self.positions[0] == 0:
+            index += 1
+        return self.buffer.arrival(self.positions[index] + len(separator))
+
+    def started_at(self, separator: bytes) -> float | None:
+        """
+        Get the time at which the first context started, if the output starts with
+        a separator.
+        """
+        if self.positions and self.positions[0] == 0:
+            return self.buffer.arrival(len(separator))
+        return None
+
+
+@define
+class ContextWatcher:
+    """
+    Finds the contexts that are done while an execution unit is still running.
+
+    A context is done once the separator of the next context has been written to
+    all output streams, and its exit code is known if the language supports exit
+    interception. The last context of a unit is never reported, as its results
+    depend on how the execution ends (a timeout, etc.). The contexts are reported
+    in order to the callback.
+    """
+
+    context_separator: str
+    testcase_separator: str
+    contexts: int
+    results: OutputBuffer
+    exceptions: OutputBuffer
+    callback: Callable[[int, ContextResult], None]
+    exit_codes: OutputBuffer | None = None
+    startup: float = 0.0
+    """
+    The estimated start-up time of the unit, which is not part of the first
+    context. This is only used if the start of the first context is not known.
+    """
+    reported: int = field(default=0, init=False)
+    _scans: list[_SeparatorScan] = field(factory=list, init=False)
+    durations: list[float] = field(factory=list, init=False)
+    "The durations of the reported contexts, from the arrival of the separators."
+    _created: float = field(factory=time.perf_counter, init=False)
+    _last_completed: float | None = field(default=None, init=False)
+
+    def last_completed(self) -> float:
+        """
+        Get the time at which the last reported context was completed, or at which
+        the first context started if no context was reported yet.
+        """
+        if self._last_completed is not None:
+            return self._last_completed
+        separator = self.context_separator.encode("utf-8")
+        starts = [scan.started_at(separator) for scan in self._scans]
+        if known := [start for start in starts if start is not None]:
+            return min(known)
+        return self._created + self.startup
+
+    def __call__(self, stdout: OutputBuffer, stderr: OutputBuffer):
+        if not self._scans:
+            self._scans = [
+                _SeparatorScan(b)
+                for b in (self.results, self.exceptions, stdout, stderr)
+            ]
+        separator = self.context_separator.encode("utf-8")
+        for scan in self._scans:
+            scan.update(separator)
+
+        while self.reported < self.contexts - 1:
+            outputs = [scan.completed(self.reported, separator) for scan in self._scans]
+            if any(output is None for output in outputs):
+                return
+            if self.exit_codes is not None:
+                # Only use complete lines.
+                exit_codes = bytes(self.exit_codes.data).split(b"\n")[:-1]
+                if len(exit_codes) <= self.reported:
+                    return
+                exit_code = _context_exit_code(exit_codes, self.reported, 0)
+            else:
+                # Without exit interception, only the last context of a unit can
+                # check the exit code.
+                exit_code = 0
+            results, exceptions, stdout_, stderr_ = (
+                OutputFrame.of(decode_output(cast(bytes, output))) for output in outputs
+            )
+            completed = max(
+                scan.completed_at(self.reported, separator) for scan in self._scans
+            )
+            self.durations.append(max(completed - self.last_completed(), 0.0))
+            self._last_completed = completed
+            self.callback(
+                self.reported,
+                ContextResult(
+                    exit=exit_code,
+                    timeout=False,
+                    memory=False,
+                    separator=self.testcase_separator,
+                    stdout_frame=stdout_,
+                    stderr_frame=stderr_,
+                    results_frame=results,
+                    exceptions_frame=exceptions,
+                    duration=self.durations[-1],
+                ),
+            )
+            self.reported += 1
+
+
 def execute_file(
     bundle: Bundle,
     executable_name: str,
@@ -109,6 +371,9 @@ def execute_file(
     remaining: float | None,
     stdin: str | None = None,
     argument: str | None = None,
+    watch: Callable[[OutputBuffer, OutputBuffer], None] | None = None,
+    server_directory: Path | None = None,
+    cancel: threading.Event | None = None,
 ) -> BaseExecutionResult:
     """
     Execute a file.
@@ -123,19 +388,46 @@ def execute_file(
     :param executable_name: The executable that should be executed. This file
                             will not be present in the dependency list.
     :param remaining: The max amount of time.
+    :param watch: Optional function to inspect the output while executing, see
+                  `run_watched_command`.
+    :param server_directory: The directory in which the file was compiled. If
+                             given, the file is executed by an execution server
+                             for that directory, if there is one (see
+                             `tested.judge.servers`).
+    :param cancel: If this is set while the file is executing, the execution is
+                   killed.
 
     :return: The result of the execution.
     """
     _logger.info(f"Starting execution on file {executable_name}")
+    arguments = [argument] if argument else []
+
+    if server_directory is not None and (pool := get_server_pool(bundle)):
+        result = pool.execute(
+            server_directory,
+            working_directory,
+            executable_name,
+            arguments,
+            stdin,
+            remaining if remaining is not None else bundle.config.time_limit,
+            watch,
+            cancel,
+            bundle.config.output_limit,
+        )
+        if result is not None:
+            return result
 
     command = bundle.language.execution(
-        cwd=working_directory,
-        file=executable_name,
-        arguments=[argument] if argument else [],
+        cwd=working_directory, file=executable_name, arguments=arguments
     )
     _logger.debug(f"Executing {command} in directory {working_directory}")
 
-    result = run_command(working_directory, remaining, command, stdin)
+    if (watch or cancel) and command:
+        result = run_watched_command(
+            working_directory, remaining, command, stdin, watch, cancel
+        )
+    else:
+        result = run_command(working_directory, remaining, command, stdin)
 
     assert result is not None
     return result
@@ -183,33 +475,15 @@ def set_up_unit(
     return execution_dir, dependencies
 
 
-def compile_unit(
-    bundle: Bundle,
-    plan: ExecutionPlan,
-    which_unit: int,
-    execution_dir: Path,
-    dependencies: list[Path],
-) -> tuple[CompilationResult, list[Path]]:
-    unit = plan.units[which_unit]
-    _logger.info(f"Compiling unit {unit.name}")
-    remaining = plan.remaining_time()
-    deps = [str(x) for x in dependencies]
-    result, files = run_compilation(bundle, execution_dir, deps, remaining)
-
-    # A new compilation means a new file filtering
-    files = filter_files(files, execution_dir)
-
-    # Process compilation results.
-    processed_results = process_compile_results(bundle.language, result)
-    return processed_results, files
-
-
 def execute_unit(
     bundle: Bundle,
     unit: PlannedExecutionUnit,
     execution_dir: Path,
     dependencies: list[Path],
     remaining_time: float,
+    on_context: Callable[[int, ContextResult], None] | None = None,
+    common_directory: Path | None = None,
+    cancel: threading.Event | None = None,
 ) -> ExecutionResult | Status:
     """
     Execute a unit.
@@ -222,6 +496,13 @@ def execute_unit(
     :param execution_dir: The directory in which we execute.
     :param dependencies: The dependencies.
     :param remaining_time: The remaining time for this execution.
+    :param on_context: Called with the index and results of the contexts that are
+                       done while the unit is still running. These contexts are
+                       also part of the returned results.
+    :param common_directory: The directory in which the unit was compiled, which
+                             allows executing it in an execution server.
+    :param cancel: If this is set while the unit is executing, the execution is
+                   stopped, for example because the judgement has ended.
     """
     _logger.info(f"Executing unit {unit.name}")
 
@@ -241,23 +522,78 @@ def execute_unit(
 
     executable = executable_or_status
     files.remove(executable)
-    stdin = unit.get_stdin(bundle.config.resources)
-
-    # Do the execution.
-    base_result = execute_file(
-        bundle,
-        executable_name=executable.name,
-        working_directory=execution_dir,
-        stdin=stdin,
-        argument=argument,
-        remaining=remaining_time,
-    )
+    if bundle.virtual_stdin:
+        # The execution unit provides the stdin of the contexts.
+        stdin = ""
+    else:
+        stdin = unit.get_stdin(bundle.config.resources)
+
+    # Receive the values, exceptions and exit codes over pipes if possible.
+    channel_files = [
+        value_file(bundle, execution_dir),
+        exception_file(bundle, execution_dir),
+    ]
+    if bundle.exit_interception:
+        channel_files.append(exit_file(bundle, execution_dir))
+    if supports_pipes():
+        limit = bundle.config.output_limit
+        channels = [ResultChannel.open(file, limit) for file in channel_files]
+    else:
+        channels = []
 
     testcase_identifier = f"--{bundle.testcase_separator_secret}-- SEP"
     context_identifier = f"--{bundle.context_separator_secret}-- SEP"
 
-    values = _get_contents_or_empty(value_file(bundle, execution_dir))
-    exceptions = _get_contents_or_empty(exception_file(bundle, execution_dir))
+    if on_context and channels:
+        watch = ContextWatcher(
+            context_separator=context_identifier,
+            testcase_separator=testcase_identifier,
+            contexts=len(unit.contexts),
+            results=channels[0].buffer,
+            exceptions=channels[1].buffer,
+            callback=on_context,
+            exit_codes=channels[2].buffer if len(channels) > 2 else None,
+            startup=bundle.language.startup_cost(),
+        )
+    else:
+        watch = None
+
+    # Do the execution.
+    truncated = False
+    start = time.perf_counter()
+    try:
+        base_result = execute_file(
+            bundle,
+            executable_name=executable.name,
+            working_directory=execution_dir,
+            stdin=stdin,
+            argument=argument,
+            remaining=remaining_time,
+            watch=watch,
+            server_directory=common_directory,
+            cancel=cancel,
+        )
+    finally:
+        end = time.perf_counter()
+        if channels:
+            contents = [channel.close() for channel in channels]
+            truncated = any(channel.buffer.truncated for channel in channels)
+        else:
+            contents = [_get_contents_or_empty(file) for file in channel_files]
+
+    values, exceptions, *exit_codes = contents
+
+    # The time of the contexts that were not reported while executing is divided
+    # evenly between them, which is typically only the last context. The start-up
+    # of the unit is not part of the contexts.
+    durations = list(watch.durations) if watch else []
+    if unreported := len(unit.contexts) - len(durations):
+        if watch:
+            begin = watch.last_completed()
+        else:
+            begin = start + bundle.language.startup_cost()
+        rest = max(end - begin, 0.0)
+        durations.extend([rest / unreported] * unreported)
 
     return ExecutionResult(
         stdout=base_result.stdout,
@@ -267,6 +603,9 @@ def execute_unit(
         testcase_separator=testcase_identifier,
         results=values,
         exceptions=exceptions,
+        exit_codes=exit_codes[0] if exit_codes else "",
+        context_durations=durations,
+        truncated=truncated or base_result.truncated,
         timeout=base_result.timeout,
         memory=base_result.memory,
     )
@@ -0,0 +1,192 @@
+"""
+A cache of the generated harness files, shared by the judgements of an exercise.
+
+Apart from the separator secrets, the code that is generated for an execution unit
+only depends on the test suite, the programming language and the contexts in the
+unit, and for some languages on the submission. If the `cache` option is set, the
+generated files are kept in the cache directory, with placeholders instead of the
+secrets. Later judgements replace the placeholders with their own secrets, instead
+of generating the code again.
+
+Each unit is stored in its own entry, so the entries can also be reused when the
+contexts are planned differently. The cache is bounded: when it has more than
+`MAX_CACHED_UNITS` entries, the least recently used ones are removed.
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+
+from attrs import define, evolve
+
+from tested.configs import Bundle
+from tested.judge.planning import PlannedExecutionUnit
+from tested.languages import generation, preparation
+from tested.languages.fragments import suite_hash
+from tested.languages.generation import generate_execution
+from tested.utils import get_identifier
+
+_logger = logging.getLogger(__name__)
+
+# The maximum number of units in the cache before old ones are removed.
+MAX_CACHED_UNITS = 1024
+
+_MANIFEST = "manifest.json"
+
+
+@define
+class CachedUnit:
+    """The generated files for one execution unit, with placeholder secrets."""
+
+    directory: Path
+    generated: str
+    "The name of the generated file."
+    evaluators: list[str]
+    "The names of the oracles the generated file needs."
+    testcase_separator: str
+    "The placeholder for the testcase separator secret."
+    context_separator: str
+    "The placeholder for the context separator secret."
+
+    @classmethod
+    def read(cls, directory: Path) -> "CachedUnit":
+        manifest = json.loads((directory / _MANIFEST).read_text())
+        return cls(directory=directory, **manifest)
+
+    def write_manifest(self):
+        manifest = {
+            "generated": self.generated,
+            "evaluators": self.evaluators,
+            "testcase_separator": self.testcase_separator,
+            "context_separator": self.context_separator,
+        }
+        (self.directory / _MANIFEST).write_text(json.dumps(manifest))
+
+    def materialize(self, bundle: Bundle, destination: Path) -> tuple[str, list[str]]:
+        """
+        Write the generated file with the secrets of the bundle.
+
+        :return: Like `generate_execution`, the name of the generated file and the
+                 names of the oracles.
+        """
+        code = (self.directory / self.generated).read_text()
+        code = code.replace(
+            self.testcase_separator, bundle.testcase_separator_secret
+        ).replace(self.context_separator, bundle.context_separator_secret)
+        (destination / self.generated).write_text(code)
+        return self.generated, list(self.evaluators)
+
+
+@functools.cache
+def _generator_fingerprint(language_config: str) -> str:
+    """
+    Hash the source of the code generation for a language, so entries generated
+    by another version of TESTed are not used.
+    """
+    language_dir = Path(language_config).parent
+    sources = sorted(language_dir.glob("*.py")) + [
+        Path(preparation.__file__),
+        Path(generation.__file__),
+    ]
+    digest = hashlib.sha256()
+    for source in sources:
+        digest.update(source.read_bytes())
+    return digest.hexdigest()
+
+
+def unit_key(bundle: Bundle, unit: PlannedExecutionUnit) -> str:
+    """
+    Compute the key of the cache entry for an execution unit.
+    """
+    key = {
+        "suite": suite_hash(bundle),
+        "language": bundle.config.programming_language,
+        "options": bundle.config.config_for(),
+        "virtual_stdin": bundle.virtual_stdin,
+        "exit_interception": bundle.exit_interception,
+        "generator": _generator_fingerprint(inspect.getfile(type(bundle.language))),
+        "name": unit.name,
+        "contexts": [(c.tab_index, c.context_index) for c in unit.contexts],
+    }
+    if bundle.language.generation_uses_submission():
+        source = bundle.config.source.read_bytes()
+        key["submission"] = hashlib.sha256(source).hexdigest()
+    serialised = json.dumps(key, sort_keys=True, default=str)
+    return hashlib.sha256(serialised.encode()).hexdigest()
+
+
+def _evict(cache_dir: Path):
+    entries = [e for e in cache_dir.iterdir() if e.suffix != ".tmp"]
+    if len(entries) <= MAX_CACHED_UNITS:
+        return
+    entries.sort(key=lambda e: e.stat().st_mtime)
+    for entry in entries[: len(entries) - MAX_CACHED_UNITS]:
+        shutil.rmtree(entry, ignore_errors=True)
+    _logger.debug(f"Removed {len(entries) - MAX_CACHED_UNITS} units from the cache.")
+
+
+def _store(bundle: Bundle, entry: Path, unit: PlannedExecutionUnit) -> CachedUnit:
+    """
+    Generate the files for a unit with placeholder secrets and store them.
+    """
+    temporary = entry.with_name(f"{entry.name}.{os.getpid()}.tmp")
+    shutil.rmtree(temporary, ignore_errors=True)
+    temporary.mkdir()
+
+    placeholders = evolve(
+        bundle.global_config,
+        testcase_separator_secret=get_identifier(),
+        context_separator_secret=get_identifier(),
+    )
+    placeholder_bundle = evolve(bundle, global_config=placeholders)
+    generated, evaluators = generate_execution(
+        bundle=placeholder_bundle, destination=temporary, execution_unit=unit
+    )
+    cached = CachedUnit(
+        directory=temporary,
+        generated=generated,
+        evaluators=evaluators,
+        testcase_separator=placeholders.testcase_separator_secret,
+        context_separator=placeholders.context_separator_secret,
+    )
+    cached.write_manifest()
+
+    try:
+        os.rename(temporary, entry)
+    except OSError:
+        # Another judgement stored the same unit in the meantime.
+        shutil.rmtree(temporary, ignore_errors=True)
+        return CachedUnit.read(entry)
+    _evict(entry.parent)
+    return evolve(cached, directory=entry)
+
+
+def get_cached_unit(bundle: Bundle, unit: PlannedExecutionUnit) -> CachedUnit | None:
+    """
+    Get the cached files for an execution unit, if the `cache` option is set.
+
+    If the unit is not in the cache yet, the files are generated and stored.
+    If the cache cannot be used, None is returned, and the files should be
+    generated as usual.
+    """
+    if not (option := bundle.config.options.cache):
+        return None
+
+    cache_dir = Path(bundle.config.resources, option, "harnesses")
+    entry = cache_dir / unit_key(bundle, unit)
+    try:
+        if entry.is_dir():
+            # Mark the entry as recently used.
+            os.utime(entry)
+            _logger.debug(f"Using cached files for execution {unit.name}")
+            return CachedUnit.read(entry)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        return _store(bundle, entry, unit)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        _logger.warning(f"Could not use the cache {cache_dir}: {e}")
+        return None
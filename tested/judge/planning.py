@@ -11,6 +11,7 @@ from attrs import define, field
 
 from tested.configs import Bundle
 from tested.dodona import AnnotateCode, Message, Status
+from tested.judge.profiles import get_profile
 from tested.languages.conventionalize import execution_name
 from tested.languages.language import FileFilter
 from tested.testsuite import Context, EmptyChannel, MainInput
@@ -78,18 +79,66 @@ class PlanStrategy(Enum):
     OPTIMAL = auto()
     TAB = auto()
     CONTEXT = auto()
+    BALANCED = auto()
+    """
+    Split the contexts into (at most) one execution unit per worker, with a similar
+    expected duration, as estimated by the `CostModel`.
+    """
+
+
+# The estimated time to execute and evaluate one testcase, in seconds.
+_TESTCASE_COST = 0.005
+
+
+@define
+class CostModel:
+    """
+    Estimates how long it takes to execute contexts and execution units.
+
+    Executing a unit costs the startup time of the language, plus the time for
+    each context. Without other information, the cost of a context is estimated
+    from the number of testcases it has. If the duration of a context was recorded
+    earlier, that is used instead.
+    """
+
+    startup: float
+    testcase: float = _TESTCASE_COST
+    history: dict[tuple[int, int], float] = field(factory=dict)
+    "Recorded durations of contexts, by tab index and context index."
+
+    @classmethod
+    def for_bundle(cls, bundle: Bundle) -> "CostModel":
+        history = dict()
+        if profile := get_profile(bundle):
+            for key, duration in profile.means("execution").items():
+                tab_index, context_index = key.split(":")
+                history[(int(tab_index), int(context_index))] = duration
+        return cls(startup=bundle.language.startup_cost(), history=history)
+
+    def context_cost(self, planned: PlannedContext) -> float:
+        recorded = self.history.get((planned.tab_index, planned.context_index))
+        if recorded is not None:
+            return recorded
+        return self.testcase * len(planned.context.testcases)
+
+    def unit_cost(self, unit: PlannedExecutionUnit) -> float:
+        return self.startup + sum(self.context_cost(c) for c in unit.contexts)
 
 
 def _flattened_contexts_to_units(
     flattened_contexts: list[PlannedContext],
+    virtual_stdin: bool = False,
+    exit_interception: bool = False,
 ) -> list[list[PlannedContext]]:
     contexts_per_unit = []
     current_unit_contexts = []
 
     for planned in flattened_contexts:
-        # If we get stdin, start a new execution unit.
+        # If we get stdin, start a new execution unit, unless the execution unit
+        # can provide the stdin itself.
         if (
-            planned.context.has_main_testcase()
+            not virtual_stdin
+            and planned.context.has_main_testcase()
             and cast(MainInput, planned.context.testcases[0].input).stdin
             != EmptyChannel.NONE
         ):
@@ -99,7 +148,9 @@ def _flattened_contexts_to_units(
 
         current_unit_contexts.append(planned)
 
-        if planned.context.has_exit_testcase():
+        # If the context checks the exit code, end the execution unit, unless the
+        # execution unit reports the exit code of each context itself.
+        if not exit_interception and planned.context.has_exit_testcase():
             contexts_per_unit.append(current_unit_contexts)
             current_unit_contexts = []
 
@@ -109,19 +160,54 @@ def _flattened_contexts_to_units(
     return contexts_per_unit
 
 
+def _balance_units(
+    contexts_per_unit: list[list[PlannedContext]], model: CostModel, workers: int
+) -> list[list[PlannedContext]]:
+    """
+    Split the units into more units with a similar cost, one for each worker.
+
+    The contexts are not reordered, and the existing boundaries are kept. As each
+    additional unit costs the startup time, only split if the units have at least
+    that much work.
+    """
+    contexts = [c for unit in contexts_per_unit for c in unit]
+    total = sum(model.context_cost(c) for c in contexts)
+    if model.startup > 0:
+        parts = min(workers, len(contexts), max(1, round(total / model.startup)))
+    else:
+        parts = min(workers, len(contexts))
+    target = total / max(parts, 1)
+
+    balanced = []
+    for unit in contexts_per_unit:
+        current, cost = [], 0.0
+        for planned in unit:
+            context_cost = model.context_cost(planned)
+            # Start a new unit if that brings the current one closer to the target.
+            if current and abs(cost + context_cost - target) > abs(cost - target):
+                balanced.append(current)
+                current, cost = [], 0.0
+            current.append(planned)
+            cost += context_cost
+        balanced.append(current)
+    return balanced
+
+
 def plan_test_suite(
-    bundle: Bundle, strategy: PlanStrategy
+    bundle: Bundle, strategy: PlanStrategy, workers: int = 1
 ) -> list[PlannedExecutionUnit]:
     """
     Transform a test suite into a list of execution units.
 
     :param strategy: Which strategy to follow when planning the units.
     :param bundle: The configuration
+    :param workers: How many units can be executed at the same time. This is only
+                    used by the balanced strategy.
     :return: A list of planned execution units.
     """
 
     # First, flatten all contexts into a single list.
-    if strategy == PlanStrategy.OPTIMAL:
+    if strategy in (PlanStrategy.OPTIMAL, PlanStrategy.BALANCED):
         flattened_contexts = []
         for t, tab in enumerate(bundle.suite.tabs):
             for c, context in enumerate(tab.contexts):
@@ -148,15 +234,43 @@ def plan_test_suite(
                 ]
                 flattened_contexts_list.append(flattened_contexts)
 
-    flattened_units = []
+    # Contexts with stdin or an exit code only share a unit if the exercise allows
+    # it, as this removes the isolation of these contexts.
+    contexts_per_unit = []
     for flattened_contexts in flattened_contexts_list:
-        for contexts in _flattened_contexts_to_units(flattened_contexts):
-            flattened_units.append(
-                PlannedExecutionUnit(
-                    contexts=contexts,
-                    name=execution_name(bundle.language, len(flattened_units)),
-                    index=len(flattened_units),
-                )
+        contexts_per_unit.extend(
+            _flattened_contexts_to_units(
+                flattened_contexts,
+                bundle.virtual_stdin,
+                bundle.exit_interception,
+            )
+        )
+
+    if strategy == PlanStrategy.BALANCED:
+        model = CostModel.for_bundle(bundle)
+        contexts_per_unit = _balance_units(contexts_per_unit, model, workers)
+
+    flattened_units = []
+    for contexts in contexts_per_unit:
+        flattened_units.append(
+            PlannedExecutionUnit(
+                contexts=contexts,
+                name=execution_name(bundle.language, len(flattened_units)),
+                index=len(flattened_units),
             )
+        )
 
     return flattened_units
+
+
+def dispatch_order(bundle: Bundle, units: list[PlannedExecutionUnit]) -> list[int]:
+    """
+    The order in which the units should be started: the longest units first, so
+    the short units can fill up the gaps at the end.
+
+    :return: The indices of the units.
+    """
+    model = CostModel.for_bundle(bundle)
+    return sorted(
+        range(len(units)), key=lambda i: model.unit_cost(units[i]), reverse=True
+    )
@@ -0,0 +1,193 @@
+"""
+A persistent store with execution profiles of earlier judgements.
+
+The judge does not learn anything from one submission to the next by itself. If
+the `profile` option is set, the durations of the compilation, the execution and
+the evaluation of each context are appended to a file, in the JSON lines format.
+Each record is keyed by the hash of the test suite and the programming language,
+so one file can be shared by multiple exercises.
+
+The recorded durations are used to plan the execution (see `CostModel`) and to
+detect submissions that are exceptionally slow compared to earlier submissions.
+
+The file is bounded: when it has more than `MAX_PROFILE_RECORDS` records, it is
+compacted by keeping only the most recent records for each key.
+"""
+
+import json
+import logging
+import os
+import statistics
+import threading
+from collections import defaultdict
+from pathlib import Path
+
+from attrs import define, field
+
+from tested.configs import Bundle
+from tested.languages.fragments import suite_hash
+
+_logger = logging.getLogger(__name__)
+
+# The maximum number of records in a profile file before it is compacted.
+MAX_PROFILE_RECORDS = 10_000
+# The number of recent records that are kept for each key when compacting.
+_SAMPLES_PER_KEY = 10
+# The minimal number of samples before a duration can be considered slow.
+_MIN_SAMPLES = 5
+
+_KeyedRecord = tuple[str, str, str, str]
+
+
+def context_key(tab_index: int, context_index: int) -> str:
+    return f"{tab_index}:{context_index}"
+
+
+def _record_key(record: dict) -> _KeyedRecord:
+    return record["suite"], record["language"], record["kind"], record["key"]
+
+
+def _read_records(path: Path) -> list[dict]:
+    records = []
+    try:
+        with open(path, "r") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                    _record_key(record)
+                    float(record["duration"])
+                except (ValueError, KeyError, TypeError):
+                    # Skip broken records, e.g. from an interrupted write.
+                    continue
+                records.append(record)
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def _compact(path: Path, records: list[dict]) -> list[dict]:
+    """
+    Keep the most recent records of each key, and at most half of the maximum.
+    """
+    per_key = defaultdict(list)
+    for index, record in enumerate(records):
+        per_key[_record_key(record)].append(index)
+    kept = sorted(
+        i for indices in per_key.values() for i in indices[-_SAMPLES_PER_KEY:]
+    )
+    compacted = [records[i] for i in kept][-(MAX_PROFILE_RECORDS // 2) :]
+
+    temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(temporary, "w") as file:
+        for record in compacted:
+            file.write(json.dumps(record) + "\n")
+    os.replace(temporary, path)
+    _logger.debug(f"Compacted profile {path} to {len(compacted)} records.")
+    return compacted
+
+
+@define
+class ProfileStore:
+    """
+    The recorded durations for one test suite and programming language.
+
+    The durations are grouped by kind ("compilation", "execution" or "evaluation")
+    and by a key within that kind, e.g. the context (see `context_key`). New
+    records are kept in memory until they are flushed to the file.
+    """
+
+    path: Path
+    suite: str
+    language: str
+    samples: dict[tuple[str, str], list[float]] = field(factory=dict)
+    _pending: list[dict] = field(factory=list, init=False)
+    _lock: threading.Lock = field(factory=threading.Lock, init=False)
+
+    @classmethod
+    def open(cls, path: Path, suite: str, language: str) -> "ProfileStore":
+        """
+        Read the records for a test suite and language from a profile file.
+
+        :param path: The profile file, which does not have to exist yet.
+        :param suite: The hash of the test suite.
+        :param language: The programming language.
+        """
+        records = _read_records(path)
+        if len(records) > MAX_PROFILE_RECORDS:
+            try:
+                records = _compact(path, records)
+            except OSError as e:
+                _logger.warning(f"Could not compact profile {path}: {e}")
+
+        samples = defaultdict(list)
+        for record in records:
+            if record["suite"] == suite and record["language"] == language:
+                samples[(record["kind"], record["key"])].append(
+                    float(record["duration"])
+                )
+        return cls(path=path, suite=suite, language=language, samples=dict(samples))
+
+    def record(self, kind: str, key: str, duration: float):
+        with self._lock:
+            self._pending.append(
+                {
+                    "suite": self.suite,
+                    "language": self.language,
+                    "kind": kind,
+                    "key": key,
+                    "duration": duration,
+                }
+            )
+
+    def flush(self):
+        """
+        Append the new records to the file, in one write.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+        data = "".join(json.dumps(record) + "\n" for record in pending)
+        try:
+            with open(self.path, "a") as file:
+                file.write(data)
+        except OSError as e:
+            _logger.warning(f"Could not write profile {self.path}: {e}")
+
+    def means(self, kind: str) -> dict[str, float]:
+        return {
+            key: statistics.fmean(samples)
+            for (k, key), samples in self.samples.items()
+            if k == kind and samples
+        }
+
+    def is_slow(self, kind: str, key: str, duration: float) -> bool:
+        """
+        Check if a duration is exceptionally slow compared to the recorded ones:
+        more than three standard deviations and twice the mean.
+        """
+        samples = self.samples.get((kind, key), [])
+        if len(samples) < _MIN_SAMPLES:
+            return False
+        mean = statistics.fmean(samples)
+        deviation = statistics.pstdev(samples, mean)
+        return duration > mean + 3 * deviation and duration > 2 * mean
+
+
+def get_profile(bundle: Bundle) -> ProfileStore | None:
+    """
+    Get the profile store for the bundle, if the `profile` option is set.
+
+    The store is opened once and kept in the global config.
+    """
+    if bundle.global_config.profile is not None:
+        return bundle.global_config.profile
+    if not (option := bundle.config.options.profile):
+        return None
+
+    path = Path(bundle.config.resources, option)
+    profile = ProfileStore.open(
+        path, suite_hash(bundle), bundle.config.programming_language
+    )
+    bundle.global_config.profile = profile
+    return profile
@@ -0,0 +1,468 @@
+"""
+Execution servers: processes that are kept running during a judgement to execute
+the units, instead of starting a new process for each unit.
+
+Some languages have a high start-up cost for each execution, e.g. because the
+interpreter loads and checks the code of the unit again for each execution. If
+the `execution_server` option is enabled and the language supports it (see
+`Language.execution_server`), a server is started for the directory with the
+compiled units. The server executes one unit at a time, with the standard streams
+redirected to files, and reports the exit code of the unit on its own stdout.
+
+When units are executed in parallel, the pool starts additional servers. A server
+that times out or crashes is stopped, and the next unit starts a new one. If no
+server can be started for a directory, its units are executed as usual.
+
+Compilation servers work in the same way, for languages with a slow compiler (see
+`Language.compilation_server`). If the `compilation_server` option is enabled, a
+server is started at the start of the judgement, so it is ready by the time the
+code is compiled. If the server cannot be started or crashes, the code is
+compiled as usual.
+"""
+
+import logging
+import os
+import queue
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from attrs import define, evolve, field
+
+from tested.configs import Bundle
+from tested.judge.channels import OutputBuffer
+from tested.judge.utils import WATCH_INTERVAL, BaseExecutionResult
+from tested.languages.language import Command, Language, ServerRequest
+from tested.utils import get_identifier
+
+_logger = logging.getLogger(__name__)
+
+
+@define
+class ExecutionServer:
+    """A running server for the units in one directory."""
+
+    directory: Path
+    process: subprocess.Popen
+    compilation: bool = False
+    "If the server is a compilation server instead of an execution server."
+    _lines: "queue.SimpleQueue[str | None]" = field(factory=queue.SimpleQueue)
+
+    @classmethod
+    def start(
+        cls,
+        language: Language,
+        directory: Path,
+        timeout: float,
+        compilation: bool = False,
+    ) -> "ExecutionServer | None":
+        """
+        Start a server and wait until it is ready.
+
+        :return: The server, or None if the server could not be started.
+        """
+        token = get_identifier()
+        if compilation:
+            callback = language.compilation_server(directory, token)
+        else:
+            callback = language.execution_server(directory, token)
+        if callback is None:
+            return None
+        command, setup = callback
+        _logger.debug(f"Starting execution server {command} in {directory}")
+        try:
+            process = subprocess.Popen(
+                command,
+                cwd=directory,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                errors="backslashreplace",
+                # The processes the server starts are stopped with the server.
+                start_new_session=True,
+            )
+        except OSError as e:
+            _logger.warning(f"Could not start execution server: {e}")
+            return None
+
+        server = cls(directory, process, compilation)
+        threading.Thread(target=server._read_stdout, daemon=True).start()
+        threading.Thread(target=server._log_stderr, daemon=True).start()
+        try:
+            ready = server._send(setup) and server._wait(token, timeout) == 0
+        except TimeoutError:
+            ready = False
+        if not ready:
+            _logger.warning(f"Execution server in {directory} did not start.")
+            server.stop()
+            return None
+        return server
+
+    def _read_stdout(self):
+        assert self.process.stdout is not None
+        for line in self.process.stdout:
+            self._lines.put(line.rstrip("\n"))
+        self._lines.put(None)
+
+    def _log_stderr(self):
+        assert self.process.stderr is not None
+        for line in self.process.stderr:
+            _logger.debug(f"Execution server: {line.rstrip()}")
+
+    def _send(self, text: str) -> bool:
+        assert self.process.stdin is not None
+        try:
+            self.process.stdin.write(text)
+            self.process.stdin.flush()
+        except (OSError, ValueError):
+            return False
+        return True
+
+    def _wait(self, token: str, timeout: float) -> int | None:
+        """
+        Wait for the line with the token and an exit code.
+
+        :return: The exit code, or None if the server stopped.
+        :raises TimeoutError: If the line did not arrive in time.
+        """
+        deadline = time.perf_counter() + timeout
+        while True:
+            try:
+                line = self._lines.get(timeout=max(0.0, deadline - time.perf_counter()))
+            except queue.Empty:
+                raise TimeoutError()
+            if line is None:
+                return None
+            # The line may start with other output of the server, e.g. a prompt.
+            _, found, code = line.partition(f"{token} ")
+            if found:
+                try:
+                    return int(code)
+                except ValueError:
+                    return None
+            _logger.debug(f"Execution server: {line}")
+
+    def execute(
+        self,
+        language: Language,
+        working_directory: Path,
+        file: str,
+        arguments: list[str],
+        stdin: str | None,
+        timeout: float,
+        watch: Callable[[OutputBuffer, OutputBuffer], None] | None = None,
+        cancel: threading.Event | None = None,
+        limit: int | None = None,
+    ) -> BaseExecutionResult:
+        """
+        Execute a unit in the server.
+
+        The arguments are the same as for `execute_file`. The output of the unit is
+        read while it is executing, like in `run_watched_command`. If the stdout or
+        stderr exceeds the limit, the server is stopped, so the files with the
+        output do not keep growing.
+
+        :param limit: The maximum number of bytes of the stdout and stderr.
+        """
+        with tempfile.TemporaryDirectory(dir=working_directory.parent) as streams:
+            streams_dir = Path(streams)
+            request = ServerRequest(
+                token=get_identifier(),
+                directory=working_directory.absolute(),
+                file=file,
+                arguments=arguments,
+                stdin=streams_dir / "stdin",
+                stdout=streams_dir / "stdout",
+                stderr=streams_dir / "stderr",
+            )
+            request.stdin.write_text(stdin or "")
+            request.stdout.touch()
+            request.stderr.touch()
+
+            with open(request.stdout, "rb") as out, open(request.stderr, "rb") as err:
+                stdout = OutputBuffer(out.fileno(), limit)
+                stderr = OutputBuffer(err.fileno(), limit)
+                exit_code, timed_out = self._execute_request(
+                    language, request, timeout, stdout, stderr, watch, cancel
+                )
+                stdout.read_available()
+                stderr.read_available()
+
+        return BaseExecutionResult(
+            stdout=stdout.text(),
+            stderr=stderr.text(),
+            exit=exit_code,
+            timeout=timed_out,
+            memory=exit_code == -9 and not (stdout.truncated or stderr.truncated),
+            truncated=stdout.truncated or stderr.truncated,
+        )
+
+    def _execute_request(
+        self,
+        language: Language,
+        request: ServerRequest,
+        timeout: float,
+        stdout: OutputBuffer,
+        stderr: OutputBuffer,
+        watch: Callable[[OutputBuffer, OutputBuffer], None] | None,
+        cancel: threading.Event | None,
+    ) -> tuple[int, bool]:
+        """
+        Send the request and wait until it is done, while reading the output.
+
+        :return: The exit code and if the request timed out.
+        """
+        if self.compilation:
+            text = language.compilation_request(request)
+        else:
+            text = language.server_request(request)
+        if not self._send(text):
+            # The server stopped, e.g. a crash.
+            self.stop()
+            return self.process.returncode, False
+
+        deadline = time.perf_counter() + timeout
+        while True:
+            try:
+                exit_code = self._wait(
+                    request.token,
+                    min(WATCH_INTERVAL, max(0.0, deadline - time.perf_counter())),
+                )
+                break
+            except TimeoutError:
+                pass
+            stdout.read_available()
+            stderr.read_available()
+            if time.perf_counter() >= deadline:
+                self.stop()
+                return 0, True
+            if (cancel is not None and cancel.is_set()) or (
+                stdout.truncated or stderr.truncated
+            ):
+                self.stop()
+                return self.process.returncode, False
+            if watch:
+                watch(stdout, stderr)
+
+        if exit_code is None:
+            # The server stopped while executing the unit, e.g. a crash.
+            self.stop()
+            exit_code = self.process.returncode
+        return exit_code, False
+
+    def is_alive(self) -> bool:
+        return self.process.poll() is None
+
+    def stop(self):
+        try:
+            # Also stop the processes the server started, e.g. for a unit.
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except OSError:
+            pass  # The server and its processes have stopped.
+        if self.is_alive():
+            self.process.kill()
+        self.process.wait()
+        if self.process.stdin is not None:
+            try:
+                self.process.stdin.close()
+            except OSError:
+                pass  # The server did not read everything.
+
+
+@define
+class ServerPool:
+    """
+    The execution servers of a judgement, by the directory of the compiled units,
+    or the compilation servers, by the directory in which they run.
+    """
+
+    language: Language
+    compilation: bool = False
+    _idle: dict[Path, list[ExecutionServer]] = field(factory=dict, init=False)
+    _unsupported: set[Path] = field(factory=set, init=False)
+    _warming: dict[Path, threading.Thread] = field(factory=dict, init=False)
+    _servers: list[ExecutionServer] = field(factory=list, init=False)
+    _lock: threading.Lock = field(factory=threading.Lock, init=False)
+
+    def _start(self, directory: Path, timeout: float) -> ExecutionServer | None:
+        server = ExecutionServer.start(
+            self.language, directory, timeout, self.compilation
+        )
+        with self._lock:
+            if server is None:
+                self._unsupported.add(directory)
+            else:
+                self._servers.append(server)
+        return server
+
+    def _acquire(self, directory: Path, timeout: float) -> ExecutionServer | None:
+        with self._lock:
+            warming = self._warming.get(directory)
+        if warming is not None:
+            # Wait for the server that is starting, instead of starting another.
+            warming.join(timeout)
+
+        with self._lock:
+            if directory in self._unsupported:
+                return None
+            if idle := self._idle.get(directory):
+                return idle.pop()
+        return self._start(directory, timeout)
+
+    def _release(self, server: ExecutionServer):
+        with self._lock:
+            if server.is_alive():
+                self._idle.setdefault(server.directory, []).append(server)
+
+    def execute(
+        self,
+        directory: Path,
+        working_directory: Path,
+        file: str,
+        arguments: list[str],
+        stdin: str | None,
+        timeout: float,
+        watch: Callable[[OutputBuffer, OutputBuffer], None] | None = None,
+        cancel: threading.Event | None = None,
+        limit: int | None = None,
+    ) -> BaseExecutionResult | None:
+        """
+        Execute a unit in a server for the directory with the compiled units.
+
+        The server may have to be started first, which can take as long as the
+        given timeout. As this is not part of the unit, the unit itself then still
+        gets the full timeout. The other arguments are the same as for
+        `ExecutionServer.execute`.
+
+        :return: The result, or None if there is no server for the directory, in
+                 which case the unit should be executed as usual.
+        """
+        if (server := self._acquire(directory, timeout)) is None:
+            return None
+        try:
+            return server.execute(
+                self.language,
+                working_directory,
+                file,
+                arguments,
+                stdin,
+                timeout,
+                watch,
+                cancel,
+                limit,
+            )
+        finally:
+            self._release(server)
+
+    def warm_up(self, directory: Path, timeout: float):
+        """
+        Start a server for the directory in the background, so it is ready when
+        it is needed.
+        """
+
+        def start():
+            if (server := self._start(directory, timeout)) is not None:
+                self._release(server)
+            with self._lock:
+                self._warming.pop(directory, None)
+
+        thread = threading.Thread(target=start, daemon=True)
+        with self._lock:
+            if directory in self._warming or directory in self._unsupported:
+                return
+            self._warming[directory] = thread
+        thread.start()
+
+    def compile(
+        self,
+        server_directory: Path,
+        directory: Path,
+        command: Command,
+        timeout: float,
+    ) -> BaseExecutionResult | None:
+        """
+        Run a compilation in the server for the directory.
+
+        :param server_directory: The directory in which the server runs.
+        :param directory: The directory in which the code is compiled.
+        :param command: The command for the compilation, as given by the language.
+        :param timeout: The maximal duration of the compilation.
+
+        :return: The result, or None if there is no working server, in which case
+                 the compilation should be run as usual.
+        """
+        start = time.perf_counter()
+        if (server := self._acquire(server_directory, timeout)) is None:
+            return None
+        remaining = timeout - (time.perf_counter() - start)
+        try:
+            result = server.execute(
+                self.language, directory, command[0], command[1:], None, remaining
+            )
+        finally:
+            self._release(server)
+        if not result.timeout and not server.is_alive():
+            # The compiler crashed, e.g. when it ran out of memory.
+            _logger.warning("Compilation server stopped, compiling without it.")
+            with self._lock:
+                self._unsupported.add(server_directory)
+            return None
+        # The server does not run in the directory, so it reports absolute paths.
+        prefix = f"{directory.absolute()}{os.sep}"
+        return evolve(
+            result,
+            stdout=result.stdout.replace(prefix, ""),
+            stderr=result.stderr.replace(prefix, ""),
+        )
+
+    def close(self):
+        with self._lock:
+            servers, self._servers = self._servers, []
+            self._idle.clear()
+        for server in servers:
+            server.stop()
+
+
+def get_server_pool(bundle: Bundle) -> ServerPool | None:
+    """
+    Get the execution servers for the bundle, if the `execution_server` option is
+    enabled.
+    """
+    if not bundle.config.options.execution_server:
+        return None
+    if bundle.global_config.servers is None:
+        bundle.global_config.servers = ServerPool(bundle.language)
+    return bundle.global_config.servers
+
+
+def get_compilation_servers(bundle: Bundle) -> ServerPool | None:
+    """
+    Get the compilation servers for the bundle, if the `compilation_server` option
+    is enabled.
+    """
+    if not bundle.config.options.compilation_server:
+        return None
+    if bundle.global_config.compilers is None:
+        bundle.global_config.compilers = ServerPool(bundle.language, compilation=True)
+    return bundle.global_config.compilers
+
+
+def warm_up_compilation_server(bundle: Bundle):
+    """
+    Start the compilation server in the background, if it is enabled, so the
+    start-up overlaps with the rest of the set-up of the judgement.
+    """
+    if (pool := get_compilation_servers(bundle)) is not None:
+        pool.warm_up(bundle.config.workdir, float(bundle.config.time_limit))
+
+
+def close_servers(bundle: Bundle):
+    if bundle.global_config.servers is not None:
+        bundle.global_config.servers.close()
+    if bundle.global_config.compilers is not None:
+        bundle.global_config.compilers.close()
@@ -3,13 +3,19 @@ Common utilities for the judge.
 """
 
 import logging
+import os
 import shutil
+import signal
 import subprocess
+import threading
+import time
+from collections.abc import Callable
 from pathlib import Path
 
-from attrs import define
+from attrs import define, field
 
 from tested.configs import Bundle
+from tested.judge.channels import OutputBuffer
 from tested.languages.conventionalize import EXECUTION_PREFIX
 from tested.languages.language import FileFilter
 
@@ -27,6 +33,11 @@ class BaseExecutionResult:
     exit: int
     timeout: bool
     memory: bool
+    truncated: bool = field(default=False, kw_only=True)
+    """
+    If the output exceeded the output limit, in which case the end of it is missing
+    (see `ExecutionResult.complete_contexts`).
+    """
 
 
 def run_command(
@@ -80,6 +91,110 @@ def run_command(
     )
 
 
+# How often the output of a watched command is inspected, in seconds.
+WATCH_INTERVAL = 0.05
+
+
+def _write_stdin(process: subprocess.Popen, stdin: str):
+    assert process.stdin is not None
+    try:
+        process.stdin.write(stdin.encode("utf-8"))
+        process.stdin.close()
+    except BrokenPipeError:
+        pass  # The process does not read all input, which is allowed.
+
+
+def _kill_process_group(process: subprocess.Popen):
+    """
+    Kill a process that was started in a new session, with the processes it
+    started, such as the children that execute the contexts in fork mode.
+    """
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        # The process group is already gone.
+        pass
+    process.kill()
+    process.wait()
+
+
+def run_watched_command(
+    directory: Path,
+    timeout: float | None,
+    command: list[str],
+    stdin: str | None = None,
+    watch: Callable[[OutputBuffer, OutputBuffer], None] | None = None,
+    cancel: threading.Event | None = None,
+) -> BaseExecutionResult:
+    """
+    Run a command and get the result of said command, like `run_command`.
+
+    The difference is that the output is read while the command is running. The
+    watch function is called periodically with the stdout and stderr received so
+    far, which allows acting on the output before the command is done.
+
+    :param directory: The directory to execute in.
+    :param timeout: The max time for this command.
+    :param command: The command to execute.
+    :param stdin: Optional stdin for the process.
+    :param watch: Called with the stdout and stderr buffers while running.
+    :param cancel: If this is set while the command is running, it is killed.
+
+    :return: The result of the execution.
+    """
+    timeout = int(timeout) if timeout is not None else None
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    process = subprocess.Popen(
+        command,
+        cwd=directory,
+        stdin=subprocess.PIPE if stdin is not None else None,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        # The processes of the command can then be killed together.
+        start_new_session=True,
+    )
+    assert process.stdout is not None and process.stderr is not None
+    # The buffers own (and close) their file descriptors.
+    stdout = OutputBuffer(os.dup(process.stdout.fileno()))
+    stderr = OutputBuffer(os.dup(process.stderr.fileno()))
+    process.stdout.close()
+    process.stderr.close()
+    stdout.start()
+    stderr.start()
+    if stdin is not None:
+        threading.Thread(
+            target=_write_stdin, args=(process, stdin), daemon=True
+        ).start()
+
+    timed_out = False
+    while True:
+        try:
+            process.wait(timeout=WATCH_INTERVAL)
+            break
+        except subprocess.TimeoutExpired:
+            if deadline is not None and time.monotonic() > deadline:
+                _kill_process_group(process)
+                timed_out = True
+                break
+            if cancel is not None and cancel.is_set():
+                _kill_process_group(process)
+                break
+            if watch:
+                watch(stdout, stderr)
+
+    # If a child process still holds the pipes, use what we have.
+    stdout.join()
+    stderr.join()
+
+    return BaseExecutionResult(
+        stdout=stdout.text(),
+        stderr=stderr.text(),
+        exit=0 if timed_out else process.returncode,
+        timeout=timed_out,
+        memory=not timed_out and process.returncode == -9,
+    )
+
+
 def copy_from_paths_to_path(origins: list[Path], files: list[str], destination: Path):
     """
     Copy a list of files from a list of source folders to a destination folder. The
@@ -16,6 +16,7 @@ from tested.languages.language import (
     CallbackResult,
     Command,
     Language,
+    ServerRequest,
     TypeDeclarationMetadata,
 )
 from tested.serialisation import Statement, Value
@@ -47,6 +48,15 @@ class Bash(Language):
     def needs_selector(self):
         return False
 
+    def startup_cost(self) -> float:
+        return 0.005
+
+    def supports_virtual_stdin(self) -> bool:
+        return True
+
+    def supports_exit_interception(self) -> bool:
+        return True
+
     def supported_constructs(self) -> set[Construct]:
         return {
             Construct.FUNCTION_CALLS,
@@ -72,6 +82,24 @@ class Bash(Language):
     def execution(self, cwd: Path, file: str, arguments: list[str]) -> Command:
         return ["bash", file, *arguments]
 
+    def execution_server(
+        self, directory: Path, token: str
+    ) -> tuple[Command, str] | None:
+        server = Path(__file__).parent / "server.sh"
+        return ["bash", str(server)], f"{token}\n"
+
+    def server_request(self, request: ServerRequest) -> str:
+        fields = [
+            request.token,
+            str(request.directory),
+            request.file,
+            str(request.stdin),
+            str(request.stdout),
+            str(request.stderr),
+            *request.arguments,
+        ]
+        return "\x1f".join(fields) + "\n"
+
     def cleanup_stacktrace(self, stacktrace: str) -> str:
         regex = re.compile(
             f"{EXECUTION_PREFIX}_[0-9]+_[0-9]+\\."
@@ -196,7 +196,16 @@ touch {pu.value_file} {pu.exception_file}
     # Generate code for each context.
     ctx: PreparedContext
     for i, ctx in enumerate(pu.contexts):
+        if pu.exit_file is not None:
+            # An exit call ends the subshell of the context, so the after code runs
+            # when the subshell exits.
+            result += f"function context_{i}_after {{\n"
+            result += indent + ctx.after + "\n"
+            result += indent + ":\n"
+            result += "}\n"
         result += f"function context_{i} {{\n"
+        if pu.exit_file is not None:
+            result += f"{indent}trap context_{i}_after EXIT\n"
         result += indent + ctx.before + "\n"
 
         # Import the submission if there is no main call.
@@ -212,7 +221,10 @@ touch {pu.value_file} {pu.exception_file}
                 result += indent + "write_separator\n"
                 assert isinstance(tc.input, MainInput)
                 result += f"{indent}bash {submission_file(pu.language)} "
-                result += shlex.join(tc.input.arguments) + "\n"
+                result += shlex.join(tc.input.arguments)
+                if ctx.stdin is not None:
+                    result += f" < <(printf '%s' {shlex.quote(ctx.stdin)})"
+                result += "\n"
             else:
                 if j != 0:
                     result += indent + "write_separator\n"
@@ -220,16 +232,21 @@ touch {pu.value_file} {pu.exception_file}
                 result += indent + convert_statement(tc.input.input_statement()) + "\n"
             result += "\n"
 
-        result += indent + ctx.after + "\n"
+        if pu.exit_file is None:
+            result += indent + ctx.after + "\n"
         result += indent + "return $?" + "\n"
         result += "}\n"
 
+    # Each context runs in a subshell, so an exit in the submission only ends its
+    # own context.
     for i, ctx in enumerate(pu.contexts):
         result += "write_context_separator\n"
-        result += f"context_{i} || (exit $?)\n"
-        result += f""
+        result += f"(context_{i})\n"
+        result += "exit_code=$?\n"
+        if pu.exit_file is not None:
+            result += f"echo $exit_code >>{pu.exit_file}\n"
 
-    result += "exit $?\n"
+    result += "exit $exit_code\n"
 
     return result
 
@@ -0,0 +1,29 @@
+# An execution server for the Bash units (see the execution server of the Bash
+# configuration), so a unit does not start a new bash process.
+#
+# The first line on stdin is a token, which is written back with exit code 0.
+# Each following line is a request, with fields separated by the unit separator
+# (0x1f): the token of the request, the working directory, the unit, the files
+# for the stdin, stdout and stderr, and the arguments for the unit.
+#
+# Each unit is sourced in a new subshell, so it cannot change the state of the
+# server or of the next units. The subshell has the same $0 and arguments as
+# "bash <unit> <arguments>". When the unit is done, the token and its exit code
+# are written to stdout.
+
+IFS= read -r tested_token || exit 0
+echo "$tested_token 0"
+unset tested_token
+
+while IFS=$'\x1f' read -r -a tested_request; do
+    (
+        cd "${tested_request[1]}" &&
+            exec <"${tested_request[3]}" >>"${tested_request[4]}" 2>>"${tested_request[5]}" ||
+            exit 1
+        set -- "${tested_request[@]:6}"
+        BASH_ARGV0=${tested_request[2]}
+        unset tested_request
+        source "$0"
+    )
+    echo "${tested_request[0]} $?"
+done
@@ -0,0 +1,149 @@
+"""
+Prebuilt parts of the C harness, shared by the compilations of the units.
+
+Every compilation of a unit (or of the selector) would otherwise compile the
+harness sources `values.c` and `evaluation_result.c` again, and parse the same
+system headers. Instead, the harness is built once into an entry of a cache:
+
+- an object for each harness source, which is linked with the unit;
+- a precompiled header with the headers that every unit includes before the
+  submission, which is included with `-include`.
+
+The units include the same headers themselves, but the include guards make
+these includes empty. The entry is keyed by the compiler, the flags and the
+contents of the harness, so it can be shared by all judgements that use the same
+cache directory (see the `cache` option). Without that option, the entry is kept
+in the working directory of the judgement, so it is only shared by the
+compilations of that judgement.
+"""
+
+import functools
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from attrs import define
+
+_logger = logging.getLogger(__name__)
+
+_TEMPLATES = Path(__file__).parent / "templates"
+_SOURCES = ["values.c", "evaluation_result.c"]
+_HEADERS = ["values.h", "evaluation_result.h"]
+
+# The headers the units and the selector include before the submission.
+HARNESS_HEADER = "tested_harness.h"
+_HARNESS_INCLUDES = """\
+#include <stdio.h>
+#include <math.h>
+#include <stdlib.h>
+#include <setjmp.h>
+#include <string.h>
+#include "values.h"
+"""
+
+_lock = threading.Lock()
+_builds: dict[Path, "HarnessBuild | None"] = dict()
+
+
+@define
+class HarnessBuild:
+    """The prebuilt harness in an entry of the cache."""
+
+    directory: Path
+
+    def objects(self) -> list[str]:
+        """The objects of the harness sources, to link with the unit."""
+        return [str(self.directory / Path(x).with_suffix(".o")) for x in _SOURCES]
+
+    def header(self) -> str:
+        """The header to include, for which the precompiled header is used."""
+        return str(self.directory / HARNESS_HEADER)
+
+
+@functools.cache
+def _compiler_version() -> str:
+    result = subprocess.run(
+        ["gcc", "--version"], capture_output=True, text=True, check=True
+    )
+    return result.stdout
+
+
+def _key(flags: list[str]) -> str:
+    digest = hashlib.sha256()
+    digest.update(_compiler_version().encode())
+    digest.update("\0".join(flags).encode())
+    digest.update(_HARNESS_INCLUDES.encode())
+    for name in [*_SOURCES, *_HEADERS]:
+        digest.update(name.encode())
+        digest.update((_TEMPLATES / name).read_bytes())
+    return digest.hexdigest()
+
+
+def _build(directory: Path, flags: list[str]):
+    for name in [*_SOURCES, *_HEADERS]:
+        shutil.copy2(_TEMPLATES / name, directory)
+    (directory / HARNESS_HEADER).write_text(_HARNESS_INCLUDES)
+    commands = [
+        ["gcc", *flags, "-c", source, "-o", str(Path(source).with_suffix(".o"))]
+        for source in _SOURCES
+    ]
+    commands.append(
+        ["gcc", *flags, "-x", "c-header", HARNESS_HEADER, "-o", f"{HARNESS_HEADER}.gch"]
+    )
+    # The parts are independent, so they are compiled at the same time.
+    with ThreadPoolExecutor(max_workers=len(commands)) as executor:
+        runs = executor.map(
+            lambda c: subprocess.run(c, cwd=directory, capture_output=True), commands
+        )
+        for command, run in zip(commands, runs):
+            if run.returncode != 0:
+                raise RuntimeError(f"{command} failed: {run.stderr.decode()}")
+
+
+def _load_or_build(entry: Path, flags: list[str]) -> HarnessBuild:
+    if not entry.is_dir():
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        temporary = Path(tempfile.mkdtemp(dir=entry.parent, prefix=".build-"))
+        try:
+            _build(temporary, flags)
+            os.rename(temporary, entry)
+        except OSError:
+            # Another judgement stored the same build in the meantime.
+            if not entry.is_dir():
+                raise
+        finally:
+            shutil.rmtree(temporary, ignore_errors=True)
+    return HarnessBuild(entry)
+
+
+def get_harness_build(cache_dir: Path, flags: list[str]) -> HarnessBuild | None:
+    """
+    Get the prebuilt harness for the flags, building it if needed.
+
+    :param cache_dir: The directory in which the builds are kept.
+    :param flags: The flags with which the units are compiled.
+
+    :return: The build, or None if the harness could not be built, in which case
+             the harness sources should be compiled with the unit.
+    """
+    with _lock:
+        try:
+            entry = cache_dir / _key(flags)
+        except (OSError, subprocess.CalledProcessError) as e:
+            _logger.warning(f"Could not determine the C compiler version: {e}")
+            return None
+        # The entry may have been removed with the working directory of an
+        # earlier judgement.
+        if entry not in _builds or (_builds[entry] and not entry.is_dir()):
+            try:
+                _builds[entry] = _load_or_build(entry, flags)
+            except (OSError, RuntimeError) as e:
+                _logger.warning(f"Could not prebuild the C harness: {e}")
+                _builds[entry] = None
+        return _builds[entry]
@@ -35,6 +35,15 @@ class C(Language):
     def needs_selector(self):
         return True
 
+    def startup_cost(self) -> float:
+        return 0.005
+
+    def supports_virtual_stdin(self) -> bool:
+        return True
+
+    def supports_exit_interception(self) -> bool:
+        return True
+
     def file_extension(self) -> str:
         return "c"
 
@@ -76,16 +85,41 @@ class C(Language):
         }
 
     def compilation(self, files: list[str]) -> CallbackResult:
+        from tested.languages.c.build import get_harness_build
+
         main_file = files[-1]
         exec_file = Path(main_file).stem
         result = executable_name(exec_file)
         assert self.config
+        flags = [
+            "-std=c11",
+            "-Wall",
+            "-O3" if self.config.options.compiler_optimizations else "-O0",
+        ]
+        if cache := self.config.options.cache:
+            cache_dir = Path(self.config.dodona.resources, cache, "c")
+        else:
+            # The build is only shared by the compilations of this judgement.
+            cache_dir = Path(self.config.dodona.workdir, "common", "harness")
+        if build := get_harness_build(cache_dir.absolute(), flags):
+            # Link the prebuilt harness instead of compiling it again.
+            return (
+                [
+                    "gcc",
+                    *flags,
+                    "-include",
+                    build.header(),
+                    main_file,
+                    *build.objects(),
+                    "-o",
+                    result,
+                ],
+                [result],
+            )
         return (
             [
                 "gcc",
-                "-std=c11",
-                "-Wall",
-                "-O3" if self.config.options.compiler_optimizations else "-O0",
+                *flags,
                 "evaluation_result.c",
                 "values.c",
                 main_file,
@@ -194,3 +228,6 @@ class C(Language):
         regex = rf"void\s+{name}"
         the_source = self.config.dodona.source.read_text()
         return re.search(regex, the_source) is not None
+
+    def generation_uses_submission(self) -> bool:
+        return True
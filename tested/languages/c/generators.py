@@ -161,8 +161,37 @@ def convert_statement(statement: Statement, full=False) -> str:
     raise AssertionError(f"Unknown statement: {statement!r}")
 
 
+def _bytes_literal(data: str) -> str:
+    """
+    Convert a string to a C string literal of its UTF-8 bytes. Unlike a JSON string,
+    this supports all characters, including control characters and emoji.
+    """
+    result = ""
+    for byte in data.encode("utf-8"):
+        if byte in b'"\\?' or not 0x20 <= byte < 0x7F:
+            # Octal escapes have at most three digits, unlike hexadecimal ones.
+            result += f"\\{byte:03o}"
+        else:
+            result += chr(byte)
+    return f'"{result}"'
+
+
 def _generate_internal_context(ctx: PreparedContext, pu: PreparedExecutionUnit) -> str:
-    result = f"""
+    if pu.exit_file is not None:
+        result = f"""
+    // An exit call ends the testcases of the context, like it would end the
+    // program, but the after code still runs.
+    volatile int exit_code = 0;
+    tested_exit_armed = 1;
+    if (setjmp(tested_exit_jump) != 0) {{
+        exit_code = tested_exit_code;
+        goto tested_after;
+    }}
+
+    {ctx.before}
+    """
+    else:
+        result = f"""
     {ctx.before}
     
     int exit_code;
@@ -175,6 +204,8 @@ def _generate_internal_context(ctx: PreparedContext, pu: PreparedExecutionUnit)
 
         if tc.testcase.is_main_testcase():
             assert isinstance(tc.input, MainInput)
+            if ctx.stdin is not None:
+                result += f"{pu.unit.name}_set_stdin({_bytes_literal(ctx.stdin)});\n"
             wrapped = [json.dumps(a) for a in tc.input.arguments]
             result += f'char* args[] = {{"{pu.submission_name}", '
             result += ", ".join(wrapped)
@@ -196,6 +227,9 @@ def _generate_internal_context(ctx: PreparedContext, pu: PreparedExecutionUnit)
             else:
                 result += convert_statement(tc.input.input_statement()) + ";\n"
 
+    if pu.exit_file is not None:
+        result += "tested_after:\n"
+        result += "tested_exit_armed = 0;\n"
     result += ctx.after + "\n"
     result += "return exit_code;\n"
     return result
@@ -207,6 +241,36 @@ def convert_execution_unit(pu: PreparedExecutionUnit) -> str:
     #include <math.h>
     
     #include "values.h"
+    """
+
+    if pu.exit_file is not None:
+        result += """
+    #ifndef TESTED_EXIT
+    #define TESTED_EXIT
+    #include <stdlib.h>
+    #include <setjmp.h>
+    
+    static jmp_buf tested_exit_jump;
+    static int tested_exit_code;
+    static int tested_exit_armed = 0;
+    
+    _Noreturn static void tested_exit(int code) {
+        fflush(stdout);
+        fflush(stderr);
+        if (!tested_exit_armed) {
+            // For example, an exit call in the after code of a context.
+            exit(code);
+        }
+        tested_exit_code = code;
+        longjmp(tested_exit_jump, 1);
+    }
+    
+    // Intercept exit calls in the submission.
+    #define exit(code) tested_exit(code)
+    #endif
+    """
+
+    result += f"""
     #include "{pu.submission_name}.c"
     """
 
@@ -232,6 +296,15 @@ def convert_execution_unit(pu: PreparedExecutionUnit) -> str:
         fprintf(stderr, "--{pu.context_separator_secret}-- SEP");
     }}
     
+    static void {pu.unit.name}_set_stdin(const char* data) {{
+        FILE* stdin_file = fopen("{pu.unit.name}_stdin.txt", "w");
+        fputs(data, stdin_file);
+        fclose(stdin_file);
+        if (freopen("{pu.unit.name}_stdin.txt", "r", stdin) == NULL) {{
+            fprintf(stderr, "Could not provide stdin.");
+        }}
+    }}
+    
     #undef send_value
     #define send_value(value) write_value({pu.unit.name}_value_file, value)
     
@@ -254,10 +327,20 @@ def convert_execution_unit(pu: PreparedExecutionUnit) -> str:
         {pu.unit.name}_exception_file = fopen("{pu.exception_file}", "w");
         int exit_code;
     """
+    if pu.exit_file is not None:
+        result += f"""
+        FILE* exit_file = fopen("{pu.exit_file}", "w");
+    """
 
     for i, ctx in enumerate(pu.contexts):
         result += " " * 4 + f"{pu.unit.name}_write_context_separator();\n"
         result += " " * 4 + f"exit_code = {pu.unit.name}_context_{i}();\n"
+        if pu.exit_file is not None:
+            result += " " * 4 + 'fprintf(exit_file, "%d\\n", exit_code);\n'
+            result += " " * 4 + "fflush(exit_file);\n"
+
+    if pu.exit_file is not None:
+        result += " " * 4 + "fclose(exit_file);\n"
 
     result += f"""
         fclose({pu.unit.name}_value_file);
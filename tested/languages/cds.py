@@ -0,0 +1,294 @@
+"""
+Class Data Sharing (CDS) archives for the languages on the Java Virtual Machine.
+
+A large part of the start-up time of each execution unit is spent loading and
+verifying the classes of the JDK, the Kotlin standard library and the TESTed
+harness (`Values` and `EvaluationResult`). A CDS archive contains these classes in
+a form that the JVM maps into memory directly. The archives are created when the
+judge is built:
+
+    python -m tested.languages.cds java kotlin --benchmark 10
+
+This compiles the harness templates to a jar, records the classes a small
+training program loads, and dumps them to an archive in the `cds` folder of the
+language. The executions use the archive if it exists and was created from the
+current templates (see `get_archive`); otherwise, they start as usual.
+
+CDS only shares classes from jars, so the jars of the archive come before the
+directory of the unit on the class path. They contain the same harness classes as
+the directory.
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+
+from attrs import define
+
+from tested.languages.utils import kotlin_library
+
+_logger = logging.getLogger(__name__)
+
+_MANIFEST = "manifest.json"
+_ARCHIVE = "tested.jsa"
+_HARNESS = "harness.jar"
+
+# Flags that make the start-up of the JVM faster for short executions.
+_STARTUP_FLAGS = ["-XX:+UseSerialGC", "-XX:-UsePerfData"]
+
+_JAVA_TRAINING = """
+import java.io.PrintWriter;
+import java.io.StringWriter;
+import java.math.BigDecimal;
+import java.math.BigInteger;
+import java.util.*;
+
+public class Training {
+    public static void main(String[] args) {
+        PrintWriter writer = new PrintWriter(new StringWriter());
+        Map<Object, Object> map = new HashMap<>();
+        map.put("key", new TreeSet<>(List.of(1, 2)));
+        Values.send(writer, List.of(1, 2.0, "text", 'c', true, map));
+        Values.send(writer, new Object[]{BigInteger.ONE, BigDecimal.TEN, null});
+        Values.sendException(writer, new IllegalStateException("training"));
+        EvaluationResult result = EvaluationResult.builder(true).build();
+        Values.sendEvaluated(writer, result);
+        writer.flush();
+    }
+}
+"""
+
+_KOTLIN_TRAINING = """
+import java.io.PrintWriter
+import java.io.StringWriter
+import java.math.BigDecimal
+import java.math.BigInteger
+
+fun main() {
+    val writer = PrintWriter(StringWriter())
+    val map = mapOf("key" to setOf(1, 2))
+    valuesSend(writer, listOf(1, 2.0, "text", 'c', true, map))
+    valuesSend(writer, arrayOf(BigInteger.ONE, BigDecimal.TEN, null))
+    valuesSendException(writer, IllegalStateException("training"))
+    valuesSendEvaluated(writer, EvaluationResult.Builder(result = true).build())
+    writer.flush()
+}
+"""
+
+
+@define
+class Archive:
+    """A CDS archive and the jars it was created with."""
+
+    archive: Path
+    classpath: list[str]
+
+    def java_options(self) -> list[str]:
+        """
+        The options for the JVM to use the archive. If the archive cannot be used,
+        e.g. because the JDK was updated, the JVM silently starts without it.
+        """
+        return [
+            f"-XX:SharedArchiveFile={self.archive}",
+            "-Xshare:auto",
+            "-Xlog:cds*=off",
+            *_STARTUP_FLAGS,
+        ]
+
+    def class_path(self) -> str:
+        """The class path for an execution in the directory of a unit."""
+        return os.pathsep.join([*self.classpath, "."])
+
+
+def _archive_dir(judge: Path, language: str) -> Path:
+    return judge / "tested" / "languages" / language / "cds"
+
+
+def _fingerprint(judge: Path, language: str) -> str:
+    templates = judge / "tested" / "languages" / language / "templates"
+    digest = hashlib.sha256()
+    for template in sorted(templates.iterdir()):
+        digest.update(template.name.encode())
+        digest.update(template.read_bytes())
+    return digest.hexdigest()
+
+
+@functools.cache
+def get_archive(judge: Path, language: str) -> Archive | None:
+    """
+    Get the CDS archive for a language, if it was created for the current
+    templates of the language.
+
+    :param judge: The folder of the judge.
+    :param language: The language, "java" or "kotlin".
+    """
+    directory = _archive_dir(judge, language)
+    try:
+        manifest = json.loads((directory / _MANIFEST).read_text())
+        if manifest["fingerprint"] != _fingerprint(judge, language):
+            _logger.warning(f"CDS archive in {directory} is outdated, not using it.")
+            return None
+        archive = Archive(directory / _ARCHIVE, manifest["classpath"])
+    except (OSError, ValueError, KeyError):
+        return None
+    if not archive.archive.is_file():
+        return None
+    return archive
+
+
+def _run(command: list[str], directory: Path):
+    _logger.debug(f"Running {command}")
+    subprocess.run(command, cwd=directory, check=True)
+
+
+def _build_java(judge: Path, work: Path, output: Path) -> list[str]:
+    harness = output / _HARNESS
+    templates = sorted((judge / "tested/languages/java/templates").glob("*.java"))
+    _run(["javac", "-d", "classes", *map(str, templates)], work)
+    _run(["jar", "cf", str(harness), "-C", "classes", "."], work)
+    (work / "Training.java").write_text(_JAVA_TRAINING)
+    _run(["javac", "-cp", str(harness), "-d", "training", "Training.java"], work)
+    return [str(harness)]
+
+
+def _build_kotlin(judge: Path, work: Path, output: Path) -> list[str]:
+    harness = output / _HARNESS
+    templates = sorted((judge / "tested/languages/kotlin/templates").glob("*.kt"))
+    _run(["kotlinc", "-nowarn", "-d", str(harness), *map(str, templates)], work)
+    (work / "Training.kt").write_text(_KOTLIN_TRAINING)
+    _run(["kotlinc", "-cp", str(harness), "-d", "training", "Training.kt"], work)
+    # The same libraries as the kotlin command puts on the class path.
+    libraries = [
+        kotlin_library("kotlin-stdlib.jar"),
+        kotlin_library("kotlin-reflect.jar"),
+    ]
+    if libraries[0] is None:
+        raise FileNotFoundError("Could not find the Kotlin standard library.")
+    return [str(harness), *(str(x) for x in libraries if x is not None)]
+
+
+def _training_class(language: str) -> str:
+    return "TrainingKt" if language == "kotlin" else "Training"
+
+
+def build_archive(judge: Path, language: str) -> Archive:
+    """
+    Create the CDS archive for a language, replacing an existing one.
+
+    :param judge: The folder of the judge.
+    :param language: The language, "java" or "kotlin".
+    """
+    output = _archive_dir(judge, language)
+    shutil.rmtree(output, ignore_errors=True)
+    output.mkdir(parents=True)
+    with tempfile.TemporaryDirectory() as temporary:
+        work = Path(temporary)
+        if language == "java":
+            classpath = _build_java(judge, work, output)
+        else:
+            classpath = _build_kotlin(judge, work, output)
+        jars = os.pathsep.join(classpath)
+        # Record the classes that are loaded by the training program.
+        _run(
+            [
+                "java",
+                "-Xshare:off",
+                "-XX:DumpLoadedClassList=classes.lst",
+                "-cp",
+                os.pathsep.join([jars, "training"]),
+                _training_class(language),
+            ],
+            work,
+        )
+        # Only the jars are used, as classes in directories cannot be shared.
+        _run(
+            [
+                "java",
+                "-Xshare:dump",
+                "-XX:SharedClassListFile=classes.lst",
+                f"-XX:SharedArchiveFile={output / _ARCHIVE}",
+                "-cp",
+                jars,
+            ],
+            work,
+        )
+    manifest = {"fingerprint": _fingerprint(judge, language), "classpath": classpath}
+    (output / _MANIFEST).write_text(json.dumps(manifest))
+    get_archive.cache_clear()
+    return Archive(output / _ARCHIVE, classpath)
+
+
+def _start_up_time(command: list[str], directory: Path, runs: int) -> float:
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=directory, check=True, stdout=subprocess.DEVNULL)
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def benchmark(judge: Path, language: str, archive: Archive, runs: int) -> str:
+    """
+    Measure the start-up time of the training program with and without the
+    archive.
+
+    :return: A report with the median durations.
+    """
+    with tempfile.TemporaryDirectory() as temporary:
+        work = Path(temporary)
+        if language == "java":
+            _build_java(judge, work, work)
+        else:
+            _build_kotlin(judge, work, work)
+        main = _training_class(language)
+        class_path = os.pathsep.join([*archive.classpath, "training"])
+        without = ["java", "-Xshare:off", "-cp", class_path, main]
+        with_archive = ["java", *archive.java_options(), "-cp", class_path, main]
+        before = _start_up_time(without, work, runs)
+        after = _start_up_time(with_archive, work, runs)
+    return (
+        f"{language}: {before * 1000:.0f} ms without archive, "
+        f"{after * 1000:.0f} ms with archive ({before - after:+.3f} s per unit)"
+    )
+
+
+def main(arguments: list[str] | None = None):
+    parser = ArgumentParser(
+        description="Create the CDS archives for the languages on the JVM."
+    )
+    parser.add_argument(
+        "languages",
+        nargs="*",
+        choices=["java", "kotlin"],
+        default=["java", "kotlin"],
+        help="The languages to create an archive for.",
+    )
+    parser.add_argument(
+        "--benchmark",
+        type=int,
+        default=0,
+        metavar="RUNS",
+        help="Compare the start-up time with and without the archive.",
+    )
+    options = parser.parse_args(arguments)
+    judge = Path(__file__).parents[2]
+    for language in options.languages:
+        archive = build_archive(judge, language)
+        print(f"Created {archive.archive}")
+        if options.benchmark > 0:
+            print(benchmark(judge, language, archive, options.benchmark))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(stream=sys.stderr, level=logging.INFO)
+    main()
@@ -2,6 +2,7 @@
 Functions to conventionalize various aspects of a programming langauge.
 """
 
+import functools
 import logging
 from collections.abc import Callable
 from typing import TYPE_CHECKING, Literal
@@ -334,12 +335,21 @@ _case_mapping: dict[NamingConventions, Callable[[str], str]] = {
 }
 
 
+@functools.lru_cache(maxsize=4096)
+def apply_convention(convention: NamingConventions, identifier: str) -> str:
+    """
+    Convert a name (which should be snake case) to a naming convention.
+
+    The same names are converted over and over, so the results are memoized.
+    """
+    return _case_mapping[convention](identifier)
+
+
 def _conventionalize(
     language: "Language", what: Conventionable, identifier: str
 ) -> str:
     conventions = language.naming_conventions()
-    mapper = _case_mapping[conventions.get(what, "snake_case")]
-    return mapper(identifier)
+    return apply_convention(conventions.get(what, "snake_case"), identifier)
 
 
 def conventionalize_class(language: "Language", class_name: str) -> str:
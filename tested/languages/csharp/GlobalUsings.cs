@@ -0,0 +1,8 @@
+// The implicit usings of the .NET SDK, for compilations without dotnet build.
+global using global::System;
+global using global::System.Collections.Generic;
+global using global::System.IO;
+global using global::System.Linq;
+global using global::System.Net.Http;
+global using global::System.Threading;
+global using global::System.Threading.Tasks;
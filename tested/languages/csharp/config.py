@@ -1,5 +1,8 @@
+import functools
 import logging
+import os
 import re
+import shutil
 from pathlib import Path
 from typing import TYPE_CHECKING
 
@@ -29,6 +32,41 @@ if TYPE_CHECKING:
 
 # Where the results of the compilation are stored.
 OUTPUT_DIRECTORY = "all-outputs"
+# The target framework of dotnet.csproj, for compilations with csc.
+TARGET_FRAMEWORK = "net8.0"
+
+
+def _version(path: Path) -> tuple[int, ...]:
+    return tuple(int(x) for x in re.findall(r"\d+", path.name))
+
+
+@functools.cache
+def _roslyn() -> tuple[Path, list[Path]] | None:
+    """
+    Find the C# compiler of the newest .NET SDK and the reference assemblies for
+    the target framework.
+
+    :return: The path to csc.dll and the reference assemblies, or None if they
+             cannot be found.
+    """
+    if root := os.environ.get("DOTNET_ROOT"):
+        dotnet_root = Path(root)
+    elif dotnet := shutil.which("dotnet"):
+        dotnet_root = Path(dotnet).resolve().parent
+    else:
+        return None
+    compilers = sorted(
+        dotnet_root.glob("sdk/*/Roslyn/bincore/csc.dll"),
+        key=lambda x: _version(x.parents[2]),
+    )
+    major = TARGET_FRAMEWORK.removeprefix("net").split(".")[0]
+    packs = sorted(
+        dotnet_root.glob(f"packs/Microsoft.NETCore.App.Ref/{major}.*"), key=_version
+    )
+    if not compilers or not packs:
+        return None
+    references = sorted((packs[-1] / "ref" / TARGET_FRAMEWORK).glob("*.dll"))
+    return compilers[-1], references
 
 
 class CSharp(Language):
@@ -38,6 +76,15 @@ class CSharp(Language):
     def needs_selector(self):
         return True
 
+    def startup_cost(self) -> float:
+        return 0.2
+
+    def compiler_memory(self) -> int:
+        return 1024 * 1024 * 1024
+
+    def supports_virtual_stdin(self) -> bool:
+        return True
+
     def file_extension(self) -> str:
         return "cs"
 
@@ -100,7 +147,54 @@ class CSharp(Language):
             "tuple": "supported",
         }
 
+    def _uses_csc(self) -> bool:
+        """
+        If the code is compiled with csc directly instead of with dotnet build, which
+        evaluates and restores the project each time. This is enabled with the
+        "compiler" option.
+        """
+        assert self.config
+        if self.config.dodona.config_for().get("compiler", "dotnet") != "csc":
+            return False
+        if _roslyn() is None:
+            logger.warning("Could not find csc, compiling with dotnet build.")
+            return False
+        return True
+
+    def _csc_compilation(self, files: list[str]) -> CallbackResult:
+        assert self.config
+        compiler, references = _roslyn()  # type: ignore
+        name = Path(files[-1]).stem
+        outputs = {f"{name}.dll", f"{name}.pdb"}
+
+        def file_filter(file: Path) -> bool:
+            return file.name in outputs
+
+        sources = [x for x in files if x.endswith(".cs")]
+        usings = self.config.dodona.judge / "tested/languages/csharp/GlobalUsings.cs"
+        # The same settings as dotnet build with dotnet.csproj. The compiler server
+        # (-shared) keeps the compiler loaded between compilations.
+        return [
+            "dotnet",
+            str(compiler),
+            "-nologo",
+            "-shared",
+            "-target:exe",
+            f"-out:{name}.dll",
+            f"-main:Tested.{name}",
+            "-nullable:enable",
+            "-debug:portable",
+            "-define:TRACE;DEBUG;NET;NETCOREAPP",
+            "-nowarn:1701,1702",
+            *(f"-reference:{x}" for x in references),
+            str(usings),
+            *sources,
+        ], file_filter
+
     def compilation(self, files: list[str]) -> CallbackResult:
+        if self._uses_csc():
+            return self._csc_compilation(files)
+
         # In C#, all output files are located in a subdirectory, so we just
         # want to copy over the subdirectory.
         def file_filter(file: Path) -> bool:
@@ -124,6 +218,13 @@ class CSharp(Language):
         return args, file_filter
 
     def execution(self, cwd: Path, file: str, arguments: list[str]) -> Command:
+        if self._uses_csc():
+            assert self.config
+            runtime = (
+                self.config.dodona.judge
+                / "tested/languages/csharp/csc.runtimeconfig.json"
+            )
+            return ["dotnet", "exec", "--runtimeconfig", str(runtime), file, *arguments]
         file = OUTPUT_DIRECTORY + "/" + file
         return ["dotnet", file, *arguments]
 
@@ -180,6 +281,8 @@ class {class_name}
         )
         submission_location_regex = rf"{submission_location.resolve()}:line ([0-9]+)"
         compilation_location_regex = rf"{submission_location.resolve()}\((\d+),(\d+)\)"
+        # Compilations with csc report the files relative to the directory.
+        relative_location_regex = rf"(?<![\w/]){submission_file(self)}\((\d+),(\d+)\)"
         compilation_suffix = f" [{self.config.dodona.workdir}/common/dotnet.csproj]"
 
         resulting_lines = ""
@@ -195,6 +298,7 @@ class {class_name}
 
             line = re.sub(submission_location_regex, r"<code>:\1", line)
             line = re.sub(compilation_location_regex, r"<code>:\1:\2", line)
+            line = re.sub(relative_location_regex, r"<code>:\1:\2", line)
             line = line.replace(compilation_suffix, "")
             resulting_lines += line
 
@@ -278,3 +382,6 @@ class {class_name}
         regex = rf"void\s+{name}"
         the_source = self.config.dodona.source.read_text()
         return re.search(regex, the_source) is not None
+
+    def generation_uses_submission(self) -> bool:
+        return True
@@ -288,6 +288,8 @@ def _generate_internal_context(ctx: PreparedContext, pu: PreparedExecutionUnit)
         result += "try {"
         if tc.testcase.is_main_testcase():
             assert isinstance(tc.input, MainInput)
+            if ctx.stdin is not None:
+                result += f"Console.SetIn(new StringReader({json.dumps(ctx.stdin)}));\n"
             result += " " * 4 + f"{pu.submission_name}.Main(new string[]{{"
             wrapped = [json.dumps(a) for a in tc.input.arguments]
             result += ", ".join(wrapped)
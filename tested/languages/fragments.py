@@ -0,0 +1,260 @@
+"""
+Precomputed feedback fragments for a test suite.
+
+A lot of the feedback TESTed sends to Dodona does not depend on the submission at
+all: the readable input of a testcase, the readable expected return value, ... are
+fully determined by the test suite and the programming language. This module
+renders those fragments once, before the execution starts, so the evaluation of
+each testcase can look them up instead of generating (and highlighting) the code
+again.
+
+The fragments are also kept in a small in-process cache, allowing them to be
+reused across judgements of the same exercise. The key consists of everything the
+rendering depends on: the test suite, the languages, the namespace and the
+options of the programming language, and the contents of the files with the
+stdin of the testcases.
+"""
+
+import hashlib
+import logging
+from collections.abc import Iterable
+
+from attrs import define, field
+
+from tested.configs import Bundle
+from tested.dodona import ExtendedMessage
+from tested.languages.generation import (
+    attempt_readable_input,
+    generate_statement,
+    generation_key,
+    get_readable_input,
+)
+from tested.parsing import suite_to_json
+from tested.serialisation import Statement
+from tested.testsuite import (
+    Context,
+    FileUrl,
+    LanguageLiterals,
+    MainInput,
+    OutputChannel,
+    Testcase,
+    TextChannelType,
+    TextData,
+    ValueOutputChannel,
+)
+
+_logger = logging.getLogger(__name__)
+
+# The maximum number of test suites for which the fragments are kept in memory.
+MAX_CACHED_SUITES = 16
+
+
+@define
+class TestcaseFragments:
+    """The static feedback for one testcase."""
+
+    readable_input: ExtendedMessage
+    "The readable input, as returned by `get_readable_input`."
+    seen_files: set[FileUrl]
+    "The files that are linked in the readable input."
+    readable_expected: str | None = None
+    "The readable expected return value, if there is one."
+
+
+@define
+class ContextFragments:
+    """The static feedback for one context."""
+
+    readable_input: ExtendedMessage
+    "The readable input, as returned by `attempt_readable_input`."
+    testcases: list[TestcaseFragments]
+    "The fragments of each testcase, in the order of the test suite."
+    meta_statements: str | None = None
+    "The statements for the Python tutor, if the language supports it."
+    meta_stdin: str | None = None
+    "The stdin for the Python tutor, if the language supports it."
+
+
+@define
+class SuiteFragments:
+    """
+    The static feedback for a complete test suite.
+
+    The fragments are stored by index: ``tabs[t][c]`` contains the fragments of
+    context ``c`` in tab ``t``. To find the fragments for an object from the test
+    suite, use the lookup methods, which are linked to the test suite of the bundle.
+    """
+
+    tabs: list[list[ContextFragments]]
+    _contexts: dict[int, ContextFragments] = field(factory=dict, init=False)
+    _testcases: dict[int, TestcaseFragments] = field(factory=dict, init=False)
+    _channels: dict[int, TestcaseFragments] = field(factory=dict, init=False)
+
+    def link(self, bundle: Bundle):
+        """
+        Link the fragments to the objects of the test suite in the bundle.
+
+        The fragments are computed for a test suite with the same hash, so the
+        structure of both test suites is the same.
+        """
+        for tab, tab_fragments in zip(bundle.suite.tabs, self.tabs, strict=True):
+            for context, fragments in zip(tab.contexts, tab_fragments, strict=True):
+                self._contexts[id(context)] = fragments
+                for testcase, tc_fragments in zip(
+                    context.testcases, fragments.testcases, strict=True
+                ):
+                    self._testcases[id(testcase)] = tc_fragments
+                    self._channels[id(testcase.output.result)] = tc_fragments
+
+    def for_context(self, context: Context) -> ContextFragments | None:
+        return self._contexts.get(id(context))
+
+    def for_testcase(self, testcase: Testcase) -> TestcaseFragments | None:
+        return self._testcases.get(id(testcase))
+
+    def readable_expected(self, channel: OutputChannel) -> str | None:
+        if fragments := self._channels.get(id(channel)):
+            return fragments.readable_expected
+        return None
+
+
+_cache: dict[tuple[str, str, str, str], list[list[ContextFragments]]] = dict()
+
+
+def suite_hash(bundle: Bundle) -> str:
+    """
+    Compute a hash of the test suite in the bundle.
+
+    The hash is computed once and kept in the global config, as the code generation
+    modifies some parts of the test suite in-place.
+
+    :param bundle: The configuration bundle.
+    :return: A hex digest of the serialised test suite.
+    """
+    if bundle.global_config.suite_hash is None:
+        serialised = suite_to_json(bundle.suite).encode()
+        bundle.global_config.suite_hash = hashlib.sha256(serialised).hexdigest()
+    return bundle.global_config.suite_hash
+
+
+def _stdin_files_hash(bundle: Bundle) -> str:
+    """
+    Compute a hash of the contents of the files with the stdin of the testcases,
+    which are part of the rendered input. The test suite only contains the names of
+    these files.
+    """
+    digest = hashlib.sha256()
+    for tab in bundle.suite.tabs:
+        for context in tab.contexts:
+            for testcase in context.testcases:
+                if not isinstance(testcase.input, MainInput):
+                    continue
+                stdin = testcase.input.stdin
+                if isinstance(stdin, TextData) and stdin.type == TextChannelType.FILE:
+                    data = stdin.get_data_as_string(bundle.config.resources)
+                    digest.update(hashlib.sha256(data.encode()).digest())
+    return digest.hexdigest()
+
+
+def _meta_information(
+    bundle: Bundle, context: Context
+) -> tuple[str | None, str | None]:
+    # TODO: this is currently very Python-specific
+    # See if we need a callback to the language modules in the future.
+    meta_statements = []
+    meta_stdin = None
+    for case in context.testcases:
+        if case.is_main_testcase():
+            assert isinstance(case.input, MainInput)
+            if isinstance(case.input.stdin, TextData):
+                meta_stdin = case.input.stdin.get_data_as_string(
+                    bundle.config.resources
+                )
+        elif isinstance(case.input, Statement):
+            stmt = generate_statement(bundle, case.input)
+            meta_statements.append(stmt)
+        elif isinstance(case.input, LanguageLiterals):
+            stmt = case.input.get_for(bundle.config.programming_language)
+            meta_statements.append(stmt)
+        else:
+            raise AssertionError(f"Found unknown case input type: {case.input}")
+
+    # Don't add empty statements
+    return "\n".join(meta_statements) if meta_statements else None, meta_stdin
+
+
+def _render_testcase(bundle: Bundle, testcase: Testcase) -> TestcaseFragments:
+    readable_input, seen = get_readable_input(bundle, testcase)
+    result = testcase.output.result
+    if isinstance(result, ValueOutputChannel) and result.value:
+        readable_expected = generate_statement(bundle, result.value)
+    else:
+        readable_expected = None
+    return TestcaseFragments(
+        readable_input=readable_input,
+        seen_files=seen,
+        readable_expected=readable_expected,
+    )
+
+
+def _render_contexts(
+    bundle: Bundle, contexts: Iterable[Context]
+) -> list[ContextFragments]:
+    results = []
+    for context in contexts:
+        testcases = [_render_testcase(bundle, t) for t in context.testcases]
+        if bundle.language.supports_debug_information():
+            meta_statements, meta_stdin = _meta_information(bundle, context)
+        else:
+            meta_statements, meta_stdin = None, None
+        results.append(
+            ContextFragments(
+                readable_input=attempt_readable_input(bundle, context),
+                testcases=testcases,
+                meta_statements=meta_statements,
+                meta_stdin=meta_stdin,
+            )
+        )
+    return results
+
+
+def precompute_fragments(bundle: Bundle) -> SuiteFragments:
+    """
+    Render the static feedback fragments for the test suite in the bundle.
+
+    This should be called before the code generation, as that modifies some parts
+    of the test suite in-place. If the fragments were already computed for the
+    bundle, they are returned as-is.
+
+    :param bundle: The configuration bundle.
+    :return: The fragments, which are also stored in the global config.
+    """
+    if bundle.global_config.fragments is not None:
+        return bundle.global_config.fragments
+
+    key = (
+        suite_hash(bundle),
+        generation_key(bundle),
+        bundle.config.natural_language,
+        _stdin_files_hash(bundle),
+    )
+    if (tabs := _cache.get(key)) is None:
+        _logger.debug("Rendering feedback fragments for the test suite.")
+        tabs = [_render_contexts(bundle, tab.contexts) for tab in bundle.suite.tabs]
+        if len(_cache) >= MAX_CACHED_SUITES:
+            del _cache[next(iter(_cache))]
+        _cache[key] = tabs
+    else:
+        _logger.debug("Re-using feedback fragments for the test suite.")
+
+    fragments = SuiteFragments(tabs=tabs)
+    fragments.link(bundle)
+    bundle.global_config.fragments = fragments
+    return fragments
+
+
+def get_fragments(bundle: Bundle) -> SuiteFragments | None:
+    """
+    Get the precomputed fragments for the bundle, if they are available.
+    """
+    return bundle.global_config.fragments
@@ -23,6 +23,7 @@ from tested.dodona import ExtendedMessage
 from tested.internationalization import get_i18n_string
 from tested.languages import Language
 from tested.languages.conventionalize import selector_file, submission_name
+from tested.languages.memo import statement_memo, structural_key
 from tested.languages.preparation import (
     PreparedExecutionUnit,
     prepare_assignment,
@@ -236,6 +237,37 @@ def generate_statement(bundle: Bundle, statement: Statement) -> str:
 
     :return: The code the statement.
     """
+    try:
+        key = (generation_key(bundle), structural_key(statement))
+    except TypeError:
+        return _generate_statement(bundle, statement)
+    return statement_memo.get(key, lambda: _generate_statement(bundle, statement))
+
+
+def generation_key(bundle: Bundle) -> str:
+    """
+    Get a key for what determines the generated code besides the test suite: the
+    programming language, the namespace of the submission and the options of the
+    language. These differ between judgements, but not within one, so the key is
+    computed once and kept in the global config.
+
+    :param bundle: The configuration bundle.
+    :return: The key.
+    """
+    if bundle.global_config.generation_key is None:
+        bundle.global_config.generation_key = json.dumps(
+            [
+                bundle.config.programming_language,
+                bundle.suite.namespace,
+                bundle.config.config_for(),
+            ],
+            sort_keys=True,
+            default=str,
+        )
+    return bundle.global_config.generation_key
+
+
+def _generate_statement(bundle: Bundle, statement: Statement) -> str:
     if isinstance(statement, Expression):
         statement = prepare_expression(bundle, statement)
     else:
@@ -34,6 +34,9 @@ class Haskell(Language):
     def needs_selector(self):
         return True
 
+    def compiler_memory(self) -> int:
+        return 1024 * 1024 * 1024
+
     def file_extension(self) -> str:
         return "hs"
 
@@ -88,14 +91,22 @@ class Haskell(Language):
         main_ = files[-1]
         exec_ = main_.rstrip(".hs")
         assert self.config
+        # Each compilation (e.g. of a partition in the fallback mode) has its own
+        # output directory, as the partitions contain different modules with the
+        # same name, such as the selector. They can then also run at the same time.
         return [
             "ghc",
+            "-keep-going",
             "-fno-cse",
             "-fno-full-laziness",
             "-O3" if self.config.options.compiler_optimizations else "-O0",
+            "-outputdir",
+            "ghc",
             main_,
             "-main-is",
             exec_,
+            "-o",
+            exec_,
         ], [executable_name(exec_)]
 
     def execution(self, cwd: Path, file: str, arguments: list[str]) -> Command:
@@ -11,6 +11,7 @@ from tested.datatypes import (
 )
 from tested.dodona import AnnotateCode, Message
 from tested.features import Construct, TypeSupport
+from tested.languages.cds import get_archive
 from tested.languages.conventionalize import (
     Conventionable,
     NamingConventions,
@@ -39,6 +40,16 @@ class Java(Language):
     def needs_selector(self):
         return True
 
+    def startup_cost(self) -> float:
+        # Starting the JVM is slow.
+        return 0.5
+
+    def compiler_memory(self) -> int:
+        return 512 * 1024 * 1024
+
+    def supports_virtual_stdin(self) -> bool:
+        return True
+
     def file_extension(self) -> str:
         return "java"
 
@@ -139,6 +150,16 @@ class Java(Language):
     def execution(self, cwd: Path, file: str, arguments: list[str]) -> Command:
         assert self.config
         limit = jvm_memory_limit(self.config)
+        if archive := get_archive(self.config.dodona.judge, "java"):
+            return [
+                "java",
+                f"-Xmx{limit}",
+                *archive.java_options(),
+                "-cp",
+                archive.class_path(),
+                Path(file).stem,
+                *arguments,
+            ]
         return ["java", f"-Xmx{limit}", "-cp", ".", Path(file).stem, *arguments]
 
     def linter(self, remaining: float) -> tuple[list[Message], list[AnnotateCode]]:
@@ -229,3 +250,6 @@ class Java(Language):
         assert self.config
         the_source = self.config.dodona.source.read_text()
         return re.search(regex, the_source) is not None
+
+    def generation_uses_submission(self) -> bool:
+        return True
@@ -283,6 +283,12 @@ def _generate_internal_context(ctx: PreparedContext, pu: PreparedExecutionUnit)
         result += "try {\n"
         if tc.testcase.is_main_testcase():
             assert isinstance(tc.input, MainInput)
+            if ctx.stdin is not None:
+                result += (
+                    "System.setIn(new ByteArrayInputStream("
+                    f"{json.dumps(ctx.stdin)}.getBytes("
+                    "java.nio.charset.StandardCharsets.UTF_8)));\n"
+                )
             result += " " * 4 + f"{pu.submission_name}.main(new String[]{{"
             wrapped = [json.dumps(a) for a in tc.input.arguments]
             result += ", ".join(wrapped)
@@ -1,3 +1,4 @@
+import json
 import logging
 import re
 from pathlib import Path
@@ -22,6 +23,7 @@ from tested.languages.language import (
     CallbackResult,
     Command,
     Language,
+    ServerRequest,
     TypeDeclarationMetadata,
 )
 from tested.languages.utils import cleanup_description
@@ -33,6 +35,20 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
+def _request(kind: str, request: ServerRequest) -> str:
+    fields = {
+        "kind": kind,
+        "token": request.token,
+        "directory": str(request.directory),
+        "file": request.file,
+        "arguments": request.arguments,
+        "stdin": str(request.stdin),
+        "stdout": str(request.stdout),
+        "stderr": str(request.stderr),
+    }
+    return json.dumps(fields) + "\n"
+
+
 class JavaScript(Language):
     def initial_dependencies(self) -> list[str]:
         return ["values.js"]
@@ -117,6 +133,24 @@ class JavaScript(Language):
     def execution(self, cwd: Path, file: str, arguments: list[str]) -> Command:
         return ["node", file, *arguments]
 
+    def execution_server(
+        self, directory: Path, token: str
+    ) -> tuple[Command, str] | None:
+        helper = Path(__file__).parent / "helper.js"
+        return ["node", str(helper)], f"{token}\n"
+
+    def server_request(self, request: ServerRequest) -> str:
+        return _request("unit", request)
+
+    def compilation_server(
+        self, directory: Path, token: str
+    ) -> tuple[Command, str] | None:
+        # The same helper also answers the requests of modify_solution.
+        return self.execution_server(directory, token)
+
+    def compilation_request(self, request: ServerRequest) -> str:
+        return _request("command", request)
+
     def modify_solution(self, solution: Path):
         # import local to prevent errors
         from tested.judge.utils import run_command
@@ -124,12 +158,20 @@ class JavaScript(Language):
         assert self.config
 
         parse_file = str(Path(__file__).parent / "parseAst.js")
-        output = run_command(
-            solution.parent,
-            timeout=None,
-            command=["node", parse_file, str(solution.absolute())],
-            check=True,
-        )
+        command = ["node", parse_file, str(solution.absolute())]
+        output = None
+        if self.config.compilers is not None:
+            # Ask the running helper instead of starting node.
+            output = self.config.compilers.compile(
+                self.config.dodona.workdir,
+                solution.parent,
+                command,
+                float(self.config.dodona.time_limit),
+            )
+        if output is None or output.exit != 0:
+            output = run_command(
+                solution.parent, timeout=None, command=command, check=True
+            )
         assert output, "Missing output from JavaScript's modify_solution"
         namings = output.stdout.strip()
         with open(solution, "a") as file:
@@ -0,0 +1,209 @@
+/*
+ * A Node helper that is kept running during a judgement, as the compilation
+ * server and the execution server of the JavaScript configuration.
+ *
+ * The first line on stdin is a token, which is written back with exit code 0.
+ * Each following line is a JSON request with a token, a directory, a file, the
+ * arguments, and the files for the stdin, stdout and stderr. The kind of the
+ * request is either:
+ *
+ * - "command": the file and arguments are a command that would be run otherwise.
+ *   Requests for parseAst.js are answered by the helper itself; other commands
+ *   (such as node --check) are run in a new process.
+ * - "unit": the file is an execution unit, which is executed in a new worker
+ *   thread with the standard streams redirected to the files of the request. If
+ *   the worker cannot be started, the unit is executed in a new process.
+ *
+ * When a request is done, the token and the exit code are written to stdout.
+ */
+const childProcess = require('child_process');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const readline = require('readline');
+const { Worker } = require('worker_threads');
+
+// The code that runs in the worker before the unit. The worker shares the file
+// descriptors of this process, so everything that would use the standard streams
+// of the process is redirected to the files of the request.
+const BOOTSTRAP = `
+const fs = require('fs');
+const { workerData } = require('worker_threads');
+
+function redirect(stream, file) {
+    const fd = fs.openSync(file, 'a');
+    Object.defineProperty(stream, 'fd', { value: fd });
+    stream.write = (chunk, encoding, callback) => {
+        if (typeof encoding === 'function') {
+            callback = encoding;
+        }
+        fs.writeSync(fd, typeof chunk === 'string' ? chunk : Buffer.from(chunk));
+        if (typeof callback === 'function') {
+            callback();
+        }
+        return true;
+    };
+}
+
+redirect(process.stdout, workerData.stdout);
+redirect(process.stderr, workerData.stderr);
+
+const stdin = fs.openSync(workerData.stdin, 'r');
+Object.defineProperty(process, 'stdin', {
+    value: fs.createReadStream(null, { fd: stdin, autoClose: false }),
+    configurable: true,
+});
+const readFileSync = fs.readFileSync;
+const readSync = fs.readSync;
+fs.readFileSync = function (file, ...rest) {
+    const stdinFile = file === 0 || file === '/dev/stdin';
+    return readFileSync.call(this, stdinFile ? workerData.stdin : file, ...rest);
+};
+fs.readSync = function (fd, ...rest) {
+    return readSync.call(this, fd === 0 ? stdin : fd, ...rest);
+};
+
+// The file descriptors 1 and 2 of this process are the protocol of the helper, so
+// writes to them (or to /dev/stdout and /dev/stderr) go to the files instead.
+const outputs = { 1: process.stdout.fd, 2: process.stderr.fd };
+const outputFiles = { '/dev/stdout': 1, '/dev/stderr': 2 };
+const outputFd = (fd) => outputs[fd] ?? fd;
+const outputFile = (file) => outputs[outputFiles[file] ?? file] ?? file;
+for (const name of ['write', 'writeSync']) {
+    const original = fs[name];
+    fs[name] = function (fd, ...rest) {
+        return original.call(this, outputFd(fd), ...rest);
+    };
+}
+for (const name of ['writeFile', 'writeFileSync', 'appendFile', 'appendFileSync']) {
+    const original = fs[name];
+    fs[name] = function (file, ...rest) {
+        return original.call(this, outputFile(file), ...rest);
+    };
+}
+const standardFiles = {
+    '/dev/stdin': [workerData.stdin, 'r'],
+    '/dev/stdout': [workerData.stdout, 'a'],
+    '/dev/stderr': [workerData.stderr, 'a'],
+};
+for (const name of ['open', 'openSync']) {
+    const original = fs[name];
+    fs[name] = function (file, flags, ...rest) {
+        if (file in standardFiles) {
+            [file, flags] = standardFiles[file];
+        }
+        return original.call(this, file, flags, ...rest);
+    };
+}
+
+process.argv = [process.execPath, workerData.file, ...workerData.arguments];
+require(workerData.file);
+`;
+
+function exitCode(result) {
+    if (result.signal) {
+        // Like Python, report a signal as its negative number.
+        return -os.constants.signals[result.signal];
+    }
+    return result.status ?? 1;
+}
+
+function runProcess(request, command) {
+    const stdin = fs.openSync(request.stdin, 'r');
+    const stdout = fs.openSync(request.stdout, 'a');
+    const stderr = fs.openSync(request.stderr, 'a');
+    try {
+        const result = childProcess.spawnSync(command[0], command.slice(1), {
+            cwd: request.directory,
+            stdio: [stdin, stdout, stderr],
+        });
+        return exitCode(result);
+    } finally {
+        fs.closeSync(stdin);
+        fs.closeSync(stdout);
+        fs.closeSync(stderr);
+    }
+}
+
+function parseAst(request) {
+    const { topLevelNames } = require('./parseAst.js');
+    const source = fs.readFileSync(request.arguments[1], 'utf-8');
+    try {
+        fs.writeFileSync(request.stdout, topLevelNames(source).join(', ') + '\n');
+    } catch (e) {
+        // Assume this is invalid JavaScript at this point.
+        fs.writeFileSync(request.stderr, String(e));
+    }
+    return 0;
+}
+
+function runCommand(request) {
+    if (path.basename(request.arguments[0] ?? '') === 'parseAst.js') {
+        return parseAst(request);
+    }
+    const command = [request.file, ...request.arguments];
+    if (command[0] === 'node') {
+        command[0] = process.execPath;
+    }
+    return runProcess(request, command);
+}
+
+function runUnit(request) {
+    const file = path.resolve(request.directory, request.file);
+    // Relative paths in the unit are relative to its directory. The worker has
+    // the working directory of this process.
+    process.chdir(request.directory);
+    return new Promise((resolve) => {
+        let worker;
+        try {
+            worker = new Worker(BOOTSTRAP, {
+                eval: true,
+                // A piped stdin keeps the worker alive, so the stdin of the unit
+                // is read from the file in the worker itself.
+                stdout: true,
+                stderr: true,
+                workerData: { ...request, file },
+            });
+        } catch (e) {
+            // The unit cannot be isolated in a worker.
+            resolve(runProcess(request, [process.execPath, file, ...request.arguments]));
+            return;
+        }
+        // Output that was not redirected is not written to the protocol.
+        worker.stdout.resume();
+        worker.stderr.resume();
+        worker.on('error', (e) => {
+            fs.appendFileSync(request.stderr, e instanceof Error ? `${e.stack}\n` : `${e}\n`);
+        });
+        worker.on('exit', resolve);
+    });
+}
+
+async function handle(request) {
+    try {
+        if (request.kind === 'unit') {
+            return await runUnit(request);
+        }
+        return runCommand(request);
+    } catch (e) {
+        fs.appendFileSync(request.stderr, e instanceof Error ? `${e.stack}\n` : `${e}\n`);
+        return 1;
+    }
+}
+
+const lines = readline.createInterface({ input: process.stdin });
+let ready = false;
+let queue = Promise.resolve();
+lines.on('line', (line) => {
+    if (!ready) {
+        ready = true;
+        console.log(`${line.trim()} 0`);
+        return;
+    }
+    const request = JSON.parse(line);
+    // Handle the requests one at a time, in order.
+    queue = queue.then(async () => {
+        const code = await handle(request);
+        console.log(`${request.token} ${code}`);
+    });
+});
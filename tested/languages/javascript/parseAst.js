@@ -1,6 +1,5 @@
 const { parse } = require('abstract-syntax-tree');
 const fs = require('fs');
-const source = fs.readFileSync(process.argv[2], 'utf-8');
 
 function mapSubTreeToIds(subtree) {
     const type = subtree.type;
@@ -29,15 +28,23 @@ function mapIdToName(id) {
     }
 }
 
-let ast;
-try {
+// The names that are declared at the top level of the source.
+function topLevelNames(source) {
     // Add next option to support more JavaScript features.
     const ast = parse(source, {next: true}).body;
     // Use Set to remove duplicates
-    const array = Array.from(new Set(ast.flatMap(mapSubTreeToIds).flatMap(mapIdToName)));
-    console.log(array.join(', '));
-} catch (e) {
-    // Assume this is invalid JavaScript at this point.
-    console.error(e);
-    process.exit(0);
+    return Array.from(new Set(ast.flatMap(mapSubTreeToIds).flatMap(mapIdToName)));
+}
+
+module.exports = { topLevelNames };
+
+if (require.main === module) {
+    const source = fs.readFileSync(process.argv[2], 'utf-8');
+    try {
+        console.log(topLevelNames(source).join(', '));
+    } catch (e) {
+        // Assume this is invalid JavaScript at this point.
+        console.error(e);
+        process.exit(0);
+    }
 }
@@ -0,0 +1,66 @@
+import java.io.BufferedReader;
+import java.io.FileOutputStream;
+import java.io.IOException;
+import java.io.InputStreamReader;
+import java.io.PrintStream;
+import java.nio.charset.StandardCharsets;
+import java.util.Arrays;
+
+import org.jetbrains.kotlin.cli.jvm.K2JVMCompiler;
+
+/**
+ * A Kotlin compiler that is kept running during a judgement, so the compiler is
+ * only loaded once (see the compilation server of the Kotlin configuration).
+ *
+ * The first line on stdin is a token, which is written back with exit code 0 once
+ * the compiler is loaded. Each following line is a request, with tab-separated
+ * fields: the token of the request, the files for the stdout and stderr of the
+ * compiler, and the arguments for the compiler. When the compilation is done, the
+ * token and the exit code of the compiler are written to stdout.
+ */
+public class CompileServer {
+
+    public static void main(String[] args) throws IOException {
+        BufferedReader input = new BufferedReader(
+                new InputStreamReader(System.in, StandardCharsets.UTF_8));
+        PrintStream output = System.out;
+
+        String ready = input.readLine();
+        if (ready == null) {
+            return;
+        }
+        // Load the compiler before reporting that the server is ready.
+        new K2JVMCompiler();
+        output.println(ready + " 0");
+        output.flush();
+
+        String line;
+        while ((line = input.readLine()) != null) {
+            String[] fields = line.split("\t", -1);
+            if (fields.length < 3) {
+                continue;
+            }
+            String[] arguments = Arrays.copyOfRange(fields, 3, fields.length);
+            int code;
+            try (PrintStream stdout = new PrintStream(new FileOutputStream(fields[1]), true, "UTF-8");
+                 PrintStream stderr = new PrintStream(new FileOutputStream(fields[2]), true, "UTF-8")) {
+                code = compile(arguments, stdout, stderr);
+            }
+            output.println(fields[0] + " " + code);
+            output.flush();
+        }
+    }
+
+    private static int compile(String[] arguments, PrintStream stdout, PrintStream stderr) {
+        PrintStream previous = System.out;
+        System.setOut(stdout);
+        try {
+            return new K2JVMCompiler().exec(stderr, arguments).getCode();
+        } catch (Exception e) {
+            e.printStackTrace(stderr);
+            return 1;
+        } finally {
+            System.setOut(previous);
+        }
+    }
+}
@@ -12,6 +12,7 @@ from tested.datatypes import (
 )
 from tested.dodona import AnnotateCode, Message, Status
 from tested.features import Construct, TypeSupport
+from tested.languages.cds import get_archive
 from tested.languages.conventionalize import (
     EXECUTION_PREFIX,
     Conventionable,
@@ -23,9 +24,14 @@ from tested.languages.language import (
     CallbackResult,
     Command,
     Language,
+    ServerRequest,
     TypeDeclarationMetadata,
 )
-from tested.languages.utils import jvm_cleanup_stacktrace, jvm_memory_limit
+from tested.languages.utils import (
+    jvm_cleanup_stacktrace,
+    jvm_memory_limit,
+    kotlin_library,
+)
 from tested.serialisation import Statement, Value
 
 if TYPE_CHECKING:
@@ -47,6 +53,16 @@ class Kotlin(Language):
     def needs_selector(self):
         return True
 
+    def startup_cost(self) -> float:
+        # Starting the JVM is slow.
+        return 0.5
+
+    def compiler_memory(self) -> int:
+        return 1024 * 1024 * 1024
+
+    def supports_virtual_stdin(self) -> bool:
+        return True
+
     def file_extension(self) -> str:
         return "kt"
 
@@ -155,9 +171,56 @@ class Kotlin(Language):
             *others,
         ], file_filter
 
+    def compilation_server(
+        self, directory: Path, token: str
+    ) -> tuple[Command, str] | None:
+        assert self.config
+        if (compiler := kotlin_library("kotlin-compiler.jar")) is None:
+            return None
+        server = self.config.dodona.judge / "tested/languages/kotlin/CompileServer.java"
+        # The server runs during the whole judgement, next to the executions, so
+        # it gets at most half of the memory limit for its heap.
+        limit = jvm_memory_limit(self.config)
+        heap = min(self.compiler_memory(), limit // 2048 * 1024)
+        return [
+            "java",
+            f"-Xmx{heap}",
+            f"-XX:MaxMetaspaceSize={limit // 4096 * 1024}",
+            "-XX:+ExitOnOutOfMemoryError",
+            "-cp",
+            str(compiler),
+            str(server),
+        ], f"{token}\n"
+
+    def compilation_request(self, request: ServerRequest) -> str:
+        # The server does not run in the directory of the compilation, so the
+        # files and the class path are made absolute and the output directory is
+        # given explicitly. The JVM options are for the kotlinc script.
+        arguments = []
+        for argument in request.arguments:
+            if argument.startswith("-J"):
+                continue
+            if not argument.startswith("-") and (request.directory / argument).exists():
+                argument = str(request.directory / argument)
+            arguments.append(argument)
+        arguments += ["-d", str(request.directory)]
+        fields = [request.token, str(request.stdout), str(request.stderr), *arguments]
+        return "\t".join(fields) + "\n"
+
     def execution(self, cwd: Path, file: str, arguments: list[str]) -> Command:
         assert self.config
         limit = jvm_memory_limit(self.config)
+        if archive := get_archive(self.config.dodona.judge, "kotlin"):
+            # The archive has the standard library, so the JVM is started directly.
+            return [
+                "java",
+                f"-Xmx{limit}",
+                *archive.java_options(),
+                "-cp",
+                archive.class_path(),
+                Path(file).stem,
+                *arguments,
+            ]
         return [
             get_executable("kotlin"),
             f"-J-Xmx{limit}",
@@ -339,6 +339,13 @@ class {pu.unit.name}: AutoCloseable {{
             result += indent * 2 + "try {\n"
             if tc.testcase.is_main_testcase():
                 assert isinstance(tc.input, MainInput)
+                if ctx.stdin is not None:
+                    # Escape the dollar sign to prevent string templates.
+                    stdin = json.dumps(ctx.stdin).replace("$", "\\$")
+                    result += (
+                        indent * 3
+                        + f"System.setIn(java.io.ByteArrayInputStream({stdin}.toByteArray()))\n"
+                    )
                 wrapped = [json.dumps(a) for a in tc.input.arguments]
                 result += indent * 3 + f"solutionMain(arrayOf({', '.join(wrapped)}))\n"
             else:
@@ -12,6 +12,8 @@ from collections.abc import Callable
 from pathlib import Path
 from typing import TYPE_CHECKING, NotRequired, Optional, TypedDict
 
+from attrs import define
+
 from tested.datatypes import AllTypes, ExpressionTypes
 from tested.dodona import AnnotateCode, Message, Status
 from tested.features import Construct, TypeSupport
@@ -51,6 +53,30 @@ class TypeDeclarationMetadata(TypedDict):
     exception: NotRequired[str]
 
 
+@define
+class ServerRequest:
+    """
+    A request to an execution server to execute a unit (see
+    `Language.execution_server`), or to a compilation server to compile code (see
+    `Language.compilation_server`). All paths are absolute.
+    """
+
+    token: str
+    "The token the server must write to its stdout with the exit code when done."
+    directory: Path
+    "The directory in which the unit is executed."
+    file: str
+    "The file to execute, as for `Language.execution`, or the compiler."
+    arguments: list[str]
+    "The arguments for the execution or the compiler."
+    stdin: Path
+    "The file from which the stdin of the unit must be read."
+    stdout: Path
+    "The file to which the stdout of the unit must be written."
+    stderr: Path
+    "The file to which the stderr of the unit must be written."
+
+
 class Language(ABC):
     """
     Abstract base class for a programming language.
@@ -164,6 +190,87 @@ class Language(ABC):
         """
         raise NotImplementedError
 
+    def execution_server(
+        self, directory: Path, token: str
+    ) -> tuple[Command, str] | None:
+        """
+        Callback for starting an execution server: a process that is kept running
+        during the judgement and executes the units that were compiled in the given
+        directory, instead of starting a new process for each unit. The server is
+        only used if the `execution_server` option is enabled.
+
+        The server is started in the given directory and receives the returned text
+        on its stdin. Once it is ready to execute units, it must write a line with
+        the token and 0, separated by a space, to its stdout. After that, it
+        receives requests to execute units (see `server_request`), one at a time.
+
+        By default, no server is used.
+
+        :param directory: The directory with the compiled units.
+        :param token: The token the server must write to its stdout when ready.
+
+        :return: The command to start the server and the text to send to it, or
+                 None if the language has no execution server.
+        """
+        return None
+
+    def server_request(self, request: ServerRequest) -> str:
+        """
+        Callback for the text that is sent to an execution server (see
+        `execution_server`) to execute a unit.
+
+        The server must execute the unit with the standard streams redirected to
+        the files of the request. When the unit is done, it must write a line with
+        the token of the request and the exit code of the unit, separated by a
+        space, to its own stdout.
+
+        :param request: The unit to execute.
+
+        :return: The text to write to the stdin of the server.
+        """
+        raise NotImplementedError
+
+    def compilation_server(
+        self, directory: Path, token: str
+    ) -> tuple[Command, str] | None:
+        """
+        Callback for starting a compilation server: a process that is kept running
+        during the judgement and compiles the code, instead of starting the
+        compiler for each compilation. The server is only used if the
+        `compilation_server` option is enabled.
+
+        The server is started in the given directory, at the start of the
+        judgement, and it must signal that it is ready in the same way as an
+        execution server (see `execution_server`). If it is not ready or stops,
+        the code is compiled with the command from `compilation`.
+
+        By default, no server is used.
+
+        :param directory: The directory in which the server runs.
+        :param token: The token the server must write to its stdout when ready.
+
+        :return: The command to start the server and the text to send to it, or
+                 None if the language has no compilation server.
+        """
+        return None
+
+    def compilation_request(self, request: ServerRequest) -> str:
+        """
+        Callback for the text that is sent to a compilation server (see
+        `compilation_server`) to run a compilation.
+
+        The file and arguments of the request are the command from `compilation`.
+        The server must run the compilation in the directory of the request, with
+        the output of the compiler written to the files of the request. When the
+        compilation is done, it must write a line with the token of the request
+        and the exit code of the compiler, separated by a space, to its stdout.
+
+        :param request: The compilation to run.
+
+        :return: The text to write to the stdin of the server.
+        """
+        raise NotImplementedError
+
     def get_string_quote(self) -> str:
         """
         :return: The quote symbol used to quote strings.
@@ -244,6 +351,25 @@ class Language(ABC):
         """
         raise NotImplementedError
 
+    def startup_cost(self) -> float:
+        """
+        An estimate of the time it takes to start an execution unit, in seconds.
+        This is used by the planner to decide if it is worth splitting the test
+        suite into more execution units (see `PlanStrategy.BALANCED`).
+
+        :return: The estimated startup time of an execution.
+        """
+        return 0.05
+
+    def compiler_memory(self) -> int:
+        """
+        An estimate of the memory a compilation needs, in bytes. This limits how
+        many compilations are run at the same time.
+
+        :return: The estimated memory usage of the compiler.
+        """
+        return 256 * 1024 * 1024
+
     def supports_debug_information(self) -> bool:
         """
         If the language supports Dodona debug information for the Python tutor.
@@ -251,6 +377,29 @@ class Language(ABC):
         """
         return False
 
+    def supports_exit_interception(self) -> bool:
+        """
+        If the generated execution units can intercept the exit calls of the
+        submission and write the exit code of each context to the exit file (see
+        `PreparedExecutionUnit.exit_file`), one line per context. If the exercise
+        enables this, contexts after a context that checks the exit code are
+        executed in the same execution unit.
+
+        :return: True if yes, false otherwise.
+        """
+        return False
+
+    def supports_virtual_stdin(self) -> bool:
+        """
+        If the generated execution units provide the stdin of each context
+        themselves (see `PreparedContext.stdin`), instead of reading the stdin of
+        the process. This allows executing multiple contexts with stdin in one
+        execution unit.
+
+        :return: True if yes, false otherwise.
+        """
+        return False
+
     def supported_constructs(self) -> set[Construct]:
         """
         Callback to get the supported constructs for a language. By default, no
@@ -473,3 +622,11 @@ class Language(ABC):
         Check if a function with a name returns nothing.
         """
         return False
+
+    def generation_uses_submission(self) -> bool:
+        """
+        Check if the generated code depends on the submission, for example through
+        `is_void_method`. The generated code is then only reused for the same
+        submission.
+        """
+        return False
@@ -0,0 +1,117 @@
+"""
+Memoization of the code generation.
+
+The same expressions often occur many times in a test suite, and the code for
+them is generated for the harness, the readable input and the readable expected
+values. The memos in this module keep the generated code for recent expressions,
+keyed by the structure of the expression, so the code generation scales with the
+number of unique expressions instead of the total number.
+
+The memos are bounded and count their hits and misses; see `memo_statistics`.
+"""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Generic, TypeVar
+
+import attrs
+from attrs import define, field
+
+from tested.languages.conventionalize import apply_convention
+from tested.serialisation import Identifier
+
+T = TypeVar("T")
+
+
+def structural_key(node: Any) -> Hashable:
+    """
+    Compute a hashable key for a node of the test suite, such that two nodes have
+    the same key if and only if they have the same structure.
+
+    :param node: An expression, statement or any part of it.
+    :return: A key that can be used in a dictionary.
+    """
+    if isinstance(node, Identifier):
+        # An identifier is also a string, but it has an additional attribute.
+        return Identifier, str(node), node.is_raw
+    if attrs.has(type(node)):
+        return type(node), *(
+            structural_key(getattr(node, a.name)) for a in attrs.fields(type(node))
+        )
+    if isinstance(node, (list, tuple)):
+        return tuple(structural_key(x) for x in node)
+    if isinstance(node, (str, bool, int, float, Decimal, Enum)) or node is None:
+        # The type is included, as e.g. 1, 1.0 and True are equal in Python.
+        return type(node), node
+    raise TypeError(f"Cannot compute a structural key for {node!r}")
+
+
+@define
+class MemoStatistics:
+    hits: int
+    misses: int
+    size: int
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+@define
+class Memo(Generic[T]):
+    """
+    A bounded memo, which removes the least recently used entries.
+    """
+
+    max_size: int
+    hits: int = field(default=0, init=False)
+    misses: int = field(default=0, init=False)
+    _entries: OrderedDict[Hashable, T] = field(factory=OrderedDict, init=False)
+    _lock: threading.Lock = field(factory=threading.Lock, init=False)
+
+    def get(self, key: Hashable, compute: Callable[[], T]) -> T:
+        """
+        Get the value for a key, computing and storing it if it is not present.
+        """
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return value
+
+    def statistics(self) -> MemoStatistics:
+        with self._lock:
+            return MemoStatistics(self.hits, self.misses, len(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# The generated code of statements, keyed by the language, the namespace, the
+# options of the language and the statement.
+statement_memo: Memo[str] = Memo(max_size=4096)
+
+
+def memo_statistics() -> dict[str, MemoStatistics]:
+    """
+    Get the statistics of all memos of the code generation.
+    """
+    names = apply_convention.cache_info()
+    return {
+        "statements": statement_memo.statistics(),
+        "names": MemoStatistics(names.hits, names.misses, names.currsize),
+    }
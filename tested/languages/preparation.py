@@ -162,6 +162,12 @@ class PreparedContext:
     "The code to execute before the context."
     after: str
     "The code to execute after the context."
+    stdin: str | None = None
+    """
+    The stdin for the main testcase, which the execution unit must provide itself.
+    This is only used if the execution units provide the stdin of the contexts (see
+    `Bundle.virtual_stdin`).
+    """
 
 
 @define
@@ -178,6 +184,9 @@ class PreparedExecutionUnit:
     value_file: str
     # The name of the file for the exception channel.
     exception_file: str
+    # The name of the file for the exit code channel, if the exit calls of the
+    # submission are intercepted.
+    exit_file: str | None
     # The name of the submission file.
     submission_name: str
     # The secret context separator.
@@ -494,9 +503,17 @@ def prepare_context(
         resources
     )
     testcases, evaluator_names = prepare_testcases(bundle, context)
+    if bundle.virtual_stdin and context.has_main_testcase():
+        stdin = context.get_stdin(resources) or None
+    else:
+        stdin = None
     return (
         PreparedContext(
-            before=before_code, after=after_code, testcases=testcases, context=context
+            before=before_code,
+            after=after_code,
+            testcases=testcases,
+            context=context,
+            stdin=stdin,
         ),
         evaluator_names,
     )
@@ -528,6 +545,20 @@ def exception_file(bundle: Bundle, directory: Path):
     return directory / f"{bundle.testcase_separator_secret}_exceptions.txt"
 
 
+def exit_file(bundle: Bundle, directory: Path):
+    """
+    Return the path to the exit code file. The file will be placed inside the given
+    working directory. This file is only used if the exit calls of the submission
+    are intercepted (see `Bundle.exit_interception`).
+
+    :param bundle: The configuration bundle.
+    :param directory: The directory in which to place the file.
+
+    :return: The path to the file, depending on the working directory.
+    """
+    return directory / f"{bundle.testcase_separator_secret}_exit.txt"
+
+
 def prepare_execution_unit(
     bundle: Bundle,
     destination: Path,
@@ -552,11 +583,16 @@ def prepare_execution_unit(
 
     value_file_name = value_file(bundle, destination).name
     exception_file_name = exception_file(bundle, destination).name
+    if bundle.exit_interception:
+        exit_file_name = exit_file(bundle, destination).name
+    else:
+        exit_file_name = None
     submission = submission_name(bundle.language)
 
     return PreparedExecutionUnit(
         value_file=value_file_name,
         exception_file=exception_file_name,
+        exit_file=exit_file_name,
         submission_name=submission,
         testcase_separator_secret=bundle.testcase_separator_secret,
         context_separator_secret=bundle.context_separator_secret,
@@ -0,0 +1,49 @@
+"""
+Compile the Python files in the current directory and pack the bytecode in a
+single zip file, which the units are executed from (see the "bytecodeBundle"
+option of the Python configuration).
+
+    python bundle.py <bundle>
+
+The files are compiled in the same way as with `python -m compileall -q -b .`, so
+compilation errors are reported in the same way. The bundle is executed with the
+name of the unit as first argument:
+
+    python <bundle> <unit> <arguments>
+
+This script is run with the Python of the units, so it only uses the standard
+library.
+"""
+
+import compileall
+import sys
+import zipfile
+from pathlib import Path
+
+# Runs the unit as the main module, like "python <unit>.pyc" would.
+_MAIN = """\
+import os
+import runpy
+import sys
+
+unit = sys.argv.pop(1)
+# Other modules can still be imported from the directory of the bundle.
+sys.path.insert(1, os.path.dirname(sys.path[0]))
+runpy.run_module(unit, run_name="__main__", alter_sys=True)
+"""
+
+
+def main():
+    bundle = Path(sys.argv[1])
+    if not compileall.compile_dir(".", quiet=1, legacy=True):
+        sys.exit(1)
+    temporary = bundle.with_name(f"{bundle.name}.tmp")
+    with zipfile.ZipFile(temporary, "w", zipfile.ZIP_STORED) as archive:
+        archive.writestr("__main__.py", _MAIN)
+        for compiled in sorted(Path(".").glob("*.pyc")):
+            archive.write(compiled, compiled.name)
+    temporary.replace(bundle)
+
+
+if __name__ == "__main__":
+    main()
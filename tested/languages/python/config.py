@@ -10,7 +10,7 @@ from tested.datatypes import (
     BasicSequenceTypes,
     ExpressionTypes,
 )
-from tested.dodona import AnnotateCode, Message, Severity
+from tested.dodona import AnnotateCode, Message, Severity, Status
 from tested.features import Construct, TypeSupport
 from tested.languages.conventionalize import (
     Conventionable,
@@ -31,6 +31,10 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
+# The bytecode bundle of the units (see `bundle.py`).
+_BUNDLE = "tested.pyz"
+
+
 def _executable():
     if os.name == "nt":
         return "python"
@@ -48,6 +52,12 @@ class Python(Language):
     def supports_debug_information(self) -> bool:
         return True
 
+    def supports_virtual_stdin(self) -> bool:
+        return True
+
+    def supports_exit_interception(self) -> bool:
+        return True
+
     def file_extension(self) -> str:
         return "py"
 
@@ -123,6 +133,13 @@ class Python(Language):
         }
 
     def compilation(self, files: list[str]) -> CallbackResult:
+        if self._bytecode_bundle():
+            script = Path(__file__).parent / "bundle.py"
+            others = [x for x in files if not x.endswith(".py")]
+            return [_executable(), "-W", "ignore", str(script), _BUNDLE], [
+                _BUNDLE,
+                *others,
+            ]
         result = [x.replace(".py", ".pyc") for x in files]
         return [
             _executable(),
@@ -136,8 +153,16 @@ class Python(Language):
         ], result
 
     def execution(self, cwd: Path, file: str, arguments: list[str]) -> Command:
+        if file == _BUNDLE:
+            # Each unit is executed in a directory with the name of the unit.
+            return [_executable(), "-u", file, cwd.name, *arguments]
         return [_executable(), "-u", file, *arguments]
 
+    def find_main_file(self, files: list[Path], name: str) -> Path | Status:
+        if bundles := [x for x in files if x.name == _BUNDLE]:
+            return bundles[0]
+        return super().find_main_file(files, name)
+
     def compiler_output(
         self, stdout: str, stderr: str
     ) -> tuple[list[Message], list[AnnotateCode], str, str]:
@@ -230,7 +255,27 @@ class Python(Language):
     def generate_execution_unit(self, execution_unit: "PreparedExecutionUnit") -> str:
         from tested.languages.python import generators
 
-        return generators.convert_execution_unit(execution_unit)
+        return generators.convert_execution_unit(execution_unit, self._fork_contexts())
+
+    def _bytecode_bundle(self) -> bool:
+        """
+        Check if the bytecode of all files is packed in a single zip file, which
+        is executed for each unit (see `bundle.py`). This is enabled with the
+        "bytecodeBundle" language option.
+        """
+        if not self.config:
+            return False
+        return bool(self.config.dodona.config_for().get("bytecodeBundle", False))
+
+    def _fork_contexts(self) -> bool:
+        """
+        Check if the contexts should run in forked processes, which can be enabled
+        with the "forkContexts" language option. This needs `os.fork`, so it is
+        not available on all platforms.
+        """
+        if not self.config or not hasattr(os, "fork"):
+            return False
+        return bool(self.config.dodona.config_for().get("forkContexts", False))
 
     def generate_encoder(self, values: list[Value]) -> str:
         from tested.languages.python import generators
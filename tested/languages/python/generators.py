@@ -142,11 +142,26 @@ def convert_statement(statement: Statement, with_namespace=False) -> str:
     raise AssertionError(f"Unknown statement: {statement!r}")
 
 
-def convert_execution_unit(pu: PreparedExecutionUnit) -> str:
+def convert_execution_unit(pu: PreparedExecutionUnit, fork: bool = False) -> str:
+    """
+    Generate the harness for an execution unit.
+
+    By default, the contexts are run one after the other in the same process, and
+    the submission is reloaded for each context. In fork mode, the submission is
+    imported once and each context is run in a forked child process, which gives
+    each context a pristine copy of the state of all modules.
+
+    :param pu: The prepared execution unit.
+    :param fork: If the contexts should be run in forked child processes.
+    """
     result = """
 import values
+import io
+import os
 import sys
 import importlib
+import tempfile
+import traceback
 from decimal import Decimal
 import builtins
 """
@@ -188,6 +203,22 @@ def write_context_separator():
     value_file.flush()
     exception_file.flush()
 
+def get_exit_code(e):
+    if e.code is None:
+        return 0
+    if isinstance(e.code, int):
+        return e.code
+    # Like the interpreter, print other values and use 1 as the exit code.
+    print(e.code, file=sys.stderr)
+    return 1
+
+def set_stdin(data):
+    with tempfile.TemporaryFile() as stdin_file:
+        stdin_file.write(data.encode("utf-8"))
+        stdin_file.seek(0)
+        os.dup2(stdin_file.fileno(), 0)
+    sys.stdin = open(0, "r", encoding="utf-8", closefd=False)
+
 def send_value(value):
     values.send_value(value_file, value)
 
@@ -201,6 +232,15 @@ def send_specific_exception(exception):
     values.send_evaluated(exception_file, exception)
 """
 
+    if pu.exit_file is not None:
+        result += f"""
+exit_file = open("{pu.exit_file}", "w")
+
+def write_exit_code(code):
+    exit_file.write(f"{{code}}\\n")
+    exit_file.flush()
+"""
+
     # Generate code for each context.
     ctx: PreparedContext
     for i, ctx in enumerate(pu.contexts):
@@ -208,57 +248,156 @@ def send_specific_exception(exception):
         result += f"def {pu.unit.name}_context_{i}():\n"
         result += indent + ctx.before + "\n"
 
+        # If the exit calls are intercepted, an exit call ends the testcases of the
+        # context, like it would end the program, but the after code still runs.
+        if pu.exit_file is not None:
+            result += indent + "try:\n"
+            inner = indent * 2
+        else:
+            inner = indent
+
         if not ctx.context.has_main_testcase():
-            result += indent + "write_separator()\n"
-            result += indent + f"import {pu.submission_name}\n"
-            if i != 0:
+            result += inner + "write_separator()\n"
+            if fork:
+                result += inner + "replay_submission_output()\n"
+            result += inner + f"import {pu.submission_name}\n"
+            if i != 0 and not fork:
                 result += (
-                    f'{indent}importlib.reload(sys.modules["{pu.submission_name}"])\n'
+                    f'{inner}importlib.reload(sys.modules["{pu.submission_name}"])\n'
                 )
 
         tc: PreparedTestcase
         for j, tc in enumerate(ctx.testcases):
             # Prepare command arguments if needed.
             if tc.testcase.is_main_testcase():
-                result += indent + "write_separator()\n"
+                result += inner + "write_separator()\n"
                 assert isinstance(tc.input, MainInput)
-                result += indent + "new_args = [sys.argv[0]]\n"
+                result += inner + "new_args = [sys.argv[0]]\n"
                 wrapped = [json.dumps(a) for a in tc.input.arguments]
-                result += f"{indent}new_args.extend([{', '.join(wrapped)}])\n"
-                result += indent + "sys.argv = new_args\n"
+                result += f"{inner}new_args.extend([{', '.join(wrapped)}])\n"
+                result += inner + "sys.argv = new_args\n"
+                if ctx.stdin is not None:
+                    result += f"{inner}set_stdin({ctx.stdin!r})\n"
             elif j != 0:
-                result += indent + "write_separator()\n"
+                result += inner + "write_separator()\n"
 
-            result += indent + "try:\n"
+            result += inner + "try:\n"
             if tc.testcase.is_main_testcase():
                 assert isinstance(tc.input, MainInput)
-                result += f"{indent*2}import {pu.submission_name}\n"
-                if i != 0:
-                    result += f'{indent*2}importlib.reload(sys.modules["{pu.submission_name}"])\n'
+                if fork:
+                    # The submission might have been imported before forking.
+                    result += f'{inner}{indent}sys.modules.pop("{pu.submission_name}", None)\n'
+                result += f"{inner}{indent}import {pu.submission_name}\n"
+                if i != 0 and not fork:
+                    result += f'{inner}{indent}importlib.reload(sys.modules["{pu.submission_name}"])\n'
             else:
                 assert isinstance(tc.input, PreparedTestcaseStatement)
                 result += (
-                    indent * 2
+                    inner
+                    + indent
                     + convert_statement(tc.input.input_statement(), True)
                     + "\n"
                 )
 
-            result += indent + "except Exception as e:\n"
-            result += indent * 2 + convert_statement(tc.exception_statement("e")) + "\n"
+            result += inner + "except Exception as e:\n"
+            result += (
+                inner + indent + convert_statement(tc.exception_statement("e")) + "\n"
+            )
+            result += inner + "else:\n"
+            result += (
+                inner + indent + convert_statement(tc.exception_statement()) + "\n"
+            )
+
+        if pu.exit_file is not None:
+            result += indent + "except SystemExit as e:\n"
+            result += indent * 2 + "exit_code = get_exit_code(e)\n"
             result += indent + "else:\n"
-            result += indent * 2 + convert_statement(tc.exception_statement()) + "\n"
-
-        result += indent + ctx.after + "\n"
+            result += indent * 2 + "exit_code = 0\n"
+            result += indent + ctx.after + "\n"
+            result += indent + "return exit_code\n"
+        else:
+            result += indent + ctx.after + "\n"
 
+    if fork:
+        result += _fork_functions(pu)
     for i, ctx in enumerate(pu.contexts):
         result += "write_context_separator()\n"
-        result += f"{pu.unit.name}_context_{i}()\n"
+        if fork and pu.exit_file is not None:
+            result += f"write_exit_code(run_forked({pu.unit.name}_context_{i}))\n"
+        elif fork:
+            result += f"exit_code = run_forked({pu.unit.name}_context_{i})\n"
+        elif pu.exit_file is not None:
+            result += f"write_exit_code({pu.unit.name}_context_{i}())\n"
+        else:
+            result += f"{pu.unit.name}_context_{i}()\n"
 
     result += """
 value_file.close()
 exception_file.close()
 """
+    if pu.exit_file is not None:
+        result += "exit_file.close()\n"
+    elif fork and pu.contexts:
+        # Like without forking, the exit code is the one of the last context.
+        result += "sys.exit(exit_code)\n"
+
+    return result
+
 
+def _fork_functions(pu: PreparedExecutionUnit) -> str:
+    # The submission is only imported up front if a context needs it, and if no
+    # context has code that should run before the import.
+    preload = any(
+        not ctx.context.has_main_testcase() for ctx in pu.contexts
+    ) and not any(ctx.before.strip() for ctx in pu.contexts)
+    result = f"""
+submission_output = None
+
+def import_submission():
+    # Import the submission once, before forking. The output of the import is
+    # replayed in each context, as if the submission was imported there.
+    global submission_output
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout, sys.stderr = io.StringIO(), io.StringIO()
+    try:
+        import {pu.submission_name}
+        submission_output = (sys.stdout.getvalue(), sys.stderr.getvalue())
+    except BaseException:
+        # Each context imports the submission itself, reporting the error.
+        sys.modules.pop("{pu.submission_name}", None)
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
+
+def replay_submission_output():
+    if submission_output is not None:
+        sys.stdout.write(submission_output[0])
+        sys.stderr.write(submission_output[1])
+
+def run_forked(context):
+    # Run the context in a child process, which exits with the exit code of the
+    # context.
+    pid = os.fork()
+    if pid == 0:
+        status = 0
+        try:
+            status = context() or 0
+        except SystemExit as e:
+            status = get_exit_code(e)
+        except BaseException:
+            traceback.print_exc()
+            status = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            value_file.flush()
+            exception_file.flush()
+            os._exit(status)
+    _, status = os.waitpid(pid, 0)
+    return os.waitstatus_to_exitcode(status)
+
+"""
+    if preload:
+        result += "import_submission()\n"
     return result
 
 
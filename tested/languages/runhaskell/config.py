@@ -1,11 +1,20 @@
+import json
 from pathlib import Path
 
-from tested.languages.conventionalize import submission_file
+from tested.languages.conventionalize import selector_name, submission_file
 from tested.languages.haskell.config import Haskell
-from tested.languages.language import CallbackResult, Command
+from tested.languages.language import CallbackResult, Command, ServerRequest
+
+
+def _string(value: str | Path) -> str:
+    # JSON strings are valid Haskell strings if they only contain ASCII.
+    return json.dumps(str(value))
 
 
 class RunHaskell(Haskell):
+    def initial_dependencies(self) -> list[str]:
+        return super().initial_dependencies() + ["GhciRunner.hs"]
+
     def compilation(self, files: list[str]) -> CallbackResult:
         submission = submission_file(self)
         main_file = list(filter(lambda x: x == submission, files))
@@ -17,6 +26,47 @@ class RunHaskell(Haskell):
     def execution(self, cwd: Path, file: str, arguments: list[str]) -> Command:
         return ["runhaskell", file, *arguments]
 
+    def execution_server(
+        self, directory: Path, token: str
+    ) -> tuple[Command, str] | None:
+        # Load the selector once; "+r" discards the evaluated top-level values of
+        # the loaded modules after each unit, so the units do not share state.
+        selector = selector_name(self)
+        setup = f"""
+:set +r
+:set prompt ""
+:set prompt-cont ""
+import qualified GhciRunner
+import qualified {selector}
+{selector}.main `seq` putStrLn {_string(f"{token} 0")}
+"""
+        return [
+            "ghci",
+            "-v0",
+            "-ignore-dot-ghci",
+            "GhciRunner.hs",
+            self.with_extension(selector),
+        ], setup
+
+    def server_request(self, request: ServerRequest) -> str:
+        arguments = ", ".join(_string(a) for a in request.arguments)
+        return (
+            " ".join(
+                [
+                    "GhciRunner.runUnit",
+                    _string(request.token),
+                    _string(request.directory),
+                    _string(request.file),
+                    f"[{arguments}]",
+                    _string(request.stdin),
+                    _string(request.stdout),
+                    _string(request.stderr),
+                    f"{Path(request.file).stem}.main",
+                ]
+            )
+            + "\n"
+        )
+
     def filter_dependencies(self, files: list[Path], context_name: str) -> list[Path]:
         return files
 
@@ -28,6 +78,8 @@ class RunHaskell(Haskell):
         :return: A list of template folders.
         """
         assert self.config
+        languages = self.config.dodona.judge / "tested" / "languages"
         return [
-            self.config.dodona.judge / "tested" / "languages" / "haskell" / "templates"
+            languages / "haskell" / "templates",
+            languages / "runhaskell" / "templates",
         ]
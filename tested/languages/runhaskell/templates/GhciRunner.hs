@@ -0,0 +1,37 @@
+module GhciRunner where
+
+import Control.Exception (SomeException, displayException, fromException, try)
+import GHC.IO.Handle (hDuplicate, hDuplicateTo)
+import System.Directory (getCurrentDirectory, setCurrentDirectory)
+import System.Environment (withArgs, withProgName)
+import System.Exit (ExitCode (..))
+import System.IO
+
+-- Run the main function of a unit in GHCi, as if it was run by runhaskell.
+-- The standard streams are redirected to the given files while the unit runs.
+-- Afterwards, the token and the exit code are written to the original stdout.
+runUnit :: String -> FilePath -> String -> [String] -> FilePath -> FilePath -> FilePath -> IO () -> IO ()
+runUnit token directory name arguments input output errors unit = do
+    hFlush stdout
+    hFlush stderr
+    original <- getCurrentDirectory
+    saved <- mapM hDuplicate [stdin, stdout, stderr]
+    files <- sequence [openFile input ReadMode, openFile output WriteMode, openFile errors WriteMode]
+    sequence_ (zipWith hDuplicateTo files [stdin, stdout, stderr])
+    setCurrentDirectory directory
+    result <- try (withProgName name (withArgs arguments unit))
+    code <- case result of
+        Right () -> return 0
+        Left e -> case fromException e of
+            Just ExitSuccess -> return 0
+            Just (ExitFailure n) -> return n
+            Nothing -> do
+                hPutStrLn stderr (name ++ ": " ++ displayException (e :: SomeException))
+                return 1
+    hFlush stdout
+    hFlush stderr
+    setCurrentDirectory original
+    sequence_ (zipWith hDuplicateTo saved [stdin, stdout, stderr])
+    mapM_ hClose (saved ++ files)
+    putStrLn (token ++ " " ++ show code)
+    hFlush stdout
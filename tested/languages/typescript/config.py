@@ -2,6 +2,7 @@ import json
 import logging
 import os
 import re
+import tempfile
 from pathlib import Path
 from typing import TYPE_CHECKING
 
@@ -23,7 +24,9 @@ from tested.languages.conventionalize import (
 from tested.languages.language import (
     CallbackResult,
     Command,
+    FileFilter,
     Language,
+    ServerRequest,
     TypeDeclarationMetadata,
 )
 from tested.languages.utils import cleanup_description
@@ -130,12 +133,60 @@ class TypeScript(Language):
                     f"{path_to_modules}/@types",
                     str(main_file.name),
                 ],
-                files,
+                self._with_transpiled(files),
             )
         else:
             return [], files
 
+    def _with_transpiled(self, files: list[str]) -> list[str] | FileFilter:
+        """
+        The results of the compilation: the files, and the JavaScript that the
+        compilation server emits next to them, if it is used.
+        """
+        assert self.config
+        if not self.config.options.compilation_server:
+            return files
+        names = {Path(x).name for x in files}
+
+        def file_filter(file: Path) -> bool:
+            return file.name in names or (
+                file.suffix == ".js" and file.with_suffix(".ts").name in names
+            )
+
+        return file_filter
+
+    def compilation_server(
+        self, directory: Path, token: str
+    ) -> tuple[Command, str] | None:
+        assert self.config
+        if cache := self.config.options.cache:
+            transpiled = Path(self.config.dodona.resources, cache, "typescript")
+        else:
+            transpiled = Path(tempfile.gettempdir(), "tested-typescript")
+        helper = Path(__file__).parent / "helper.ts"
+        setup = {"token": token, "cache": str(transpiled.absolute())}
+        return ["tsx", str(helper)], json.dumps(setup) + "\n"
+
+    def compilation_request(self, request: ServerRequest) -> str:
+        return (
+            json.dumps(
+                {
+                    "token": request.token,
+                    "directory": str(request.directory),
+                    "stdout": str(request.stdout),
+                    "stderr": str(request.stderr),
+                    "command": [request.file, *request.arguments],
+                }
+            )
+            + "\n"
+        )
+
     def execution(self, cwd: Path, file: str, arguments: list[str]) -> Command:
+        # Run the JavaScript from the compilation server if there is any, instead
+        # of transpiling the unit again.
+        transpiled = Path(file).with_suffix(".js")
+        if (cwd / transpiled).is_file():
+            return ["node", "--enable-source-maps", str(transpiled), *arguments]
         return ["tsx", file, *arguments]
 
     def modify_solution(self, solution: Path):
@@ -145,12 +196,20 @@ class TypeScript(Language):
         assert self.config
 
         parse_file = str(Path(__file__).parent / "parseAst.ts")
-        output = run_command(
-            solution.parent,
-            timeout=None,
-            command=["tsx", parse_file, str(solution.absolute())],
-            check=True,
-        )
+        command = ["tsx", parse_file, str(solution.absolute())]
+        output = None
+        if self.config.compilers is not None:
+            # Ask the running compilation server instead of starting tsx.
+            output = self.config.compilers.compile(
+                self.config.dodona.workdir,
+                solution.parent,
+                command,
+                float(self.config.dodona.time_limit),
+            )
+        if output is None or output.exit != 0:
+            output = run_command(
+                solution.parent, timeout=None, command=command, check=True
+            )
         assert output, "Missing output from TypesScript's modify_solution"
         namings = output.stdout.strip()
         with open(solution, "a") as file:
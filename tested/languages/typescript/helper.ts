@@ -0,0 +1,170 @@
+/*
+ * A TypeScript helper that is kept running during a judgement, as the compilation
+ * server of the TypeScript configuration.
+ *
+ * The first line on stdin is the set-up: a JSON object with the token to write
+ * back with exit code 0 when ready, and the directory of the transpile cache.
+ * Each following line is a JSON request with a token, a directory, the files for
+ * the stdout and stderr, and the command that would be run otherwise:
+ *
+ * - tsc with its arguments: type-check the files with a language service, which
+ *   keeps the files that did not change (such as the type declarations) between
+ *   requests. The transpiled JavaScript of the files in the directory is written
+ *   next to them, so the units can be executed with node.
+ * - tsx parseAst.ts with a file: write the names that are declared at the top
+ *   level of the file.
+ *
+ * When a request is done, the token and the exit code are written to stdout.
+ */
+import * as crypto from 'crypto';
+import * as fs from 'fs';
+import * as path from 'path';
+import * as readline from 'readline';
+import * as ts from 'typescript';
+import { topLevelNames } from './parseAst.ts';
+
+interface Request {
+    token: string;
+    directory: string;
+    stdout: string;
+    stderr: string;
+    command: Array<string>;
+}
+
+// The options for the transpiled JavaScript, which is executed with node.
+const transpileOptions: ts.CompilerOptions = {
+    module: ts.ModuleKind.CommonJS,
+    target: ts.ScriptTarget.ES2022,
+    esModuleInterop: true,
+    inlineSourceMap: true,
+};
+
+let cacheDirectory = '';
+let currentDirectory = process.cwd();
+let rootFiles: Array<string> = [];
+let options: ts.CompilerOptions = {};
+
+const host: ts.LanguageServiceHost = {
+    getScriptFileNames: () => rootFiles,
+    getScriptVersion: (file) => {
+        try {
+            const stat = fs.statSync(file);
+            return `${stat.mtimeMs}:${stat.size}`;
+        } catch {
+            return '0';
+        }
+    },
+    getScriptSnapshot: (file) => {
+        if (!fs.existsSync(file)) {
+            return undefined;
+        }
+        return ts.ScriptSnapshot.fromString(fs.readFileSync(file, 'utf-8'));
+    },
+    getCurrentDirectory: () => currentDirectory,
+    getCompilationSettings: () => options,
+    getDefaultLibFileName: (o) => ts.getDefaultLibFilePath(o),
+    fileExists: ts.sys.fileExists,
+    readFile: ts.sys.readFile,
+    readDirectory: ts.sys.readDirectory,
+    directoryExists: ts.sys.directoryExists,
+    getDirectories: ts.sys.getDirectories,
+};
+const service = ts.createLanguageService(host, ts.createDocumentRegistry());
+
+// The imports of other TypeScript files must load the transpiled files instead.
+function rewriteImports(code: string): string {
+    return code.replace(
+        /((?:require(?:\.resolve)?|import)\(\s*|from\s+)(["'])(\.{1,2}\/[^"'\n]*)\.ts\2/g,
+        '$1$2$3.js$2'
+    );
+}
+
+// Transpile a file to JavaScript, in a cache that is keyed by the contents.
+function transpile(file: string, source: string): string {
+    const key = crypto.createHash('sha256')
+        .update(ts.version).update('\0')
+        .update(path.basename(file)).update('\0')
+        .update(source)
+        .digest('hex');
+    const cached = path.join(cacheDirectory, `${key}.js`);
+    if (!fs.existsSync(cached)) {
+        const output = ts.transpileModule(source, {
+            compilerOptions: transpileOptions,
+            fileName: path.basename(file),
+        });
+        const temporary = `${cached}.${process.pid}.tmp`;
+        fs.writeFileSync(temporary, rewriteImports(output.outputText));
+        fs.renameSync(temporary, cached);
+    }
+    return cached;
+}
+
+function check(request: Request): number {
+    const parsed = ts.parseCommandLine(request.command.slice(1));
+    currentDirectory = request.directory;
+    options = parsed.options;
+    rootFiles = parsed.fileNames.map(file => path.resolve(request.directory, file));
+
+    const program = service.getProgram()!;
+    const diagnostics = [...parsed.errors, ...ts.getPreEmitDiagnostics(program)];
+    fs.writeFileSync(request.stdout, ts.formatDiagnostics(diagnostics, {
+        getCanonicalFileName: (file) => file,
+        getCurrentDirectory: () => request.directory,
+        getNewLine: () => ts.sys.newLine,
+    }));
+
+    for (const sourceFile of program.getSourceFiles()) {
+        const file = path.resolve(sourceFile.fileName);
+        if (sourceFile.isDeclarationFile || path.dirname(file) !== request.directory) {
+            continue;
+        }
+        const javascript = file.replace(/\.ts$/, '.js');
+        fs.copyFileSync(transpile(file, sourceFile.text), javascript);
+    }
+
+    const failed = diagnostics.some(d => d.category === ts.DiagnosticCategory.Error);
+    return failed ? 1 : 0;
+}
+
+function parseAst(request: Request): number {
+    const file = request.command[2];
+    try {
+        const names = topLevelNames(file, fs.readFileSync(file, 'utf-8'));
+        fs.writeFileSync(request.stdout, names.join(', ') + '\n');
+    } catch (e) {
+        // Assume this is invalid TypeScript at this point.
+        fs.writeFileSync(request.stderr, String(e));
+    }
+    return 0;
+}
+
+function handle(request: Request): number {
+    try {
+        if (request.command[0] === 'tsc') {
+            return check(request);
+        }
+        if (path.basename(request.command[1] ?? '') === 'parseAst.ts') {
+            return parseAst(request);
+        }
+        fs.writeFileSync(request.stderr, `Unsupported command ${request.command}`);
+    } catch (e) {
+        fs.writeFileSync(request.stderr, e instanceof Error ? `${e.stack}` : String(e));
+    }
+    return 1;
+}
+
+const lines = readline.createInterface({ input: process.stdin });
+let ready = false;
+lines.on('line', (line) => {
+    if (!ready) {
+        const setup = JSON.parse(line);
+        cacheDirectory = setup.cache;
+        fs.mkdirSync(cacheDirectory, { recursive: true });
+        ready = true;
+        console.log(`${setup.token} 0`);
+        return;
+    }
+    const request: Request = JSON.parse(line);
+    const code = handle(request);
+    console.log(`${request.token} ${code}`);
+});
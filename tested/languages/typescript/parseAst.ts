@@ -1,13 +1,5 @@
 import * as ts from 'typescript';
 import * as fs from 'fs';
-const source = fs.readFileSync(process.argv[2], 'utf-8');
-
-const ast = ts.createSourceFile(
-    process.argv[2], // File name
-    source,          // Source code
-    ts.ScriptTarget.ESNext, // Target language version
-    true             // SetParentNodes option to preserve parent-child relationships
-);
 
 // Helper function to extract relevant identifiers from AST nodes
 function mapSubTreeToIds(node: ts.Node): Array<ts.Node|undefined> {
@@ -51,11 +43,24 @@ function mapIdToName(node: ts.Node|undefined): Array<any> {
     }
 }
 
-try {
-    const array = Array.from(new Set(mapSubTreeToIds(ast).flatMap(mapIdToName)));
-    console.log(array.join(', '));
-} catch (e) {
-    // Assume this is invalid TypeScript at this point.
-    console.error(e);
-    process.exit(0);
+// The names that are declared at the top level of a file.
+export function topLevelNames(fileName: string, source: string): Array<string> {
+    const ast = ts.createSourceFile(
+        fileName,        // File name
+        source,          // Source code
+        ts.ScriptTarget.ESNext, // Target language version
+        true             // SetParentNodes option to preserve parent-child relationships
+    );
+    return Array.from(new Set(mapSubTreeToIds(ast).flatMap(mapIdToName)));
+}
+
+if (require.main === module) {
+    const source = fs.readFileSync(process.argv[2], 'utf-8');
+    try {
+        console.log(topLevelNames(process.argv[2], source).join(', '));
+    } catch (e) {
+        // Assume this is invalid TypeScript at this point.
+        console.error(e);
+        process.exit(0);
+    }
 }
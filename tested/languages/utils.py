@@ -1,7 +1,9 @@
+import functools
 import html
 import logging
 import os
 import re
+import shutil
 from pathlib import Path
 from typing import TYPE_CHECKING, overload
 
@@ -34,6 +36,26 @@ def jvm_memory_limit(config: GlobalConfig) -> int:
     return limit
 
 
+@functools.cache
+def kotlin_library(name: str) -> Path | None:
+    """
+    Find a jar in the library folder of the Kotlin installation, e.g. the compiler
+    or the standard library. The installation is found with the KOTLIN_HOME
+    environment variable or the location of kotlinc.
+
+    :param name: The name of the jar, e.g. "kotlin-stdlib.jar".
+    :return: The path to the jar, or None if it cannot be found.
+    """
+    if home := os.environ.get("KOTLIN_HOME"):
+        library = Path(home, "lib")
+    elif kotlinc := shutil.which("kotlinc"):
+        library = Path(kotlinc).resolve().parent.parent / "lib"
+    else:
+        return None
+    jar = library / name
+    return jar if jar.is_file() else None
+
+
 # Idea and original code: dodona/judge-pythia
 def jvm_cleanup_stacktrace(stacktrace_str: str, submission_filename: str) -> str:
     context_file_regex = re.compile(r"(Context[0-9]+|Selector)")
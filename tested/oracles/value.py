@@ -2,8 +2,9 @@
 Value oracle.
 """
 
+import json
 import logging
-from typing import cast
+from typing import Any, cast
 
 from tested.configs import Bundle
 from tested.datatypes import (
@@ -16,6 +17,7 @@ from tested.datatypes import (
 from tested.dodona import ExtendedMessage, Message, Permission, Status, StatusMessage
 from tested.features import TypeSupport, fallback_type_support_map
 from tested.internationalization import get_i18n_string
+from tested.languages.fragments import get_fragments
 from tested.languages.generation import generate_statement
 from tested.oracles.common import OracleConfig, OracleResult
 from tested.parsing import get_converter
@@ -26,6 +28,7 @@ from tested.serialisation import (
     StringType,
     Value,
     as_basic_type,
+    decode_value,
     parse_value,
     to_python_comparable,
 )
@@ -53,7 +56,10 @@ def try_as_readable_value(
 
 
 def get_values(
-    bundle: Bundle, output_channel: OracleOutputChannel, actual_str: str
+    bundle: Bundle,
+    output_channel: OracleOutputChannel,
+    actual_str: str,
+    actual_json: Any = None,
 ) -> OracleResult | tuple[Value, str, Value | None, str]:
     if isinstance(output_channel, TextOutputChannel):
         expected = output_channel.get_data_as_string(bundle.config.resources)
@@ -65,7 +71,12 @@ def get_values(
 
     expected = output_channel.value
     assert isinstance(expected, Value)
-    readable_expected = generate_statement(bundle, expected)
+    fragments = get_fragments(bundle)
+    readable_expected = (
+        fragments.readable_expected(output_channel) if fragments else None
+    )
+    if readable_expected is None:
+        readable_expected = generate_statement(bundle, expected)
 
     # Special support for empty strings.
     if not actual_str.strip():
@@ -74,7 +85,10 @@ def get_values(
     # A crash here indicates a problem with one of the language implementations,
     # or a student is trying to cheat.
     try:
-        actual = parse_value(actual_str)
+        if actual_json is None:
+            actual = parse_value(actual_str)
+        else:
+            actual = decode_value(actual_json)
     except Exception as e:
         raw_message = f"Received {actual_str}, which caused {e} for get_values."
         message = ExtendedMessage(
@@ -283,18 +297,24 @@ def evaluate(
     """
     assert isinstance(channel, ValueOutputChannel)
 
-    # Try parsing the value as an OracleResult.
-    # This is the result of a custom oracle.
+    # Both values and the results of custom oracles are sent as json.
     # noinspection PyBroadException
     try:
-        evaluation_result = get_converter().loads(actual_str, OracleResult)
+        actual_json = json.loads(actual_str)
     except Exception:
-        pass
-    else:
-        return evaluation_result
+        actual_json = None
+
+    # Try parsing the value as an OracleResult.
+    # This is the result of a custom oracle. Values never have a "result" key.
+    if isinstance(actual_json, dict) and "result" in actual_json:
+        # noinspection PyBroadException
+        try:
+            return get_converter().structure(actual_json, OracleResult)
+        except Exception:
+            pass
 
     # Try parsing the value as an actual Value.
-    result = get_values(config.bundle, channel, actual_str)
+    result = get_values(config.bundle, channel, actual_str, actual_json)
     if isinstance(result, OracleResult):
         return result
     else:
@@ -18,7 +18,6 @@ from typing_inspect import is_union_type
 from tested.utils import get_args
 
 if TYPE_CHECKING:
-    from tested.serialisation import Value
     from tested.testsuite import Suite
 
 _logger = logging.getLogger(__name__)
@@ -83,21 +82,6 @@ def initialise_converter():
     )
 
 
-def parse_json_value(value: str) -> "Value":
-    """
-    Parse the json of a value into the relevant data structures.
-
-    If ``value`` is not valid json, a `SerialisationError` will be thrown.
-
-    :param value: The json to be parsed.
-    :return: The parsed data.
-    """
-    initialise_converter()
-    from tested.serialisation import Value
-
-    return _suite_converter.loads(value, Value)  # pyright: ignore
-
-
 def parse_json_suite(value: str) -> "Suite":
     """Parse a test suite into the structures."""
     initialise_converter()
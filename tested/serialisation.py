@@ -18,6 +18,7 @@ classes for implementations in other configs.
 """
 
 import copy
+import json
 import logging
 import math
 import operator
@@ -52,8 +53,8 @@ from tested.datatypes import (
     resolve_to_basic,
 )
 from tested.features import Construct, FeatureSet, WithFeatures, combine_features
-from tested.parsing import parse_json_value
-from tested.utils import flatten, sorted_no_duplicates
+from tested.parsing import get_converter
+from tested.utils import flatten, get_args, sorted_no_duplicates
 
 logger = logging.getLogger(__name__)
 
@@ -560,17 +561,101 @@ def as_basic_type(value: Value) -> Value:
     return cp
 
 
+# Maps the type strings of the value protocol to the class of the value and the
+# actual type. This is used by the decoder below.
+_VALUE_TYPES: dict[str, tuple[type, AllTypes]] = {
+    member.value: (value_class, member)
+    for value_class, types in (
+        (NumberType, NumericTypes),
+        (StringType, StringTypes),
+        (BooleanType, BooleanTypes),
+        (SequenceType, SequenceTypes),
+        (ObjectType, ObjectTypes),
+        (NothingType, NothingTypes),
+    )
+    for enum in get_args(types)
+    for member in enum
+}
+
+_VALUE_KEYS = frozenset(("type", "data", "diagnostic"))
+
+
+def _decode_number_data(data: Any) -> SpecialNumbers | int | float | Decimal:
+    if isinstance(data, bool):
+        raise TypeError(f"A boolean is not a valid number: {data}")
+    if isinstance(data, int | float):
+        return data
+    if isinstance(data, str):
+        if data in SpecialNumbers:
+            return SpecialNumbers(data)
+        return Decimal(data)
+    raise TypeError(f"Invalid data for a number: {data}")
+
+
+def _decode_value(data: Any) -> Value:
+    if not isinstance(data, dict) or not data.keys() <= _VALUE_KEYS:
+        raise TypeError(f"Not a value: {data}")
+    value_class, type_ = _VALUE_TYPES[data["type"]]
+    diagnostic = data.get("diagnostic")
+    if value_class is StringType:
+        if not isinstance(data["data"], str):
+            raise TypeError(f"Invalid data for a string: {data['data']}")
+        return StringType(type=type_, data=data["data"], diagnostic=diagnostic)
+    if diagnostic is not None:
+        raise TypeError(f"Unexpected diagnostic for {type_}: {diagnostic}")
+    if value_class is NumberType:
+        return NumberType(type=type_, data=_decode_number_data(data["data"]))
+    elif value_class is BooleanType:
+        return BooleanType(type=type_, data=data["data"])
+    elif value_class is SequenceType:
+        elements = [_decode_value(element) for element in data["data"]]
+        return SequenceType(type=type_, data=elements)  # pyright: ignore
+    elif value_class is ObjectType:
+        pairs = [
+            ObjectKeyValuePair(
+                key=_decode_value(pair["key"]), value=_decode_value(pair["value"])
+            )
+            for pair in data["data"]
+        ]
+        return ObjectType(type=type_, data=pairs)
+    else:
+        assert value_class is NothingType
+        if data.get("data") is not None:
+            raise TypeError(f"Invalid data for nothing: {data['data']}")
+        return NothingType(type=type_)
+
+
+def decode_value(data: Any) -> Value:
+    """
+    Convert already decoded json into a value.
+
+    The value protocol, as used by the language implementations, is decoded by
+    hand in one pass. This is a lot faster than the generic converter, which needs
+    to try all types in a union. If the data does not follow the protocol exactly,
+    the generic converter is used after all, which is a bit more lenient.
+
+    :param data: The decoded json, i.e. a dictionary.
+    :return: The parsed data.
+    """
+    # noinspection PyBroadException
+    try:
+        return _decode_value(data)
+    except Exception:
+        logger.debug(f"Falling back to the generic converter for {data}")
+        return get_converter().structure(data, Value)  # pyright: ignore
+
+
 def parse_value(value: str) -> Value:
     """
     Parse the json of a value into the relevant data structures.
 
-    If ``value`` is not valid json, a `SerialisationError` will be thrown.
+    If ``value`` is not valid json, a `JSONDecodeError` will be thrown.
 
     :param value: The json to be parsed.
     :return: The parsed data.
     """
 
-    return parse_json_value(value)
+    return decode_value(json.loads(value))
 
 
 class PrintingDecimal:
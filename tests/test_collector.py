@@ -196,3 +196,22 @@ def test_mid_tab_is_completed(tmp_path: Path, pytestconfig: pytest.Config):
         "wrong",
         "wrong",
     ]
+
+
+def test_failed_contexts_are_counted():
+    collector = OutputManager(out=StringIO())
+    collector.add(StartJudgement())
+    collector.add(StartTab(TEST_SUITE.tabs[0].name))
+    for status in [Status.CORRECT, Status.WRONG, Status.RUNTIME_ERROR]:
+        collector.add(StartContext())
+        collector.add(StartTestcase(description="test"))
+        collector.add(StartTest(expected="test"))
+        collector.add(CloseTest(generated="test", status=StatusMessage(enum=status)))
+        collector.add(StartTest(expected="test"))
+        collector.add(
+            CloseTest(generated="test", status=StatusMessage(enum=Status.CORRECT))
+        )
+        collector.add(CloseTestcase(), 0)
+        collector.add(CloseContext(), 0)
+
+    assert collector.failed_contexts == 2
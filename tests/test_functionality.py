@@ -7,18 +7,66 @@ Running the tests should happen in with the root directory (the one with src/ an
 tests/) as the working directory.
 """
 
+import json
+import os
+import shutil
 import sys
+import threading
+import time
 from pathlib import Path
 
+import attrs
 import pytest
 from pytest_mock import MockerFixture
 
-from tested.configs import create_bundle
+from tested.configs import DodonaConfig, create_bundle
+from tested.datatypes import BasicStringTypes
+from tested.dodona import Status
+from tested.dsl import parse_dsl
+from tested.dsl.ast_translator import parse_string
 from tested.features import Construct
-from tested.judge.execution import ExecutionResult
-from tested.languages import LANGUAGES, get_language
-from tested.languages.generation import get_readable_input
-from tested.testsuite import Context, MainInput, Suite, Tab, Testcase, TextData
+from tested.judge import harnesses
+from tested.judge.channels import OutputBuffer, ResultChannel, supports_pipes
+from tested.judge.core import _compilation_workers
+from tested.judge.execution import ContextWatcher, ExecutionResult, OutputFrame
+from tested.judge.planning import (
+    CompilationResult,
+    CostModel,
+    PlanStrategy,
+    dispatch_order,
+    plan_test_suite,
+)
+from tested.judge.profiles import ProfileStore
+from tested.judge.servers import (
+    ExecutionServer,
+    close_servers,
+    get_compilation_servers,
+    get_server_pool,
+)
+from tested.judge.utils import run_watched_command
+from tested.languages import LANGUAGES, cds, generation, get_language
+from tested.languages.c import build
+from tested.languages.fragments import precompute_fragments
+from tested.languages.generation import generate_statement, get_readable_input
+from tested.languages.language import ServerRequest
+from tested.languages.memo import Memo, structural_key
+from tested.languages.preparation import prepare_context
+from tested.parsing import get_converter
+from tested.serialisation import Identifier, StringType
+from tested.testsuite import (
+    Context,
+    ExitCodeOutputChannel,
+    MainInput,
+    Output,
+    Suite,
+    SupportedLanguage,
+    Tab,
+    Testcase,
+    TextChannelType,
+    TextData,
+    TextOutputChannel,
+    parse_test_suite,
+)
 from tests.language_markers import (
     ALL_LANGUAGES,
     ALL_SPECIFIC_LANGUAGES,
@@ -393,6 +441,91 @@ def test_batch_compilation_fallback(
     assert spy.call_count == 3
 
 
+def test_fallback_compilation_bisects_failing_units(
+    tmp_path: Path, pytestconfig: pytest.Config, mocker: MockerFixture
+):
+    exercise = tmp_path / "exercise"
+    exercise.mkdir()
+    # Only the unit of the fourth tab does not compile.
+    functions = ["echo"] * 3 + ["missing"] + ["echo"] * 4
+    (exercise / "suite.yaml").write_text(
+        "\n".join(
+            f"""
+- tab: "Tab {i}"
+  testcases:
+  - expression: '{function}("a")'
+    return: "a"
+"""
+            for i, function in enumerate(functions)
+        )
+    )
+    spy = mocker.spy(LANGUAGES["c"], "compilation")
+    conf = configuration(
+        pytestconfig,
+        "echo-function",
+        "c",
+        tmp_path,
+        "suite.yaml",
+        "correct",
+        {"resources": exercise},
+    )
+    result = execute_config(conf)
+    updates = assert_valid_output(result, pytestconfig)
+    statuses = updates.find_status_enum()
+    assert statuses.count("correct") == 7
+    assert "compilation error" in statuses
+    # The precompilation, both halves, both quarters and both eighths.
+    assert spy.call_count == 7
+
+
+def test_fallback_compilation_stops_bisecting_if_both_halves_fail(
+    tmp_path: Path, pytestconfig: pytest.Config, mocker: MockerFixture
+):
+    exercise = tmp_path / "exercise"
+    exercise.mkdir()
+    (exercise / "suite.yaml").write_text(
+        "\n".join(
+            f"""
+- tab: "Tab {i}"
+  testcases:
+  - expression: 'echo("a")'
+    return: "a"
+"""
+            for i in range(8)
+        )
+    )
+    submission = exercise / "submission.c"
+    submission.write_text("char* echo(char* a) { return a }\n")
+    spy = mocker.spy(LANGUAGES["c"], "compilation")
+    conf = configuration(
+        pytestconfig,
+        "echo-function",
+        "c",
+        tmp_path,
+        "suite.yaml",
+        "correct",
+        {"resources": exercise, "source": submission},
+    )
+    result = execute_config(conf)
+    updates = assert_valid_output(result, pytestconfig)
+    assert updates.find_status_enum() == ["compilation error"] * 8
+    # The precompilation, both halves and then each unit.
+    assert spy.call_count == 11
+
+
+def test_compilation_workers_are_limited_by_memory(
+    tmp_path: Path, pytestconfig: pytest.Config, mocker: MockerFixture
+):
+    # A memory limit of 2.5 GiB.
+    limit = 5 * 512 * 1024 * 1024
+    conf = configuration(
+        pytestconfig, "echo", "csharp", tmp_path, options={"memory_limit": limit}
+    )
+    bundle = create_bundle(conf, sys.stdout, Suite(tabs=[]))
+    mocker.patch("os.cpu_count", return_value=8)
+    assert _compilation_workers(bundle) == 2
+
+
 @pytest.mark.parametrize("language", ALL_LANGUAGES)
 def test_batch_compilation_no_fallback(
     language: str, tmp_path: Path, pytestconfig: pytest.Config, mocker: MockerFixture
@@ -590,6 +723,467 @@ def test_timeouts_propagate_to_contexts():
     assert context_result.exceptions == execution_result.testcase_separator
 
 
+@pytest.mark.parametrize(
+    "output",
+    ["", "SEP", "aSEPb", "SEPaSEP", "SEPSEPa", "aSEPSEPbSEP", "no separator"],
+)
+def test_output_frames_split_like_strings(output: str):
+    frame = OutputFrame.of("prefix" + output + "suffix")
+    inner = OutputFrame(frame.output, len("prefix"), len(frame.output) - len("suffix"))
+    assert inner.text() == output
+    assert [f.text() for f in inner.split("SEP")] == output.split("SEP")
+
+
+@pytest.mark.skipif(not supports_pipes(), reason="Named pipes are not supported")
+def test_result_channel_is_bounded(tmp_path: Path):
+    channel = ResultChannel.open(tmp_path / "values.txt", limit=5)
+    # Open the file several times, like the Bash harness does.
+    for data in ["abc", "defgh"]:
+        with open(tmp_path / "values.txt", "w") as f:
+            f.write(data)
+    assert channel.close() == "abcde"
+
+
+def test_context_watcher_reports_done_contexts():
+    streams = [OutputBuffer(-1) for _ in range(4)]
+    results, exceptions, stdout, stderr = streams
+    reported = []
+    watcher = ContextWatcher(
+        context_separator="CTX",
+        testcase_separator="TC",
+        contexts=3,
+        results=results,
+        exceptions=exceptions,
+        callback=lambda i, r: reported.append((i, r)),
+    )
+
+    for stream in streams:
+        stream.data += b"CTXTC"
+    stdout.data += b"first"
+    watcher(stdout, stderr)
+    assert reported == []
+
+    # The next context only starts on some of the streams.
+    results.data += b"CTXTC"
+    exceptions.data += b"CT"
+    watcher(stdout, stderr)
+    assert reported == []
+
+    exceptions.data += b"XTC"
+    stdout.data += b"CTXTCsecond"
+    stderr.data += b"CTXTC"
+    watcher(stdout, stderr)
+    assert len(reported) == 1
+    index, result = reported[0]
+    assert index == 0
+    assert result.stdout == "TCfirst"
+    assert result.results == "TC"
+
+    # The last context is never reported.
+    for stream in streams:
+        stream.data += b"CTXTC"
+    watcher(stdout, stderr)
+    assert [i for i, _ in reported] == [0, 1]
+    assert reported[1][1].stdout == "TCsecond"
+
+
+def test_context_watcher_measures_durations_from_separators():
+    pipes = [os.pipe() for _ in range(4)]
+    streams = [OutputBuffer(reader) for reader, _ in pipes]
+    for stream in streams:
+        stream.start()
+    results, exceptions, stdout, stderr = streams
+    reported = []
+    watcher = ContextWatcher(
+        context_separator="CTX",
+        testcase_separator="TC",
+        contexts=2,
+        results=results,
+        exceptions=exceptions,
+        callback=lambda i, r: reported.append((i, r)),
+    )
+
+    def separate():
+        for _, writer in pipes:
+            os.write(writer, b"CTX")
+
+    # The start-up of the unit is not part of the first context.
+    time.sleep(0.2)
+    separate()
+    time.sleep(0.2)
+    separate()
+    # Noticing the separator later does not change the duration.
+    time.sleep(0.3)
+    watcher(stdout, stderr)
+    for _, writer in pipes:
+        os.close(writer)
+    for stream in streams:
+        stream.join()
+
+    assert [i for i, _ in reported] == [0]
+    assert 0.15 < reported[0][1].duration < 0.35
+
+
+def test_context_watcher_waits_for_exit_codes():
+    streams = [OutputBuffer(-1) for _ in range(5)]
+    results, exceptions, exit_codes, stdout, stderr = streams
+    reported = []
+    watcher = ContextWatcher(
+        context_separator="CTX",
+        testcase_separator="TC",
+        contexts=3,
+        results=results,
+        exceptions=exceptions,
+        callback=lambda i, r: reported.append((i, r)),
+        exit_codes=exit_codes,
+    )
+
+    for stream in [results, exceptions, stdout, stderr]:
+        stream.data += b"CTXTCCTXTC"
+    watcher(stdout, stderr)
+    assert reported == []
+
+    # Only complete lines are used.
+    exit_codes.data += b"25"
+    watcher(stdout, stderr)
+    assert reported == []
+
+    exit_codes.data += b"7\n"
+    watcher(stdout, stderr)
+    assert [(i, r.exit) for i, r in reported] == [(0, 1)]
+
+
+def test_execution_result_uses_exit_code_per_context():
+    result = ExecutionResult(
+        stdout="CTXTCaCTXTCbCTXTCc",
+        stderr="",
+        exit=3,
+        timeout=False,
+        memory=False,
+        context_separator="CTX",
+        testcase_separator="TC",
+        results="",
+        exceptions="",
+        exit_codes="0\n2\n",
+    )
+    contexts = result.to_context_results()
+    # The last context did not write its exit code, so the exit code is used.
+    assert [c.exit for c in contexts] == [0, 2, 3]
+
+
+EXIT_SUBMISSIONS = {
+    "python": "import sys\nprint(sys.argv[1])\nsys.exit(int(sys.argv[1]))\n",
+    "c": """#include <stdio.h>
+#include <stdlib.h>
+
+int main(int argc, char** argv) {
+    printf("%s\\n", argv[1]);
+    exit(atoi(argv[1]));
+}
+""",
+    "bash": 'echo "$1"\nexit "$1"\n',
+}
+
+
+@pytest.mark.parametrize("exit_interception", [True, False])
+@pytest.mark.parametrize("language", ["python", "c", "bash"])
+def test_exit_contexts_share_unit_with_exit_interception(
+    language: str, exit_interception: bool, tmp_path: Path, pytestconfig: pytest.Config
+):
+    exercise = tmp_path / "exercise"
+    exercise.mkdir()
+    extension = get_language(None, language).file_extension()
+    submission = exercise / f"submission.{extension}"
+    submission.write_text(EXIT_SUBMISSIONS[language])
+    suite = exercise / "suite.yaml"
+    suite.write_text(
+        "\n".join(
+            f"""
+- tab: "Exit {code}"
+  testcases:
+  - arguments: [ "{code}" ]
+    stdout: "{code}"
+    exit_code: {code}"""
+            for code in [0, 3, 0, 4]
+        )
+    )
+    conf = configuration(
+        pytestconfig,
+        "echo",
+        language,
+        tmp_path,
+        options={
+            "source": submission,
+            "resources": exercise,
+            "test_suite": "suite.yaml",
+            "options": {"exit_interception": exit_interception},
+        },
+    )
+    result = execute_config(conf)
+    updates = assert_valid_output(result, pytestconfig)
+    # An exit code of zero is not shown.
+    assert updates.find_status_enum() == ["correct"] * 6
+
+    bundle = create_bundle(conf, sys.stdout, parse_dsl(suite.read_text()))
+    units = plan_test_suite(bundle, PlanStrategy.OPTIMAL)
+    # Without exit interception, each context that checks the exit code ends a unit.
+    assert len(units) == (1 if exit_interception else 4)
+
+
+@pytest.mark.parametrize("exit_interception", [True, False])
+def test_python_fork_mode_reports_exit_codes(
+    exit_interception: bool, tmp_path: Path, pytestconfig: pytest.Config
+):
+    exercise = tmp_path / "exercise"
+    exercise.mkdir()
+    submission = exercise / "submission.py"
+    submission.write_text(EXIT_SUBMISSIONS["python"])
+    suite = exercise / "suite.yaml"
+    suite.write_text(
+        """
+- tab: "Exit"
+  contexts:
+  - testcases:
+    - arguments: [ "3" ]
+      stdout: "3"
+      exit_code: 3
+  - testcases:
+    - arguments: [ "4" ]
+      stdout: "4"
+      exit_code: 4
+"""
+    )
+    conf = configuration(
+        pytestconfig,
+        "echo",
+        "python",
+        tmp_path,
+        options={
+            "source": submission,
+            "resources": exercise,
+            "test_suite": "suite.yaml",
+            "options": {
+                "exit_interception": exit_interception,
+                "language": {"python": {"forkContexts": True}},
+            },
+        },
+    )
+    result = execute_config(conf)
+    updates = assert_valid_output(result, pytestconfig)
+    assert updates.find_status_enum() == ["correct"] * 4
+
+
+EXIT_AFTER_CODE = {
+    "python": 'open("after.txt", "a").write("after")',
+    "c": '{ FILE* f = fopen("after.txt", "a"); fputs("after", f); fclose(f); }',
+    "bash": "echo -n after >>after.txt",
+}
+
+
+@pytest.mark.parametrize("language", ["python", "c", "bash"])
+def test_intercepted_exit_runs_after_code(
+    language: str, tmp_path: Path, pytestconfig: pytest.Config
+):
+    exercise = tmp_path / "exercise"
+    exercise.mkdir()
+    extension = get_language(None, language).file_extension()
+    submission = exercise / f"submission.{extension}"
+    submission.write_text(EXIT_SUBMISSIONS[language])
+    contexts = [
+        Context(
+            testcases=[
+                Testcase(
+                    input=MainInput(arguments=[str(code)]),
+                    output=Output(
+                        stdout=TextOutputChannel(data=f"{code}\n"),
+                        exit_code=ExitCodeOutputChannel(value=code),
+                    ),
+                )
+            ],
+            after={
+                SupportedLanguage(language): TextData(data=EXIT_AFTER_CODE[language])
+            },
+        )
+        for code in [3, 4]
+    ]
+    suite = Suite(tabs=[Tab(name="Exit", contexts=contexts)])
+    (exercise / "suite.json").write_text(get_converter().dumps(suite))
+    conf = configuration(
+        pytestconfig,
+        "echo",
+        language,
+        tmp_path,
+        options={
+            "source": submission,
+            "resources": exercise,
+            "test_suite": "suite.json",
+            "options": {"exit_interception": True},
+        },
+    )
+    result = execute_config(conf)
+    updates = assert_valid_output(result, pytestconfig)
+    assert updates.find_status_enum() == ["correct"] * 4
+
+    # Both contexts ran in one unit, and the exit did not skip the after code.
+    after = list(conf.workdir.rglob("after.txt"))
+    assert len(after) == 1
+    assert after[0].read_text() == "afterafter"
+
+
+def test_bash_exit_in_function_only_ends_its_context(
+    tmp_path: Path, pytestconfig: pytest.Config
+):
+    exercise = tmp_path / "exercise"
+    exercise.mkdir()
+    submission = exercise / "submission"
+    submission.write_text(
+        """
+function greet {
+    echo "$1"
+}
+
+function stop {
+    echo "stop"
+    exit 3
+}
+"""
+    )
+    suite = exercise / "suite.yaml"
+    suite.write_text(
+        """
+- tab: "Exit"
+  contexts:
+  - testcases:
+    - statement: 'greet("one")'
+      stdout: "one"
+  - testcases:
+    - statement: "stop()"
+      stdout: "stop"
+  - testcases:
+    - statement: 'greet("three")'
+      stdout: "three"
+"""
+    )
+    conf = configuration(
+        pytestconfig,
+        "echo",
+        "bash",
+        tmp_path,
+        options={
+            "source": submission,
+            "resources": exercise,
+            "test_suite": "suite.yaml",
+        },
+    )
+    result = execute_config(conf)
+    updates = assert_valid_output(result, pytestconfig)
+    # The exit in the second context does not end the contexts after it.
+    statuses = updates.find_status_enum()
+    assert statuses[0] == "correct"
+    assert statuses[-1] == "correct"
+    assert "wrong" not in statuses
+
+
+def test_python_fork_mode_isolates_contexts(
+    tmp_path: Path, pytestconfig: pytest.Config
+):
+    exercise = tmp_path / "exercise"
+    exercise.mkdir()
+    submission = exercise / "submission.py"
+    # The state is kept in another module, which reloading the submission does not
+    # reset.
+    submission.write_text(
+        """
+import builtins
+import os
+import signal
+
+def count(x):
+    builtins.total = getattr(builtins, "total", 0) + x
+    return builtins.total
+
+def crash():
+    os.kill(os.getpid(), signal.SIGKILL)
+"""
+    )
+    suite = exercise / "suite.yaml"
+    suite.write_text(
+        """
+- tab: "Count"
+  contexts:
+  - testcases:
+    - statement: "count(2)"
+      return: 2
+  - testcases:
+    - statement: "crash()"
+      return: 1
+  - testcases:
+    - statement: "count(3)"
+      return: 3
+"""
+    )
+    conf = configuration(
+        pytestconfig,
+        "echo",
+        "python",
+        tmp_path,
+        options={
+            "source": submission,
+            "resources": exercise,
+            "test_suite": "suite.yaml",
+            "options": {"language": {"python": {"forkContexts": True}}},
+        },
+    )
+    result = execute_config(conf)
+    updates = assert_valid_output(result, pytestconfig)
+    # A crashing context does not affect the next one.
+    assert updates.find_status_enum() == ["correct", "wrong", "correct"]
+
+
+def test_truncated_results_report_output_limit(
+    tmp_path: Path, pytestconfig: pytest.Config
+):
+    exercise = tmp_path / "exercise"
+    exercise.mkdir()
+    submission = exercise / "submission.py"
+    submission.write_text("def repeat(n):\n    return 'x' * n\n")
+    suite = exercise / "suite.yaml"
+    suite.write_text(
+        """
+- tab: "Text"
+  contexts:
+  - testcases:
+    - statement: "repeat(1)"
+      return: "x"
+  - testcases:
+    - statement: "repeat(5000)"
+      return: "x"
+  - testcases:
+    - statement: "repeat(2)"
+      return: "xx"
+"""
+    )
+    conf = configuration(
+        pytestconfig,
+        "echo",
+        "python",
+        tmp_path,
+        options={
+            "source": submission,
+            "resources": exercise,
+            "test_suite": "suite.yaml",
+            "output_limit": 1000,
+        },
+    )
+    result = execute_config(conf)
+    updates = assert_valid_output(result, pytestconfig)
+    # The truncated value is not parsed, but reported as too much output.
+    statuses = updates.find_status_enum()
+    assert statuses[:2] == ["correct", "output limit exceeded"]
+    # The contexts after the output limit are not executed.
+    assert statuses[2:] == ["wrong"] * (len(statuses) - 2)
+
+
 @pytest.mark.parametrize(
     "language_and_expected",
     [
@@ -783,6 +1377,355 @@ def test_main_call_quotes(tmp_path: Path, pytestconfig: pytest.Config):
     )
 
 
+@pytest.mark.parametrize("virtual_stdin", [True, False])
+@pytest.mark.parametrize("language", ["python", "javascript", "c"])
+def test_stdin_contexts_share_unit_with_virtual_stdin(
+    language: str, virtual_stdin: bool, tmp_path: Path, pytestconfig: pytest.Config
+):
+    config_ = {"options": {"virtual_stdin": virtual_stdin}}
+    conf = configuration(pytestconfig, "echo", language, tmp_path, options=config_)
+    contexts = [
+        Context(testcases=[Testcase(input=MainInput(stdin=TextData(data=data)))])
+        for data in ["one\n", "two\n", "three\n"]
+    ]
+    suite = Suite(tabs=[Tab(contexts=contexts, name="hallo")])
+    bundle = create_bundle(conf, sys.stdout, suite)
+    units = plan_test_suite(bundle, PlanStrategy.OPTIMAL)
+
+    if virtual_stdin and bundle.language.supports_virtual_stdin():
+        assert len(units) == 1
+    else:
+        assert len(units) == 3
+
+
+@pytest.mark.parametrize("virtual_stdin", [True, False])
+@pytest.mark.parametrize("language", ["python", "java", "csharp", "c"])
+def test_harness_only_provides_stdin_with_virtual_stdin(
+    language: str, virtual_stdin: bool, tmp_path: Path, pytestconfig: pytest.Config
+):
+    config_ = {"options": {"virtual_stdin": virtual_stdin}}
+    conf = configuration(pytestconfig, "echo", language, tmp_path, options=config_)
+    context = Context(testcases=[Testcase(input=MainInput(stdin=TextData(data="a")))])
+    suite = Suite(tabs=[Tab(contexts=[context], name="hallo")])
+    bundle = create_bundle(conf, sys.stdout, suite)
+
+    prepared, _ = prepare_context(bundle, context)
+
+    assert bundle.virtual_stdin == virtual_stdin
+    assert prepared.stdin == ("a" if virtual_stdin else None)
+
+
+def test_crashing_stdin_context_does_not_affect_next_contexts(
+    tmp_path: Path, pytestconfig: pytest.Config
+):
+    exercise = tmp_path / "exercise"
+    exercise.mkdir()
+    submission = exercise / "submission.c"
+    submission.write_text(
+        """
+#include <signal.h>
+#include <stdio.h>
+#include <string.h>
+
+int main() {
+    char line[100];
+    if (fgets(line, sizeof(line), stdin) != NULL) {
+        if (strcmp(line, "crash\\n") == 0) {
+            raise(SIGSEGV);
+        }
+        fputs(line, stdout);
+    }
+    return 0;
+}
+"""
+    )
+    suite = exercise / "suite.yaml"
+    suite.write_text(
+        """
+- tab: "Echo"
+  contexts:
+  - testcases:
+    - stdin: "one\\n"
+      stdout: "one\\n"
+  - testcases:
+    - stdin: "crash\\n"
+      stdout: "crash\\n"
+  - testcases:
+    - stdin: "three\\n"
+      stdout: "three\\n"
+"""
+    )
+    conf = configuration(
+        pytestconfig,
+        "echo",
+        "c",
+        tmp_path,
+        options={
+            "source": submission,
+            "resources": exercise,
+            "test_suite": "suite.yaml",
+        },
+    )
+    result = execute_config(conf)
+    updates = assert_valid_output(result, pytestconfig)
+    # Each context with stdin is executed in its own unit, so a crash only affects
+    # its own context.
+    statuses = updates.find_status_enum()
+    assert statuses[0] == "correct"
+    assert "wrong" in statuses[1:-1] or "runtime error" in statuses[1:-1]
+    assert statuses[-1] == "correct"
+
+
+@pytest.mark.parametrize("workers", [1, 2, 8])
+def test_balanced_plan_splits_contexts_over_workers(
+    workers: int, tmp_path: Path, pytestconfig: pytest.Config
+):
+    conf = configuration(pytestconfig, "echo", "python", tmp_path)
+    contexts = [
+        Context(testcases=[Testcase(input=MainInput(arguments=[str(i)]))])
+        for i in range(40)
+    ]
+    suite = Suite(tabs=[Tab(contexts=contexts, name="hallo")])
+    bundle = create_bundle(conf, sys.stdout, suite)
+    units = plan_test_suite(bundle, PlanStrategy.BALANCED, workers)
+
+    # The contexts are not reordered.
+    planned = [c.context for u in units for c in u.contexts]
+    assert planned == contexts
+    # Splitting in more than four units costs more startup time than it saves.
+    expected = min(workers, 4)
+    assert [len(u.contexts) for u in units] == [40 // expected] * expected
+
+
+def test_dispatch_order_starts_longest_units_first(
+    tmp_path: Path, pytestconfig: pytest.Config
+):
+    conf = configuration(pytestconfig, "echo", "python", tmp_path)
+    value = StringType(type=BasicStringTypes.TEXT, data="a")
+    contexts = [
+        Context(testcases=[Testcase(input=value) for _ in range(size)])
+        for size in [1, 3, 2]
+    ]
+    suite = Suite(tabs=[Tab(contexts=contexts, name="hallo")])
+    bundle = create_bundle(conf, sys.stdout, suite)
+    units = plan_test_suite(bundle, PlanStrategy.CONTEXT)
+    assert dispatch_order(bundle, units) == [1, 2, 0]
+
+
+def test_profile_records_durations(tmp_path: Path, pytestconfig: pytest.Config):
+    profile_path = tmp_path / "profile.jsonl"
+    conf = configuration(
+        pytestconfig,
+        "echo",
+        "python",
+        tmp_path,
+        "two.tson",
+        "correct",
+        options={"options": {"profile": str(profile_path)}},
+    )
+    result = execute_config(conf)
+    updates = assert_valid_output(result, pytestconfig)
+    assert updates.find_status_enum() == ["correct"] * 2
+
+    records = [json.loads(line) for line in profile_path.read_text().splitlines()]
+    kinds = [(r["kind"], r["key"]) for r in records]
+    assert ("compilation", "precompilation") in kinds
+    assert ("execution", "0:0") in kinds
+    assert ("evaluation", "0:1") in kinds
+
+    # The next judgement uses the recorded durations.
+    suite = parse_test_suite((conf.resources / conf.test_suite).read_text())
+    bundle = create_bundle(conf, sys.stdout, suite)
+    model = CostModel.for_bundle(bundle)
+    assert set(model.history) == {(0, 0), (0, 1)}
+
+
+def test_profile_is_flushed_after_fatal_compilation_error(
+    tmp_path: Path, pytestconfig: pytest.Config, mocker: MockerFixture
+):
+    profile_path = tmp_path / "profile.jsonl"
+    conf = configuration(
+        pytestconfig,
+        "echo",
+        "python",
+        tmp_path,
+        "two.tson",
+        "correct",
+        options={"options": {"profile": str(profile_path)}},
+    )
+    timeout = CompilationResult(status=Status.TIME_LIMIT_EXCEEDED)
+    mocker.patch("tested.judge.core.precompile", return_value=timeout)
+    result = execute_config(conf)
+    updates = assert_valid_output(result, pytestconfig)
+    assert "time limit exceeded" in updates.find_status_enum()
+
+    records = [json.loads(line) for line in profile_path.read_text().splitlines()]
+    assert [(r["kind"], r["key"]) for r in records] == [
+        ("compilation", "precompilation")
+    ]
+
+
+def test_profile_is_compacted(tmp_path: Path, mocker: MockerFixture):
+    mocker.patch("tested.judge.profiles.MAX_PROFILE_RECORDS", 20)
+    path = tmp_path / "profile.jsonl"
+    profile = ProfileStore.open(path, "suite", "python")
+    for i in range(30):
+        profile.record("execution", str(i % 2), float(i))
+    profile.flush()
+    with open(path, "a") as file:
+        file.write("broken\n")
+
+    profile = ProfileStore.open(path, "suite", "python")
+    assert len(path.read_text().splitlines()) == 10
+    # The most recent records are kept.
+    assert profile.samples[("execution", "1")] == [21.0, 23.0, 25.0, 27.0, 29.0]
+
+
+def test_profile_detects_slow_durations(tmp_path: Path):
+    profile = ProfileStore(
+        path=tmp_path / "profile.jsonl",
+        suite="suite",
+        language="python",
+        samples={("execution", "0:0"): [1.0, 1.1, 0.9, 1.0, 1.0]},
+    )
+    assert not profile.is_slow("execution", "0:0", 1.2)
+    assert profile.is_slow("execution", "0:0", 3.0)
+    # Without enough samples, nothing is slow.
+    assert not profile.is_slow("execution", "0:1", 100.0)
+
+
+@pytest.mark.parametrize("language", ["python", "c", "bash"])
+def test_cached_harness_is_reused(
+    language: str, tmp_path: Path, pytestconfig: pytest.Config, mocker: MockerFixture
+):
+    cache = tmp_path / "cache"
+
+    def judge(name: str) -> list[str]:
+        workdir = tmp_path / name
+        workdir.mkdir()
+        conf = configuration(
+            pytestconfig,
+            "echo",
+            language,
+            workdir,
+            "two.tson",
+            "correct",
+            options={"options": {"cache": str(cache)}},
+        )
+        result = execute_config(conf)
+        updates = assert_valid_output(result, pytestconfig)
+        return updates.find_status_enum()
+
+    assert judge("first") == ["correct"] * 2
+    entries = list((cache / "harnesses").iterdir())
+    assert entries
+
+    # The next judgement does not generate the code again, but uses other secrets.
+    spy = mocker.spy(harnesses, "generate_execution")
+    mocker.patch(
+        "tested.judge.core.generate_execution", side_effect=AssertionError("generated")
+    )
+    assert judge("second") == ["correct"] * 2
+    assert spy.call_count == 0
+    assert list((cache / "harnesses").iterdir()) == entries
+
+
+@pytest.mark.parametrize("language", ["python", "c"])
+def test_cached_harness_key_depends_on_submission_if_generation_uses_it(
+    language: str, tmp_path: Path, pytestconfig: pytest.Config
+):
+    contexts = [Context(testcases=[Testcase(input=MainInput(arguments=["hello"]))])]
+    suite = Suite(tabs=[Tab(contexts=contexts, name="hallo")])
+
+    def key(solution: str) -> str:
+        conf = configuration(
+            pytestconfig, "echo", language, tmp_path, "one.tson", solution
+        )
+        bundle = create_bundle(conf, sys.stdout, suite)
+        [unit] = plan_test_suite(bundle, PlanStrategy.OPTIMAL)
+        return harnesses.unit_key(bundle, unit)
+
+    same = key("correct") == key("wrong")
+    assert same != get_language(None, language).generation_uses_submission()
+
+
+def test_fail_fast_skips_remaining_contexts(
+    tmp_path: Path, pytestconfig: pytest.Config
+):
+    conf = configuration(
+        pytestconfig,
+        "echo",
+        "python",
+        tmp_path,
+        "full.tson",
+        "wrong",
+        options={"options": {"fail_fast": 3}},
+    )
+    result = execute_config(conf)
+    updates = assert_valid_output(result, pytestconfig)
+    statuses = updates.find_status_enum()
+    assert statuses[:3] == ["wrong"] * 3
+    assert len(statuses) > 3
+    assert all(s == "wrong" for s in statuses)
+    assert result.count("Deze test(en) werden niet uitgevoerd") == len(statuses) - 3
+
+
+def test_fail_fast_kills_running_unit(tmp_path: Path, pytestconfig: pytest.Config):
+    exercise = tmp_path / "exercise"
+    exercise.mkdir()
+    submission = exercise / "submission.py"
+    submission.write_text(
+        """
+import time
+
+def wait(seconds):
+    time.sleep(seconds)
+    return seconds
+"""
+    )
+    suite = exercise / "suite.yaml"
+    suite.write_text(
+        """
+- tab: "Wait"
+  contexts:
+  - testcases:
+    - statement: "wait(0)"
+      return: 1
+  - testcases:
+    - statement: "wait(60)"
+      return: 60
+"""
+    )
+    conf = configuration(
+        pytestconfig,
+        "echo",
+        "python",
+        tmp_path,
+        options={
+            "source": submission,
+            "resources": exercise,
+            "test_suite": "suite.yaml",
+            "options": {"fail_fast": 1},
+        },
+    )
+    start = time.perf_counter()
+    result = execute_config(conf)
+    # The judgement does not wait for the second context.
+    assert time.perf_counter() - start < 30
+    updates = assert_valid_output(result, pytestconfig)
+    assert updates.find_status_enum() == ["wrong", "wrong"]
+
+
+def test_watched_command_timeout_kills_child_processes(tmp_path: Path):
+    command = ["bash", "-c", "sleep 60 & echo $! >pid.txt; wait"]
+    result = run_watched_command(tmp_path, 1, command)
+    assert result.timeout
+    # The child that was started by the command is also stopped.
+    pid = (tmp_path / "pid.txt").read_text().strip()
+    stat = Path("/proc", pid, "stat")
+    assert not stat.exists() or stat.read_text().split()[2] == "Z"
+
+
 def test_stdin_and_arguments_use_heredoc(tmp_path: Path, pytestconfig: pytest.Config):
     conf = configuration(
         pytestconfig,
@@ -826,3 +1769,800 @@ def test_stdin_token_is_unique(tmp_path: Path, pytestconfig: pytest.Config):
     assert (
         actual.description == "$ submission hello << 'STDINN'\nOne line\nSTDIN\nSTDINN"
     )
+
+
+def test_fragments_are_reused_for_same_suite(
+    tmp_path: Path, pytestconfig: pytest.Config
+):
+    conf = configuration(
+        pytestconfig,
+        "echo-function",
+        "python",
+        tmp_path,
+        "two.yaml",
+        "top-level-output",
+    )
+
+    def make_bundle():
+        the_input = Testcase(
+            input=MainInput(arguments=["hello"], stdin=TextData(data="One line\n"))
+        )
+        suite = Suite(
+            tabs=[Tab(contexts=[Context(testcases=[the_input])], name="hallo")]
+        )
+        return create_bundle(conf, sys.stdout, suite), the_input
+
+    first_bundle, first_input = make_bundle()
+    first = precompute_fragments(first_bundle)
+    second_bundle, second_input = make_bundle()
+    second = precompute_fragments(second_bundle)
+
+    expected, _ = get_readable_input(second_bundle, second_input)
+    first_fragments = first.for_testcase(first_input)
+    second_fragments = second.for_testcase(second_input)
+    assert first_fragments is not None and second_fragments is not None
+    assert second_fragments.readable_input == expected
+    assert first_fragments is second_fragments
+    assert second.for_testcase(first_input) is None
+
+
+def test_fragments_depend_on_namespace_and_stdin_files(
+    tmp_path: Path, pytestconfig: pytest.Config
+):
+    resources = tmp_path / "resources"
+    resources.mkdir()
+    conf = configuration(
+        pytestconfig,
+        "echo-function",
+        "java",
+        tmp_path,
+        "two.yaml",
+        "correct",
+        options={"resources": resources},
+    )
+
+    def render(namespace: str, stdin: str) -> list[str]:
+        (resources / "input.txt").write_text(stdin)
+        testcases = [
+            Testcase(
+                input=MainInput(
+                    stdin=TextData(data="input.txt", type=TextChannelType.FILE)
+                )
+            ),
+            Testcase(input=parse_string("echo_it(1)")),
+        ]
+        context = Context(testcases=testcases)
+        suite = Suite(tabs=[Tab(contexts=[context], name="t")], namespace=namespace)
+        fragments = precompute_fragments(create_bundle(conf, sys.stdout, suite))
+        rendered = [fragments.for_testcase(t) for t in testcases]
+        return [r.readable_input.description for r in rendered if r is not None]
+
+    assert render("submission", "one\n") == ["one\n", "Submission.echoIt(1)"]
+    assert render("counter", "one\n") == ["one\n", "Counter.echoIt(1)"]
+    assert render("counter", "two\n") == ["two\n", "Counter.echoIt(1)"]
+
+
+def test_statement_generation_is_memoized(
+    tmp_path: Path, pytestconfig: pytest.Config, mocker: MockerFixture
+):
+    conf = configuration(
+        pytestconfig, "echo-function", "python", tmp_path, "two.yaml", "correct"
+    )
+    bundle = create_bundle(conf, sys.stdout, Suite(tabs=[]))
+    mocker.patch("tested.languages.generation.statement_memo", Memo(max_size=2))
+    spy = mocker.spy(bundle.language, "generate_statement")
+
+    first = generate_statement(bundle, parse_string('echo_it(["a", 1])'))
+    second = generate_statement(bundle, parse_string('echo_it(["a", 1])'))
+    assert first == second == "echo_it(['a', 1])"
+    assert spy.call_count == 1
+    # A float is not the same as an integer.
+    assert generate_statement(bundle, parse_string('echo_it(["a", 1.0])')) != first
+    assert spy.call_count == 2
+
+    statistics = generation.statement_memo.statistics()
+    assert (statistics.hits, statistics.misses, statistics.size) == (1, 2, 2)
+
+
+def test_statement_memo_depends_on_namespace(
+    tmp_path: Path, pytestconfig: pytest.Config, mocker: MockerFixture
+):
+    conf = configuration(
+        pytestconfig, "echo-function", "java", tmp_path, "two.yaml", "correct"
+    )
+    mocker.patch("tested.languages.generation.statement_memo", Memo(max_size=2))
+    statement = parse_string("echo_it(1)")
+
+    default = create_bundle(conf, sys.stdout, Suite(tabs=[]))
+    assert generate_statement(default, statement) == "Submission.echoIt(1)"
+    counter = create_bundle(conf, sys.stdout, Suite(tabs=[], namespace="counter"))
+    assert generate_statement(counter, statement) == "Counter.echoIt(1)"
+
+
+def test_statement_memo_key_options_are_computed_once(
+    tmp_path: Path, pytestconfig: pytest.Config, mocker: MockerFixture
+):
+    conf = configuration(
+        pytestconfig, "echo-function", "python", tmp_path, "two.yaml", "correct"
+    )
+    bundle = create_bundle(conf, sys.stdout, Suite(tabs=[]))
+    spy = mocker.spy(DodonaConfig, "config_for")
+    for argument in ["1", "2", "3"]:
+        generate_statement(bundle, parse_string(f"echo_it({argument})"))
+    assert spy.call_count == 1
+
+
+def test_structural_key_distinguishes_raw_identifiers():
+    raw = Identifier("x")
+    raw.is_raw = True
+    assert structural_key(Identifier("x")) == structural_key(Identifier("x"))
+    assert structural_key(Identifier("x")) != structural_key(raw)
+    assert structural_key(Identifier("x")) != structural_key("x")
+
+
+def test_memo_removes_least_recently_used():
+    memo = Memo(max_size=2)
+    assert memo.get("a", lambda: 1) == 1
+    assert memo.get("b", lambda: 2) == 2
+    assert memo.get("a", lambda: 3) == 1
+    assert memo.get("c", lambda: 4) == 4
+    # "b" was used least recently, so it is computed again.
+    assert memo.get("b", lambda: 5) == 5
+    assert memo.get("c", lambda: 6) == 4
+    assert memo.statistics().hit_rate() == pytest.approx(2 / 6)
+
+
+# A server that executes bash scripts, in the protocol of the execution servers.
+FAKE_SERVER = """
+import json, subprocess, sys
+
+print(sys.stdin.readline().strip() + " 0", flush=True)
+for line in sys.stdin:
+    request = json.loads(line)
+    with open(request["stdin"]) as i, open(request["stdout"], "w") as o:
+        with open(request["stderr"], "w") as e:
+            process = subprocess.run(
+                ["bash", request["file"], *request["arguments"]],
+                cwd=request["directory"], stdin=i, stdout=o, stderr=e,
+            )
+    with open("requests.txt", "a") as log:
+        log.write(request["file"] + "\\n")
+    print("output " + request["token"] + " " + str(process.returncode), flush=True)
+"""
+
+
+def _fake_server(mocker: MockerFixture, script: Path):
+    script.write_text(FAKE_SERVER)
+    mocker.patch(
+        "tested.languages.bash.config.Bash.execution_server",
+        lambda self, directory, token: (
+            [sys.executable, str(script)],
+            token + "\n",
+        ),
+    )
+    mocker.patch(
+        "tested.languages.bash.config.Bash.server_request",
+        lambda self, request: json.dumps(
+            {
+                k: str(v) if isinstance(v, Path) else v
+                for k, v in attrs.asdict(request, recurse=False).items()
+            }
+        )
+        + "\n",
+    )
+
+
+def test_units_are_executed_by_execution_server(
+    tmp_path: Path, pytestconfig: pytest.Config, mocker: MockerFixture
+):
+    _fake_server(mocker, tmp_path / "server.py")
+    conf = configuration(
+        pytestconfig,
+        "echo",
+        "bash",
+        tmp_path,
+        "two.tson",
+        "correct",
+        options={"options": {"execution_server": True}},
+    )
+    result = execute_config(conf)
+    updates = assert_valid_output(result, pytestconfig)
+    assert updates.find_status_enum() == ["correct"] * 2
+    requests = (conf.workdir / "common" / "requests.txt").read_text().splitlines()
+    # Each context has stdin, so each one is a unit.
+    assert requests == ["execution_0.sh", "execution_1.sh"]
+
+
+def test_execution_server_start_up_is_not_part_of_unit_timeout(
+    tmp_path: Path, pytestconfig: pytest.Config, mocker: MockerFixture
+):
+    _fake_server(mocker, tmp_path / "server.py")
+    conf = configuration(
+        pytestconfig,
+        "echo",
+        "bash",
+        tmp_path,
+        "two.tson",
+        "correct",
+        options={"options": {"execution_server": True}},
+    )
+    bundle = create_bundle(conf, sys.stdout, Suite(tabs=[]))
+    (tmp_path / "unit").mkdir()
+    (tmp_path / "unit" / "slow.sh").write_text("sleep 1\necho done\n")
+    start = ExecutionServer.start
+
+    def slow_start(*args, **kwargs):
+        time.sleep(1.5)
+        return start(*args, **kwargs)
+
+    mocker.patch.object(ExecutionServer, "start", slow_start)
+    pool = get_server_pool(bundle)
+    assert pool is not None
+    try:
+        result = pool.execute(tmp_path, tmp_path / "unit", "slow.sh", [], None, 2)
+        assert result is not None
+        assert (result.stdout, result.timeout) == ("done\n", False)
+    finally:
+        close_servers(bundle)
+
+
+def test_execution_server_is_stopped_after_timeout(
+    tmp_path: Path, pytestconfig: pytest.Config, mocker: MockerFixture
+):
+    _fake_server(mocker, tmp_path / "server.py")
+    conf = configuration(
+        pytestconfig,
+        "echo",
+        "bash",
+        tmp_path,
+        "two.tson",
+        "correct",
+        options={"options": {"execution_server": True}},
+    )
+    bundle = create_bundle(conf, sys.stdout, Suite(tabs=[]))
+    (tmp_path / "unit").mkdir()
+    (tmp_path / "unit" / "slow.sh").write_text("echo start\nsleep 10\n")
+    (tmp_path / "unit" / "fast.sh").write_text('echo "$1"\nexit 3\n')
+    pool = get_server_pool(bundle)
+    assert pool is not None
+    try:
+        result = pool.execute(tmp_path, tmp_path / "unit", "slow.sh", [], None, 0.5)
+        assert result is not None and result.timeout
+        # The next unit gets a new server.
+        result = pool.execute(tmp_path, tmp_path / "unit", "fast.sh", ["a"], None, 5)
+        assert result is not None
+        assert (result.stdout, result.exit, result.timeout) == ("a\n", 3, False)
+    finally:
+        close_servers(bundle)
+
+
+def test_runhaskell_server_request_runs_unit_in_ghci():
+    language = get_language(None, "runhaskell")
+    request = ServerRequest(
+        token="token",
+        directory=Path("/work/unit"),
+        file="Selector.hs",
+        arguments=["Execution0"],
+        stdin=Path("/work/in"),
+        stdout=Path("/work/out"),
+        stderr=Path("/work/err"),
+    )
+    assert language.server_request(request) == (
+        'GhciRunner.runUnit "token" "/work/unit" "Selector.hs" ["Execution0"] '
+        '"/work/in" "/work/out" "/work/err" Selector.main\n'
+    )
+
+
+def test_haskell_compilations_have_own_output_directory(
+    tmp_path: Path, pytestconfig: pytest.Config, mocker: MockerFixture
+):
+    conf = configuration(pytestconfig, "echo", "haskell", tmp_path)
+    bundle = create_bundle(conf, sys.stdout, Suite(tabs=[]))
+    command, files = bundle.language.compilation(["Submission.hs", "Selector.hs"])
+    # The compilations run in parallel, so GHC itself does not.
+    assert command[:2] == ["ghc", "-keep-going"]
+    # The output directory is relative to the directory of the compilation.
+    assert command[command.index("-outputdir") + 1] == "ghc"
+    assert command[-2:] == ["-o", "Selector"]
+    # The compilations can run concurrently, also for runhaskell.
+    mocker.patch("os.cpu_count", return_value=2)
+    for language in ["haskell", "runhaskell"]:
+        conf = configuration(
+            pytestconfig,
+            "echo",
+            language,
+            tmp_path,
+            options={"memory_limit": 4 * 1024 * 1024 * 1024},
+        )
+        bundle = create_bundle(conf, sys.stdout, Suite(tabs=[]))
+        assert _compilation_workers(bundle) == 2
+
+
+FAKE_COMPILER = """
+import subprocess, sys
+
+print(sys.stdin.readline().strip() + " 0", flush=True)
+for line in sys.stdin:
+    token, directory, stdout, stderr, *command = line.rstrip("\\n").split("\\t")
+    if command == ["crash"]:
+        sys.exit(1)
+    with open(stdout, "w") as o, open(stderr, "w") as e:
+        process = subprocess.run(command, cwd=directory, stdout=o, stderr=e)
+    with open("compilations.txt", "a") as log:
+        log.write(command[0] + "\\n")
+    print(token + " " + str(process.returncode), flush=True)
+"""
+
+
+def _fake_compiler(mocker: MockerFixture, script: Path):
+    script.write_text(FAKE_COMPILER)
+    mocker.patch(
+        "tested.languages.c.config.C.compilation_server",
+        lambda self, directory, token: ([sys.executable, str(script)], token + "\n"),
+    )
+    mocker.patch(
+        "tested.languages.c.config.C.compilation_request",
+        lambda self, request: "\t".join(
+            [
+                request.token,
+                str(request.directory),
+                str(request.stdout),
+                str(request.stderr),
+                request.file,
+                *request.arguments,
+            ]
+        )
+        + "\n",
+    )
+
+
+def test_code_is_compiled_by_compilation_server(
+    tmp_path: Path, pytestconfig: pytest.Config, mocker: MockerFixture
+):
+    _fake_compiler(mocker, tmp_path / "compiler.py")
+    conf = configuration(
+        pytestconfig,
+        "echo",
+        "c",
+        tmp_path,
+        "two.tson",
+        "correct",
+        options={"options": {"compilation_server": True}},
+    )
+    result = execute_config(conf)
+    updates = assert_valid_output(result, pytestconfig)
+    assert updates.find_status_enum() == ["correct"] * 2
+    compilations = (conf.workdir / "compilations.txt").read_text().splitlines()
+    assert compilations == ["gcc"]
+
+
+def test_compilation_server_falls_back_after_crash(
+    tmp_path: Path, pytestconfig: pytest.Config, mocker: MockerFixture
+):
+    _fake_compiler(mocker, tmp_path / "compiler.py")
+    conf = configuration(
+        pytestconfig,
+        "echo",
+        "c",
+        tmp_path,
+        "two.tson",
+        "correct",
+        options={"options": {"compilation_server": True}},
+    )
+    bundle = create_bundle(conf, sys.stdout, Suite(tabs=[]))
+    pool = get_compilation_servers(bundle)
+    assert pool is not None
+    try:
+        pool.warm_up(tmp_path, 5)
+        result = pool.compile(tmp_path, tmp_path, ["echo", "a"], 5)
+        assert result is not None and (result.stdout, result.exit) == ("a\n", 0)
+        assert pool.compile(tmp_path, tmp_path, ["crash"], 5) is None
+        # The crashed server is not started again.
+        assert pool.compile(tmp_path, tmp_path, ["echo", "a"], 5) is None
+    finally:
+        close_servers(bundle)
+
+
+def test_kotlin_compilation_request_uses_absolute_paths(
+    tmp_path: Path, pytestconfig: pytest.Config
+):
+    conf = configuration(pytestconfig, "echo", "kotlin", tmp_path)
+    bundle = create_bundle(conf, sys.stdout, Suite(tabs=[]))
+    (tmp_path / "Submission.kt").touch()
+    command, _ = bundle.language.compilation(["Submission.kt", "lib.jar"])
+    request = ServerRequest(
+        token="token",
+        directory=tmp_path,
+        file=command[0],
+        arguments=command[1:],
+        stdin=Path("/work/in"),
+        stdout=Path("/work/out"),
+        stderr=Path("/work/err"),
+    )
+    fields = bundle.language.compilation_request(request).rstrip("\n").split("\t")
+    assert fields[:3] == ["token", "/work/out", "/work/err"]
+    arguments = fields[3:]
+    assert not any(a.startswith("-J") for a in arguments)
+    assert arguments[arguments.index("-cp") + 1] == str(tmp_path)
+    assert str(tmp_path / "Submission.kt") in arguments
+    assert arguments[-2:] == ["-d", str(tmp_path)]
+
+
+def _fake_cds_judge(judge: Path, language: str, fingerprint: str | None = None):
+    languages = Path(__file__).parent.parent / "tested" / "languages"
+    shutil.copytree(
+        languages / language / "templates",
+        judge / "tested" / "languages" / language / "templates",
+    )
+    archive_dir = judge / "tested" / "languages" / language / "cds"
+    archive_dir.mkdir()
+    (archive_dir / "tested.jsa").touch()
+    manifest = {
+        "fingerprint": fingerprint or cds._fingerprint(judge, language),
+        "classpath": [str(archive_dir / "harness.jar")],
+    }
+    (archive_dir / "manifest.json").write_text(json.dumps(manifest))
+
+
+@pytest.mark.parametrize("language", ["java", "kotlin"])
+def test_jvm_execution_uses_cds_archive(
+    language: str, tmp_path: Path, pytestconfig: pytest.Config
+):
+    judge = tmp_path / "judge"
+    _fake_cds_judge(judge, language)
+    conf = attrs.evolve(
+        configuration(pytestconfig, "echo", language, tmp_path), judge=judge
+    )
+    bundle = create_bundle(conf, sys.stdout, Suite(tabs=[]))
+    command = bundle.language.execution(tmp_path, "Main.class", ["a"])
+    archive = judge / "tested" / "languages" / language / "cds"
+    assert command[0] == "java"
+    assert f"-XX:SharedArchiveFile={archive / 'tested.jsa'}" in command
+    class_path = command[command.index("-cp") + 1].split(os.pathsep)
+    assert class_path == [str(archive / "harness.jar"), "."]
+    assert command[-2:] == ["Main", "a"]
+
+
+def test_outdated_cds_archive_is_not_used(tmp_path: Path, pytestconfig: pytest.Config):
+    judge = tmp_path / "judge"
+    _fake_cds_judge(judge, "java", fingerprint="outdated")
+    conf = attrs.evolve(
+        configuration(pytestconfig, "echo", "java", tmp_path), judge=judge
+    )
+    bundle = create_bundle(conf, sys.stdout, Suite(tabs=[]))
+    command = bundle.language.execution(tmp_path, "Main.class", [])
+    assert not any(c.startswith("-XX:SharedArchiveFile") for c in command)
+    assert command[command.index("-cp") + 1] == "."
+
+
+@pytest.mark.parametrize(
+    "exercise,suite,solution,expected",
+    [
+        ("echo", "two.tson", "correct", ["correct"] * 2),
+        ("echo", "two.tson", "run-error", ["runtime error", "wrong"] * 2),
+        ("echo-function", "two.yaml", "correct", ["correct"] * 2),
+    ],
+)
+def test_csharp_compiled_with_csc(
+    exercise: str,
+    suite: str,
+    solution: str,
+    expected: list[str],
+    tmp_path: Path,
+    pytestconfig: pytest.Config,
+):
+    conf = configuration(
+        pytestconfig,
+        exercise,
+        "csharp",
+        tmp_path,
+        suite,
+        solution,
+        options={"options": {"language": {"csharp": {"compiler": "csc"}}}},
+    )
+    result = execute_config(conf)
+    updates = assert_valid_output(result, pytestconfig)
+    assert updates.find_status_enum() == expected
+    assert not (conf.workdir / "common" / "obj").exists()
+
+
+def test_csharp_csc_reports_compilation_errors(
+    tmp_path: Path, pytestconfig: pytest.Config
+):
+    conf = configuration(
+        pytestconfig,
+        "echo",
+        "csharp",
+        tmp_path,
+        "two.tson",
+        "comp-error",
+        options={
+            "options": {
+                "allow_fallback": False,
+                "language": {"csharp": {"compiler": "csc"}},
+            }
+        },
+    )
+    result = execute_config(conf)
+    updates = assert_valid_output(result, pytestconfig)
+    assert "compilation error" in updates.find_status_enum()
+    message = updates.find_next("append-message")["message"]["description"]
+    # The locations are links to the submission, as with dotnet build.
+    assert 'data-line="13"' in message
+
+
+def test_typescript_executes_transpiled_javascript(
+    tmp_path: Path, pytestconfig: pytest.Config
+):
+    conf = configuration(pytestconfig, "echo", "typescript", tmp_path)
+    bundle = create_bundle(conf, sys.stdout, Suite(tabs=[]))
+    (tmp_path / "execution_0.ts").touch()
+    assert bundle.language.execution(tmp_path, "execution_0.ts", ["a"]) == [
+        "tsx",
+        "execution_0.ts",
+        "a",
+    ]
+    (tmp_path / "execution_0.js").touch()
+    assert bundle.language.execution(tmp_path, "execution_0.ts", ["a"]) == [
+        "node",
+        "--enable-source-maps",
+        "execution_0.js",
+        "a",
+    ]
+
+
+def test_typescript_compilation_server_requests(
+    tmp_path: Path, pytestconfig: pytest.Config, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setenv("NODE_PATH", "/modules")
+    conf = configuration(
+        pytestconfig,
+        "echo",
+        "typescript",
+        tmp_path,
+        options={"options": {"compilation_server": True}},
+    )
+    bundle = create_bundle(conf, sys.stdout, Suite(tabs=[]))
+    command, files = bundle.language.compilation(["values.ts", "submission.ts"])
+    # The transpiled JavaScript is part of the compilation results.
+    assert callable(files)
+    assert files(tmp_path / "submission.js") and files(tmp_path / "values.ts")
+    assert not files(tmp_path / "other.js")
+
+    request = ServerRequest(
+        token="token",
+        directory=tmp_path,
+        file=command[0],
+        arguments=command[1:],
+        stdin=Path("/work/in"),
+        stdout=Path("/work/out"),
+        stderr=Path("/work/err"),
+    )
+    sent = json.loads(bundle.language.compilation_request(request))
+    assert sent["token"] == "token"
+    assert sent["directory"] == str(tmp_path)
+    assert sent["command"] == command
+
+
+def test_javascript_units_are_executed_by_node_helper(
+    tmp_path: Path, pytestconfig: pytest.Config
+):
+    conf = configuration(
+        pytestconfig,
+        "echo",
+        "javascript",
+        tmp_path,
+        "two.tson",
+        "correct",
+        options={"options": {"execution_server": True}},
+    )
+    bundle = create_bundle(conf, sys.stdout, Suite(tabs=[]))
+    (tmp_path / "unit").mkdir()
+    (tmp_path / "unit" / "echo.js").write_text(
+        "const fs = require('fs');\n"
+        "const input = fs.readFileSync(0, 'utf-8');\n"
+        "fs.writeSync(process.stdout.fd, input + process.argv[2] + '\\n');\n"
+        "console.error(require('path').basename(process.cwd()));\n"
+        "process.exit(3);\n"
+    )
+    (tmp_path / "unit" / "error.js").write_text("throw new Error('boom');\n")
+    # Writes to the standard streams by file descriptor or by path.
+    (tmp_path / "unit" / "write.js").write_text(
+        "const fs = require('fs');\n"
+        "fs.writeSync(1, 'a\\n');\n"
+        "fs.writeFileSync('/dev/stdout', 'b\\n');\n"
+        "fs.appendFileSync(2, 'c\\n');\n"
+        "const stream = fs.createWriteStream('/dev/stdout');\n"
+        "stream.end('d\\n');\n"
+    )
+    pool = get_server_pool(bundle)
+    assert pool is not None
+    try:
+        result = pool.execute(
+            tmp_path, tmp_path / "unit", "echo.js", ["a"], "input\n", 10
+        )
+        assert result is not None
+        assert (result.stdout, result.stderr) == ("input\na\n", "unit\n")
+        assert result.exit == 3
+        # The same helper executes the next unit, in a new worker.
+        result = pool.execute(tmp_path, tmp_path / "unit", "error.js", [], None, 10)
+        assert result is not None
+        assert result.exit == 1 and "Error: boom" in result.stderr
+        result = pool.execute(tmp_path, tmp_path / "unit", "write.js", [], None, 10)
+        assert result is not None
+        assert (result.stdout, result.stderr, result.exit) == ("a\nb\nd\n", "c\n", 0)
+    finally:
+        close_servers(bundle)
+
+
+def test_c_harness_is_prebuilt_once(
+    tmp_path: Path, pytestconfig: pytest.Config, mocker: MockerFixture
+):
+    cache = tmp_path / "cache"
+
+    def judge(name: str) -> list[str]:
+        workdir = tmp_path / name
+        workdir.mkdir()
+        conf = configuration(
+            pytestconfig,
+            "echo-function",
+            "c",
+            workdir,
+            "one.tson",
+            "correct",
+            options={"options": {"cache": str(cache)}},
+        )
+        result = execute_config(conf)
+        updates = assert_valid_output(result, pytestconfig)
+        return updates.find_status_enum()
+
+    assert judge("first") == ["correct"]
+    (entry,) = (cache / "c").iterdir()
+    assert (entry / "values.o").is_file()
+    assert (entry / f"{build.HARNESS_HEADER}.gch").is_file()
+
+    # Later judgements link the prebuilt harness.
+    spy = mocker.spy(build, "_build")
+    build._builds.clear()
+    assert judge("second") == ["correct"]
+    assert spy.call_count == 0
+
+
+def test_c_harness_is_built_in_workdir_without_cache(
+    tmp_path: Path, pytestconfig: pytest.Config, mocker: MockerFixture
+):
+    def judge(name: str) -> list[str]:
+        workdir = tmp_path / name
+        workdir.mkdir()
+        conf = configuration(
+            pytestconfig, "echo-function", "c", workdir, "one.tson", "correct"
+        )
+        result = execute_config(conf)
+        updates = assert_valid_output(result, pytestconfig)
+        return updates.find_status_enum()
+
+    spy = mocker.spy(build, "_build")
+    assert judge("first") == ["correct"]
+    (entry,) = (tmp_path / "first" / "common" / "harness").iterdir()
+    assert (entry / "values.o").is_file()
+    assert spy.call_count == 1
+
+    # A later judgement in the same (emptied) working directory builds it again.
+    shutil.rmtree(tmp_path / "first")
+    assert judge("first") == ["correct"]
+    assert (entry / "values.o").is_file()
+    assert spy.call_count == 2
+
+
+def test_bash_units_are_executed_by_shell_server(
+    tmp_path: Path, pytestconfig: pytest.Config
+):
+    conf = configuration(
+        pytestconfig,
+        "echo",
+        "bash",
+        tmp_path,
+        "two.tson",
+        "correct",
+        options={"options": {"execution_server": True}},
+    )
+    bundle = create_bundle(conf, sys.stdout, Suite(tabs=[]))
+    (tmp_path / "unit").mkdir()
+    (tmp_path / "unit" / "echo.sh").write_text(
+        'echo "$0 $1 $(basename "$PWD") ${LEAKED:-unset}"\n'
+        "LEAKED=yes\n"
+        "cat\n"
+        "exit 3\n"
+    )
+    (tmp_path / "unit" / "slow.sh").write_text("echo $BASHPID >pid.txt\nsleep 10\n")
+    pool = get_server_pool(bundle)
+    assert pool is not None
+    try:
+        for _ in range(2):
+            # Each unit runs in a new subshell, so it does not see the last one.
+            result = pool.execute(
+                tmp_path, tmp_path / "unit", "echo.sh", ["a"], "input\n", 10
+            )
+            assert result is not None
+            assert result.stdout == "echo.sh a unit unset\ninput\n"
+            assert result.exit == 3
+
+        result = pool.execute(tmp_path, tmp_path / "unit", "slow.sh", [], None, 0.5)
+        assert result is not None and result.timeout
+        # The unit is stopped with the server.
+        pid = (tmp_path / "unit" / "pid.txt").read_text().strip()
+        stat = Path("/proc", pid, "stat")
+        assert not stat.exists() or stat.read_text().split()[2] == "Z"
+    finally:
+        close_servers(bundle)
+
+
+@pytest.mark.parametrize("fork", [False, True])
+def test_python_units_are_executed_from_bytecode_bundle(
+    fork: bool, tmp_path: Path, pytestconfig: pytest.Config
+):
+    python_options = {"bytecodeBundle": True, "forkContexts": fork}
+    conf = configuration(
+        pytestconfig,
+        "echo",
+        "python",
+        tmp_path,
+        "two.tson",
+        "correct",
+        options={"options": {"language": {"python": python_options}}},
+    )
+    result = execute_config(conf)
+    updates = assert_valid_output(result, pytestconfig)
+    assert updates.find_status_enum() == ["correct"] * 2
+    # The unit only gets the bundle instead of the bytecode of each file.
+    unit_files = {x.suffix for x in (tmp_path / "execution_0").iterdir()}
+    assert ".pyz" in unit_files and ".pyc" not in unit_files
+
+
+def test_execution_server_watches_limits_and_cancels_units(
+    tmp_path: Path, pytestconfig: pytest.Config
+):
+    conf = configuration(
+        pytestconfig,
+        "echo",
+        "bash",
+        tmp_path,
+        "two.tson",
+        "correct",
+        options={"options": {"execution_server": True}},
+    )
+    bundle = create_bundle(conf, sys.stdout, Suite(tabs=[]))
+    (tmp_path / "unit").mkdir()
+    (tmp_path / "unit" / "loop.sh").write_text("while true; do echo output; done\n")
+    (tmp_path / "unit" / "slow.sh").write_text("echo started\nsleep 10\n")
+    pool = get_server_pool(bundle)
+    assert pool is not None
+    try:
+        # The unit is stopped once its output exceeds the limit.
+        start = time.perf_counter()
+        result = pool.execute(
+            tmp_path, tmp_path / "unit", "loop.sh", [], None, 10, limit=1000
+        )
+        assert result is not None
+        assert result.truncated and not result.timeout and not result.memory
+        assert len(result.stdout) == 1000
+        assert time.perf_counter() - start < 5
+
+        # The output is watched while the unit runs, and the unit can be cancelled.
+        cancel = threading.Event()
+        seen = []
+
+        def watch(stdout: OutputBuffer, stderr: OutputBuffer):
+            seen.append(bytes(stdout.data))
+            if b"started" in stdout.data:
+                cancel.set()
+
+        start = time.perf_counter()
+        result = pool.execute(
+            tmp_path, tmp_path / "unit", "slow.sh", [], None, 10, watch, cancel
+        )
+        assert result is not None and not result.timeout
+        assert b"started\n" in seen
+        assert time.perf_counter() - start < 5
+    finally:
+        close_servers(bundle)
@@ -40,6 +40,7 @@ from tested.judge.execution import execute_file, filter_files
 from tested.judge.utils import BaseExecutionResult, copy_from_paths_to_path
 from tested.languages.conventionalize import conventionalize_namespace
 from tested.oracles.value import _check_simple_type
+from tested.parsing import get_converter
 from tested.serialisation import (
     BooleanType,
     NothingType,
@@ -50,6 +51,7 @@ from tested.serialisation import (
     SpecialNumbers,
     StringType,
     Value,
+    decode_value,
     parse_value,
     to_python_comparable,
 )
@@ -352,3 +354,14 @@ def test_valid_type_map(language: str, tmp_path: Path, pytestconfig: pytest.Conf
             basic_type = resolve_to_basic(advanced_type)
             basic_value = type_map[basic_type]
             assert basic_value == TypeSupport.SUPPORTED
+
+
+@pytest.mark.parametrize("value", BASIC_VALUES + ADVANCED_VALUES)
+def test_decoder_matches_converter(value: Value):
+    encoded = get_converter().unstructure(value)
+    assert decode_value(encoded) == get_converter().structure(encoded, Value)
+
+
+def test_decoder_falls_back_to_converter():
+    encoded = {"type": "text", "data": 5, "diagnostic": None}
+    assert decode_value(encoded) == StringType(type=BasicStringTypes.TEXT, data="5")